@@ -1,24 +1,117 @@
+import os
 import re
+import json
+import threading
 from langchain_groq import ChatGroq
+from pydantic import BaseModel, Field, ValidationError
 from dotenv import load_dotenv
+from response_cache import ResponseCache
 
 load_dotenv()
 
+_cache_padrao = None
+_lock_cache = threading.Lock()
+
+def cache_padrao():
+    """Cache de respostas compartilhado por todos os GroqClient do processo."""
+    global _cache_padrao
+    with _lock_cache:
+        if _cache_padrao is None:
+            _cache_padrao = ResponseCache()
+    return _cache_padrao
+
+class ResumoCurriculo(BaseModel):
+    nome_completo: str
+    experiencia: str
+    habilidades: str
+    educacao: str
+    idiomas: str
+
+class OpiniaoCurriculo(BaseModel):
+    pontos_alinhamento: str
+    pontos_desalinhamento: str
+    pontos_atencao: str
+
+class AnaliseCompleta(BaseModel):
+    resumo: ResumoCurriculo
+    opiniao: OpiniaoCurriculo
+    score: float = Field(ge=0, le=10)
+
+    def resumo_markdown(self):
+        """Mesmo modelo de prompt_resumo, para extract_data_analysis continuar funcionando."""
+        r = self.resumo
+        return (
+            f"## Nome Completo\n{r.nome_completo}\n\n"
+            f"## Experiência\n{r.experiencia}\n\n"
+            f"## Habilidades\n{r.habilidades}\n\n"
+            f"## Educação\n{r.educacao}\n\n"
+            f"## Idiomas\n{r.idiomas}"
+        )
+
+    def opiniao_markdown(self):
+        o = self.opiniao
+        return (
+            f"## 1. Pontos de Alinhamento\n{o.pontos_alinhamento}\n\n"
+            f"## 2. Pontos de Desalinhamento\n{o.pontos_desalinhamento}\n\n"
+            f"## 3. Pontos de Atenção\n{o.pontos_atencao}"
+        )
+
 class GroqClient:
-    def __init__(self, model_id='llama-3.3-70b-versatile'):
+    def __init__(self, model_id='llama-3.3-70b-versatile', usar_cache=None, cache=None):
         self.model_id = model_id
         self.client = ChatGroq(model=self.model_id)
+        # Mesmo modelo, mas com saída restrita a um objeto JSON (modo combinado)
+        self.client_json = self.client.bind(response_format={"type": "json_object"})
+        # Cache de respostas em disco; GROQ_CACHE=0 (ou usar_cache=False) desliga
+        if usar_cache is None:
+            usar_cache = os.getenv('GROQ_CACHE', '1') != '0'
+        self.cache = (cache or cache_padrao()) if usar_cache else None
        
-    def generate_response(self, prompt):
+    def resposta_em_cache(self, prompt):
+        """Resposta guardada para o prompt, ou None (ausente ou cache desligado)."""
+        return self.cache.get(self.model_id, prompt) if self.cache is not None else None
+
+    def guardar_resposta(self, prompt, resposta):
+        if self.cache is not None and resposta:
+            self.cache.set(self.model_id, prompt, resposta)
+
+    def generate_response(self, prompt, usar_cache=True, formato_json=False):
+        if usar_cache:
+            em_cache = self.resposta_em_cache(prompt)
+            if em_cache is not None:
+                return em_cache
+
         try:
-            response = self.client.invoke(prompt)
-            return response.content
+            client = self.client_json if formato_json else self.client
+            response = client.invoke(prompt)
         except Exception as e:
             print(f"❌ Erro ao gerar resposta da IA: {e}")
             return ""
 
-    def resum_cv(self, cv):
-        prompt = f'''
+        if usar_cache:
+            self.guardar_resposta(prompt, response.content)
+        return response.content
+
+    async def agenerate_response(self, prompt, usar_cache=True, formato_json=False):
+        """Versão assíncrona. Propaga exceções para o chamador decidir sobre retentativas."""
+        if usar_cache:
+            em_cache = self.resposta_em_cache(prompt)
+            if em_cache is not None:
+                return em_cache
+
+        client = self.client_json if formato_json else self.client
+        response = await client.ainvoke(prompt)
+
+        if usar_cache:
+            self.guardar_resposta(prompt, response.content)
+        return response.content
+
+    def estatisticas_cache(self):
+        """Hits/misses e tamanho do cache de respostas (None se o cache estiver desligado)."""
+        return self.cache.estatisticas() if self.cache is not None else None
+
+    def prompt_resumo(self, cv):
+        return f'''
             Solicitação de Resumo de Currículo em Markdown:
 
             Currículo do Candidato:
@@ -46,8 +139,7 @@ class GroqClient:
             ```
         '''
 
-        result_raw = self.generate_response(prompt)
-
+    def extrair_markdown(self, result_raw):
         try:
             result = result_raw.split("```markdown")[1].split("```")[0].strip()
         except Exception as e:
@@ -55,9 +147,17 @@ class GroqClient:
             result = result_raw  # fallback
 
         return result
+
+    def resum_cv(self, cv):
+        result_raw = self.generate_response(self.prompt_resumo(cv))
+        return self.extrair_markdown(result_raw)
+
+    async def aresum_cv(self, cv):
+        result_raw = await self.agenerate_response(self.prompt_resumo(cv))
+        return self.extrair_markdown(result_raw)
     
-    def generate_score(self, cv, vaga, max_attempts=3):
-        prompt = f'''
+    def prompt_score(self, cv, vaga):
+        return f'''
             Objetivo: Avaliar o currículo com base na vaga e gerar uma pontuação final (máximo 10.0).
 
             Critérios e Pesos:
@@ -80,7 +180,13 @@ class GroqClient:
             Obs: A nota deve estar no formato: Pontuação Final: 7.5 (apenas isso).
         '''
 
-        result_raw = self.generate_response(prompt)
+    def generate_score(self, cv, vaga, max_attempts=3):
+        result_raw = self.generate_response(self.prompt_score(cv, vaga))
+        score = self.extract_score_from_result(result_raw)
+        return score if score is not None else 0.0
+
+    async def agenerate_score(self, cv, vaga):
+        result_raw = await self.agenerate_response(self.prompt_score(cv, vaga))
         score = self.extract_score_from_result(result_raw)
         return score if score is not None else 0.0
 
@@ -100,8 +206,8 @@ class GroqClient:
         print(result_raw)
         return None
 
-    def generate_opinion(self, cv, vaga):
-        prompt = f'''
+    def prompt_opiniao(self, cv, vaga):
+        return f'''
             Você é um recrutador sênior. Analise criticamente o currículo abaixo com base na vaga.
 
             Estruture a resposta com os seguintes tópicos, com títulos grandes:
@@ -119,7 +225,135 @@ class GroqClient:
             Gere a resposta como um relatório bem estruturado e profissional.
         '''
 
-        return self.generate_response(prompt)
+    def generate_opinion(self, cv, vaga):
+        return self.generate_response(self.prompt_opiniao(cv, vaga))
+
+    async def agenerate_opinion(self, cv, vaga):
+        return await self.agenerate_response(self.prompt_opiniao(cv, vaga))
+
+    ####################### Modo combinado ###############################
+    #
+    # Uma única chamada devolve resumo, opinião e score em JSON: o currículo
+    # é enviado uma vez só, em vez de três (resum_cv + generate_opinion + generate_score).
+
+    def prompt_analise_completa(self, cv, vaga):
+        return f'''
+            Você é um recrutador sênior. Analise o currículo abaixo com base na vaga e
+            responda APENAS com um objeto JSON válido, sem texto fora do JSON, no formato:
+
+            {{
+                "resumo": {{
+                    "nome_completo": "...",
+                    "experiencia": "...",
+                    "habilidades": "...",
+                    "educacao": "...",
+                    "idiomas": "..."
+                }},
+                "opiniao": {{
+                    "pontos_alinhamento": "O que está aderente à vaga?",
+                    "pontos_desalinhamento": "O que não atende aos requisitos?",
+                    "pontos_atencao": "Lacunas, mudanças de carreira, etc."
+                }},
+                "score": 7.5
+            }}
+
+            Os textos podem usar Markdown (listas, negrito). O "score" é um número de 0 a 10,
+            calculado com os pesos: Experiência (30%), Habilidades Técnicas (25%),
+            Educação (10%), Pontos Fortes (15%), Pontos Fracos (10%).
+
+            Currículo:
+            {cv}
+
+            Vaga:
+            {vaga}
+        '''
+
+    def prompt_reparo_json(self, result_raw, erro):
+        return f'''
+            A resposta abaixo deveria ser um objeto JSON com as chaves "resumo"
+            (nome_completo, experiencia, habilidades, educacao, idiomas), "opiniao"
+            (pontos_alinhamento, pontos_desalinhamento, pontos_atencao) e "score" (número de 0 a 10),
+            mas a validação falhou com o erro:
+
+            {erro}
+
+            Resposta original:
+            {result_raw}
+
+            Corrija e responda APENAS com o objeto JSON válido.
+        '''
+
+    def validar_analise(self, result_raw):
+        """Extrai o JSON da resposta e valida com AnaliseCompleta (ValueError se inválido)."""
+        texto = (result_raw or "").strip()
+        inicio, fim = texto.find("{"), texto.rfind("}")
+        if inicio == -1 or fim < inicio:
+            raise ValueError("nenhum objeto JSON encontrado na resposta")
+        try:
+            return AnaliseCompleta.model_validate(json.loads(texto[inicio:fim + 1]))
+        except (json.JSONDecodeError, ValidationError) as e:
+            raise ValueError(str(e)) from e
+
+    def analise_em_cache(self, prompt):
+        """AnaliseCompleta guardada para o prompt, ou None (entradas inválidas são ignoradas)."""
+        em_cache = self.resposta_em_cache(prompt)
+        if em_cache is None:
+            return None
+        try:
+            return self.validar_analise(em_cache)
+        except ValueError:
+            return None
+
+    def analisar_completo(self, cv, vaga, max_reparos=1):
+        """
+        Resumo, opinião e score numa chamada só.
+        Retorna (resumo_markdown, opiniao_markdown, score); se a resposta não passar na
+        validação, pede a correção até `max_reparos` vezes e então levanta ValueError.
+        Só o JSON validado vai para o cache, sob o prompt original.
+        """
+        prompt = self.prompt_analise_completa(cv, vaga)
+        analise = self.analise_em_cache(prompt)
+        if analise is not None:
+            return analise.resumo_markdown(), analise.opiniao_markdown(), analise.score
+
+        result_raw = self.generate_response(prompt, usar_cache=False, formato_json=True)
+        for reparo in range(max_reparos + 1):
+            try:
+                analise = self.validar_analise(result_raw)
+                self.guardar_resposta(prompt, analise.model_dump_json())
+                return analise.resumo_markdown(), analise.opiniao_markdown(), analise.score
+            except ValueError as e:
+                if reparo == max_reparos:
+                    raise
+                print(f"⚠️ JSON da análise inválido ({e}). Pedindo correção...")
+                result_raw = self.generate_response(self.prompt_reparo_json(result_raw, e),
+                                                    usar_cache=False, formato_json=True)
+
+    async def aanalisar_completo(self, cv, vaga, max_reparos=1, gerar=None):
+        """
+        Versão assíncrona de analisar_completo. `gerar(prompt)` permite ao chamador envolver
+        cada requisição (limite de taxa, retentativas); o padrão é agenerate_response.
+        """
+        if gerar is None:
+            async def gerar(prompt, usar_cache=True):
+                return await self.agenerate_response(prompt, usar_cache=usar_cache, formato_json=True)
+
+        prompt = self.prompt_analise_completa(cv, vaga)
+        analise = self.analise_em_cache(prompt)
+        if analise is not None:
+            return analise.resumo_markdown(), analise.opiniao_markdown(), analise.score
+
+        result_raw = await gerar(prompt, usar_cache=False)
+        for reparo in range(max_reparos + 1):
+            try:
+                analise = self.validar_analise(result_raw)
+                self.guardar_resposta(prompt, analise.model_dump_json())
+                return analise.resumo_markdown(), analise.opiniao_markdown(), analise.score
+            except ValueError as e:
+                if reparo == max_reparos:
+                    raise
+                print(f"⚠️ JSON da análise inválido ({e}). Pedindo correção...")
+                result_raw = await gerar(self.prompt_reparo_json(result_raw, e), usar_cache=False)
     
 if __name__ == "__main__":
     print("ai.py rodou com sucesso!")
@@ -1,48 +1,114 @@
 import uuid
-from helper import extract_data_analysis, read_pdf
+import asyncio
+from helper import extract_data_analysis, extrair_textos_pdf
 from database import AnalyseDatabase
 from ai import GroqClient
 from models.analysis import Analysis
+from rate_limiter import TokenBucket, com_retentativas
 
-def analisar_vaga(codigo_vaga):
+
+def estimar_tokens(texto):
+    """Estimativa grosseira (~4 caracteres por token) usada no limite de tokens por minuto."""
+    return max(1, len(texto) // 4)
+
+
+def progresso_padrao(concluidos, total, nome, status):
+    print(f"[{concluidos}/{total}] {nome}: {status}")
+
+
+async def analisar_vaga_async(codigo_vaga, concorrencia=5, requisicoes_por_minuto=30,
+                              tokens_por_minuto=None, max_tentativas=4, modo_combinado=True,
+                              ao_progresso=progresso_padrao):
+    """
+    Analisa os candidatos da vaga em paralelo.
+
+    - `concorrencia`: candidatos processados ao mesmo tempo;
+    - `requisicoes_por_minuto` / `tokens_por_minuto`: token buckets respeitando os limites do provedor
+      (tokens_por_minuto=None desliga o limite de tokens);
+    - cada chamada ao Groq é refeita até `max_tentativas` vezes com backoff exponencial;
+    - `modo_combinado`: resumo, opinião e score numa única chamada JSON por candidato
+      (False volta às três chamadas separadas);
+    - `ao_progresso(concluidos, total, nome, status)` é chamado ao fim de cada candidato.
+
+    Retorna a lista de Analysis geradas.
+    """
     database = AnalyseDatabase()
     ai = GroqClient()
 
     # Buscar vaga
-    vaga = next((v for v in database.get_all_vagas() if v['codigo_vaga'] == codigo_vaga), None)
+    vaga = database.get_vaga_by_codigo(codigo_vaga)
     if not vaga:
         print("❌ Vaga não encontrada.")
-        return
+        return []
 
     # Buscar candidatos vinculados
     candidatos = database.get_applicants(codigo_vaga)
     if not candidatos:
         print("⚠️ Nenhum candidato encontrado para esta vaga.")
-        return
+        return []
 
     # Descrição da vaga usada para análise
     descricao = vaga.get("descricao_vaga", vaga.get("titulo_vaga", ""))
 
-    for cv in candidatos:
+    # Texto de todos os PDFs de uma vez (pool de processos + cache por caminho/mtime/tamanho)
+    caminhos = [cv.get('caminho_pdf') for cv in candidatos if cv.get('caminho_pdf')]
+    textos = await asyncio.to_thread(extrair_textos_pdf, caminhos)
+
+    semaforo = asyncio.Semaphore(concorrencia)
+    limite_requisicoes = TokenBucket(requisicoes_por_minuto)
+    limite_tokens = TokenBucket(tokens_por_minuto) if tokens_por_minuto else None
+
+    total = len(candidatos)
+    concluidos = 0
+    analises = []
+
+    async def chamar(nome, etapa, prompt, formato_json=False, usar_cache=True):
+        # Resposta já em cache volta direto, sem consumir requisições/tokens dos limites
+        if usar_cache:
+            em_cache = ai.resposta_em_cache(prompt)
+            if em_cache is not None:
+                return em_cache
+
+        async def tentativa():
+            await limite_requisicoes.adquirir()
+            if limite_tokens is not None:
+                await limite_tokens.adquirir(estimar_tokens(prompt))
+            return await ai.agenerate_response(prompt, usar_cache=False, formato_json=formato_json)
+
+        resposta = await com_retentativas(tentativa, max_tentativas=max_tentativas, descricao=f"{etapa} de {nome}")
+        if usar_cache:
+            ai.guardar_resposta(prompt, resposta)
+        return resposta
+
+    async def analisar_candidato(cv):
         nome = cv.get("nome", "Sem Nome")
         caminho_pdf = cv.get('caminho_pdf')
 
         if not caminho_pdf:
-            print(f"⚠️ Candidato {nome} sem caminho para o PDF.")
-            continue
+            return nome, f"⚠️ Candidato {nome} sem caminho para o PDF."
 
-        content = read_pdf(caminho_pdf)
+        content = textos.get(caminho_pdf)
         if not content:
-            print(f"⚠️ Currículo vazio ou ilegível: {nome}")
-            continue
+            return nome, f"⚠️ Currículo vazio ou ilegível: {nome}"
+
+        async def gerar_json(prompt, usar_cache=True):
+            return await chamar(nome, "análise", prompt, formato_json=True, usar_cache=usar_cache)
 
         try:
-            resumo = ai.resum_cv(content)  # Corrigido: apenas conteúdo
-            opiniao = ai.generate_opinion(content, descricao)
-            score = ai.generate_score(content, descricao)
+            if modo_combinado:
+                resumo, opiniao, score = await ai.aanalisar_completo(content, descricao, gerar=gerar_json)
+            else:
+                # As três chamadas do mesmo candidato são independentes entre si
+                resumo_raw, opiniao, score_raw = await asyncio.gather(
+                    chamar(nome, "resumo", ai.prompt_resumo(content)),
+                    chamar(nome, "opinião", ai.prompt_opiniao(content, descricao)),
+                    chamar(nome, "score", ai.prompt_score(content, descricao)),
+                )
+                resumo = ai.extrair_markdown(resumo_raw)
+                score = ai.extract_score_from_result(score_raw)
+                score = score if score is not None else 0.0
         except Exception as e:
-            print(f"❌ Erro na análise do candidato {nome}: {e}")
-            continue
+            return nome, f"❌ Erro na análise do candidato {nome}: {e}"
 
         resum_schema = Analysis(
             id=str(uuid.uuid4()),
@@ -53,13 +119,30 @@ def analisar_vaga(codigo_vaga):
             score=score
         )
 
-        extract_data_analysis(resumo)
-
         try:
-            # database.insert_analysis(resum_schema)  # 🔴 Esse método não está implementado ainda!
-            print(f"✅ Analisado: {nome} | Score: {score:.2f}")
-        except Exception as e:
-            print(f"❌ Erro ao salvar análise de {nome}: {e}")
+            extract_data_analysis(resumo, codigo_vaga, resum_schema.id, score)
+        except ValueError as e:
+            print(f"⚠️ Resumo incompleto de {nome}: {e}")
+
+        # database.insert_analysis(resum_schema)  # 🔴 Esse método não está implementado ainda!
+        analises.append(resum_schema)
+        return nome, f"✅ Analisado: {nome} | Score: {score:.2f}"
+
+    async def processar(cv):
+        nonlocal concluidos
+        async with semaforo:
+            nome, status = await analisar_candidato(cv)
+        concluidos += 1
+        if ao_progresso:
+            ao_progresso(concluidos, total, nome, status)
+
+    await asyncio.gather(*(processar(cv) for cv in candidatos))
+    return analises
+
+
+def analisar_vaga(codigo_vaga, **kwargs):
+    """Ponto de entrada síncrono; os parâmetros opcionais são os de analisar_vaga_async."""
+    return asyncio.run(analisar_vaga_async(codigo_vaga, **kwargs))
 
 ######################## Atualização para utilizar o SUPABASE
 #
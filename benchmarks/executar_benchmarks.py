@@ -0,0 +1,223 @@
+"""
+Suíte de benchmarks sobre as bases sintéticas (benchmarks/gerar_dados.py).
+
+Mede, para cada etapa, tempo de parede e pico de memória alocada (tracemalloc):
+    - carga ETL dos JSON (processar_bases) e leitura do snapshot;
+    - preparar_applicants contra a versão anterior, com apply por célula
+      (benchmarks/tratamento_por_celula.py), conferindo que as saídas são iguais;
+    - buscas get_applicants / get_prospects por codigo_vaga;
+    - build completo dos embeddings (+ índice vetorial);
+    - latência de get_candidatos_compativeis_por_titulo (top-k pelo índice e caminho completo)
+      e da busca híbrida (BM25 + embeddings).
+
+O resultado vai para benchmarks/resultados/<data>_<escala>.json, para acompanhar regressões.
+
+    python -m benchmarks.executar_benchmarks --applicants 10000
+"""
+import os
+import gc
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import tempfile
+import argparse
+import subprocess
+import tracemalloc
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.gerar_dados import gerar_dados
+
+DIRETORIO_RESULTADOS = os.path.join("benchmarks", "resultados")
+
+
+@contextmanager
+def medir(resultados, nome, **extras):
+    """Registra em resultados[nome] o tempo de parede e o pico de memória alocada da etapa."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    registro = dict(extras)
+    try:
+        yield registro
+    finally:
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        registro.update({
+            "tempo_s": round(duracao, 4),
+            "pico_memoria_mb": round(max(0, pico - base) / 1024 ** 2, 2),
+        })
+        resultados[nome] = registro
+        print(f"⏱️ {nome}: {duracao:.3f}s | pico {registro['pico_memoria_mb']:.1f} MB")
+
+
+def _latencias(funcao, argumentos):
+    """Chama funcao(arg) para cada argumento; retorna estatísticas de latência em ms."""
+    tempos = []
+    for arg in argumentos:
+        inicio = time.perf_counter()
+        funcao(arg)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos = np.asarray(tempos)
+    return {
+        "chamadas": len(tempos),
+        "media_ms": round(float(tempos.mean()), 4),
+        "p50_ms": round(float(np.percentile(tempos, 50)), 4),
+        "p95_ms": round(float(np.percentile(tempos, 95)), 4),
+        "max_ms": round(float(tempos.max()), 4),
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def comparar_tratamento(resultados, caminho_applicants):
+    """Mede preparar_applicants e a versão por célula sobre os mesmos dados; falha se as saídas diferirem."""
+    import pandas as pd
+    from tratarbase import ler_applicants, preparar_applicants
+    from benchmarks.tratamento_por_celula import preparar_applicants_por_celula
+
+    brutos = ler_applicants(caminho_applicants)
+    with medir(resultados, "preparar_applicants_por_celula", linhas=len(brutos)):
+        esperado = preparar_applicants_por_celula(brutos.copy())
+    with medir(resultados, "preparar_applicants", linhas=len(brutos)) as registro:
+        obtido = preparar_applicants(brutos.copy())
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+    anterior = resultados["preparar_applicants_por_celula"]["tempo_s"]
+    registro["ganho"] = round(anterior / registro["tempo_s"], 2) if registro["tempo_s"] else None
+    print(f"⚡ preparar_applicants {registro['ganho']}x mais rápido que a versão por célula")
+
+
+def executar(n_applicants, semente=42, diretorio_dados=None, consultas=200, consultas_completas=3,
+             pular_embeddings=False, pular_tratamento=False, manter_dados=False):
+    # imports adiados: as dependências pesadas só entram depois de gerar os dados
+    from tratarbase import processar_bases, carregar_bases
+    from database import AnalyseDatabase
+    from embedding_store import EmbeddingStore
+
+    trabalho = tempfile.mkdtemp(prefix="bench_datathon_")
+    diretorio_dados = diretorio_dados or os.path.join(trabalho, "dados")
+    resultados = {}
+    tracemalloc.start()
+
+    try:
+        if not os.path.exists(os.path.join(diretorio_dados, "applicants.json")):
+            with medir(resultados, "gerar_dados"):
+                gerar_dados(diretorio_dados, n_applicants, semente=semente)
+
+        with medir(resultados, "etl_json"):
+            bases = processar_bases(diretorio_dados)
+
+        if not pular_tratamento:
+            comparar_tratamento(resultados, os.path.join(diretorio_dados, "applicants.json"))
+
+        snapshot = os.path.join(trabalho, "snapshot")
+        carregar_bases(diretorio_dados, diretorio_snapshot=snapshot)  # grava o snapshot
+        del bases
+        with medir(resultados, "carga_snapshot"):
+            applicants, prospects, vagas = carregar_bases(diretorio_dados, diretorio_snapshot=snapshot)
+
+        database = AnalyseDatabase(applicants=applicants, prospects=prospects, vagas=vagas,
+                                   embeddings=EmbeddingStore(diretorio=os.path.join(trabalho, "embeddings")),
+                                   diretorio_snapshot=snapshot)
+
+        rng = random.Random(semente)
+        codigos = vagas["codigo_vaga"].astype(str).tolist()
+        amostra_codigos = [rng.choice(codigos) for _ in range(consultas)]
+
+        with medir(resultados, "construir_indices_hash"):
+            database.indice_applicant_id
+
+        with medir(resultados, "get_applicants") as registro:
+            registro.update(_latencias(database.get_applicants, amostra_codigos))
+
+        with medir(resultados, "get_prospects") as registro:
+            registro.update(_latencias(database.get_prospects, amostra_codigos))
+
+        if not pular_embeddings:
+            database.model  # carga do modelo fora da medição do build
+
+            with medir(resultados, "build_embeddings", linhas=len(applicants)):
+                database.get_indice_applicants()
+
+            titulos = vagas["titulo_vaga"].astype(str).tolist()
+            amostra_titulos = [rng.choice(titulos) for _ in range(consultas)]
+
+            with medir(resultados, "compativeis_por_titulo_top20") as registro:
+                registro.update(_latencias(
+                    lambda t: database.get_candidatos_compativeis_por_titulo(t, k=20), amostra_titulos
+                ))
+
+            with medir(resultados, "construir_indice_bm25"):
+                database.indice_bm25
+
+            with medir(resultados, "compativeis_hibrido_top20") as registro:
+                registro.update(_latencias(
+                    lambda t: database.get_candidatos_compativeis_hibrido(t, k=20), amostra_titulos
+                ))
+
+            with medir(resultados, "compativeis_por_titulo_completo") as registro:
+                registro.update(_latencias(
+                    database.get_candidatos_compativeis_por_titulo, amostra_titulos[:consultas_completas]
+                ))
+    finally:
+        tracemalloc.stop()
+        if not manter_dados:
+            shutil.rmtree(trabalho, ignore_errors=True)
+
+    return {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "applicants": n_applicants,
+        "semente": semente,
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "etapas": resultados,
+    }
+
+
+def salvar_resultado(resultado, diretorio=DIRETORIO_RESULTADOS):
+    os.makedirs(diretorio, exist_ok=True)
+    carimbo = resultado["data"].replace(":", "").replace("-", "")
+    caminho = os.path.join(diretorio, f"{carimbo}_{resultado['applicants']}.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de ETL, buscas, embeddings e ranking.")
+    parser.add_argument("--applicants", type=int, nargs="+", default=[1000],
+                        help="uma ou mais escalas (ex.: 1000 10000 100000 1000000)")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--dados", default=None, help="diretório com JSON já gerados (só com uma escala)")
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--consultas-completas", type=int, default=3,
+                        help="consultas no caminho sem índice (lê a base inteira a cada chamada)")
+    parser.add_argument("--pular-embeddings", action="store_true", help="não mede build de embeddings e ranking")
+    parser.add_argument("--pular-tratamento", action="store_true",
+                        help="não compara preparar_applicants com a versão por célula")
+    parser.add_argument("--manter-dados", action="store_true")
+    args = parser.parse_args()
+
+    for escala in args.applicants:
+        print(f"\n===== {escala} applicants =====")
+        resultado = executar(escala, semente=args.semente, diretorio_dados=args.dados, consultas=args.consultas,
+                             consultas_completas=args.consultas_completas,
+                             pular_embeddings=args.pular_embeddings, pular_tratamento=args.pular_tratamento,
+                             manter_dados=args.manter_dados)
+        print(f"📄 Resultados em {salvar_resultado(resultado)}")
@@ -0,0 +1,270 @@
+"""
+Gera applicants.json, prospects.json e vagas.json sintéticos, com a mesma estrutura
+aninhada lida pelo tratarbase.py (ler_applicants, ler_prospects, ler_vagas).
+
+Os dados são determinísticos para a mesma semente e escala, e os JSON são
+escritos registro a registro, então 1M de candidatos não precisa caber em memória.
+
+    python -m benchmarks.gerar_dados --applicants 10000 --destino benchmarks/dados/10k
+"""
+import os
+import json
+import random
+import argparse
+
+from datetime import date, timedelta
+
+CARGOS = [
+    "Analista de Sistemas", "Desenvolvedor Java", "Desenvolvedor Python", "Consultor SAP ABAP",
+    "Consultor SAP FI", "DBA Oracle", "Analista de Dados", "Engenheiro de Dados", "Cientista de Dados",
+    "Gerente de Projetos", "Scrum Master", "Analista de Suporte", "Arquiteto de Soluções",
+    "Analista de Testes", "Desenvolvedor Front-end", "Analista de Infraestrutura", "Analista de BI",
+    "Analista Financeiro", "Analista de RH", "Coordenador de TI",
+]
+AREAS = [
+    "TI - Desenvolvimento/Programação", "TI - SAP", "TI - Banco de Dados", "TI - Infraestrutura",
+    "TI - Projetos", "TI - Suporte", "Administrativa", "Financeira/Controladoria", "Gestão e Alocação de Recursos de TI",
+]
+TECNOLOGIAS = [
+    "Java", "Python", "SQL", "Oracle", "SAP ABAP", "SAP FI", "SAP MM", "Spring Boot", "Angular", "React",
+    "Node.js", "Docker", "Kubernetes", "AWS", "Azure", "Power BI", "Excel avançado", "Linux", "Scrum",
+    "ITIL", "Pandas", "Spark", "Hadoop", "PL/SQL", "C#", ".NET", "COBOL", "Selenium", "Git", "Jenkins",
+]
+CERTIFICACOES = ["PMP", "ITIL Foundation", "AWS Certified", "Scrum Master", "Oracle OCP", "SAP Certified", ""]
+NIVEIS_IDIOMA = ["Nenhum", "Básico", "Intermediário", "Avançado", "Fluente", ""]
+NIVEIS_ACADEMICOS = [
+    "Ensino Médio Completo", "Ensino Superior Incompleto", "Ensino Superior Completo",
+    "Pós Graduação Completo", "Mestrado Completo", "",
+]
+NIVEIS_PROFISSIONAIS = ["Júnior", "Pleno", "Sênior", "Especialista", "Analista", ""]
+SEXOS = ["Masculino", "Feminino", ""]
+ESTADOS_CIVIS = ["Solteiro", "Casado", "Divorciado", "União Estável", ""]
+CIDADES = ["São Paulo, São Paulo", "Rio de Janeiro, Rio de Janeiro", "Belo Horizonte, Minas Gerais",
+           "Curitiba, Paraná", "Porto Alegre, Rio Grande do Sul", "Recife, Pernambuco", ""]
+NOMES = ["Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela",
+         "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Tiago"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa", "Almeida", "Ribeiro"]
+SITUACOES = ["Prospect", "Encaminhado ao Requisitante", "Contratado pela Decision", "Não Aprovado pelo Cliente",
+             "Desistiu", "Entrevista Técnica", "Inscrito"]
+FRASES_CV = [
+    "Atuação em projetos de {tec} com foco em qualidade e entregas ágeis.",
+    "Experiência de {anos} anos como {cargo}, com {tec} e {tec2}.",
+    "Responsável por levantamento de requisitos, desenvolvimento e sustentação em {tec}.",
+    "Participação em implantação de {tec} em clientes de grande porte.",
+    "Conhecimentos em {tec}, {tec2} e metodologias ágeis.",
+]
+
+
+def _data(rng, inicio=date(1960, 1, 1), dias=365 * 45):
+    return (inicio + timedelta(days=rng.randrange(dias))).strftime("%d/%m/%Y")
+
+
+def _nome(rng):
+    return f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+
+def _cv(rng, cargo, paragrafos):
+    linhas = []
+    for _ in range(paragrafos):
+        linhas.append(rng.choice(FRASES_CV).format(
+            tec=rng.choice(TECNOLOGIAS), tec2=rng.choice(TECNOLOGIAS), cargo=cargo, anos=rng.randint(1, 25)
+        ))
+    return "\n".join(linhas)
+
+
+def gerar_applicant(rng, indice, codigos_vaga):
+    cargo = rng.choice(CARGOS)
+    tecnologias = ", ".join(rng.sample(TECNOLOGIAS, rng.randint(2, 6)))
+    nome = _nome(rng)
+    email = f"{nome.split()[0].lower()}.{indice}@exemplo.com"
+    # parte dos candidatos referencia uma vaga (campo usado por get_applicants)
+    codigo = rng.choice(codigos_vaga) if rng.random() < 0.3 else str(100000 + indice)
+
+    return {
+        "infos_basicas": {
+            "telefone_recado": "",
+            "telefone": f"(11) 9{rng.randrange(10 ** 8):08d}",
+            "objetivo_profissional": rng.choice([cargo, f"{cargo} {rng.choice(NIVEIS_PROFISSIONAIS)}", ""]),
+            "data_criacao": f"{_data(rng, date(2018, 1, 1), 365 * 6)} 10:00:00",
+            "inserido_por": "Benchmark",
+            "email": email,
+            "local": rng.choice(CIDADES),
+            "sabendo_de_nos_por": "",
+            "data_atualizacao": f"{_data(rng, date(2020, 1, 1), 365 * 4)} 10:00:00",
+            "codigo_profissional": codigo,
+            "nome": nome,
+        },
+        "informacoes_pessoais": {
+            "data_aceite": "",
+            "nome": nome,
+            "cpf": "",
+            "fonte_indicacao": "",
+            "email": email,
+            "email_secundario": "",
+            "data_nascimento": _data(rng),
+            "telefone_celular": f"(11) 9{rng.randrange(10 ** 8):08d}",
+            "telefone_recado": "",
+            "sexo": rng.choice(SEXOS),
+            "estado_civil": rng.choice(ESTADOS_CIVIS),
+            "pcd": rng.choice(["Sim", "Não", ""]),
+            "endereco": rng.choice(CIDADES),
+            "skype": "",
+            "url_linkedin": "",
+            "facebook": "",
+        },
+        "informacoes_profissionais": {
+            "titulo_profissional": rng.choice([cargo, ""]),
+            "area_atuacao": rng.choice(AREAS + [""]),
+            "conhecimentos_tecnicos": tecnologias,
+            "certificacoes": rng.choice(CERTIFICACOES),
+            "outras_certificacoes": "",
+            "remuneracao": rng.choice(["", f"R$ {rng.randint(2, 25)}.{rng.randint(0, 999):03d},00"]),
+            "nivel_profissional": rng.choice(NIVEIS_PROFISSIONAIS),
+            "qualificacoes": "",
+            "experiencias": "",
+            "download_cv": f"{indice}.pdf",
+        },
+        "formacao_e_idiomas": {
+            "nivel_academico": rng.choice(NIVEIS_ACADEMICOS),
+            "nivel_ingles": rng.choice(NIVEIS_IDIOMA),
+            "nivel_espanhol": rng.choice(NIVEIS_IDIOMA),
+            "outro_idioma": rng.choice(["", "Italiano - Básico", "Francês - Intermediário"]),
+            "instituicao_ensino_superior": rng.choice(["", "USP", "UNICAMP", "FIAP", "Mackenzie", "PUC"]),
+            "cursos": rng.choice(["", "Ciência da Computação", "Sistemas de Informação", "Administração"]),
+            "outro_curso": "",
+        },
+        "cargo_atual": {
+            "cargo_atual": rng.choice([cargo, ""]),
+            "projeto_atual": rng.choice(["", "Sustentação", "Implantação"]),
+            "unidade": rng.choice(["", "Decision São Paulo", "Decision Rio"]),
+        },
+        "cv_pt": _cv(rng, cargo, rng.randint(3, 30)),
+        "cv_en": "",
+    }
+
+
+def gerar_vaga(rng, codigo):
+    cargo = rng.choice(CARGOS)
+    return {
+        "informacoes_basicas": {
+            "data_requicisao": _data(rng, date(2019, 1, 1), 365 * 5),
+            "limite_esperado_para_contratacao": rng.choice(["00-00-0000", _data(rng, date(2021, 1, 1), 365 * 3)]),
+            "titulo_vaga": f"{cargo} {rng.choice(NIVEIS_PROFISSIONAIS)}".strip(),
+            "vaga_sap": "Sim" if "SAP" in cargo else "Não",
+            "cliente": f"Cliente {rng.randint(1, 200)}",
+            "solicitante_cliente": _nome(rng),
+            "empresa_divisao": "Decision São Paulo",
+            "requisitante": _nome(rng),
+            "analista_responsavel": _nome(rng),
+            "tipo_contratacao": rng.choice(["CLT Full", "PJ/Autônomo", "Cooperado"]),
+            "prazo_contratacao": rng.choice(["Indeterminado", "Determinado", ""]),
+            "objetivo_vaga": rng.choice(["Contratação", "Prospecção", ""]),
+            "prioridade_vaga": rng.choice(["Alta: Alta complexidade 3 a 5 dias", "Média", ""]),
+            "origem_vaga": rng.choice(["Nova Posição", "Substituição", ""]),
+            "superior_imediato": rng.choice(["Superior Imediato:", ""]),
+            "nome": _nome(rng),
+            "telefone": "",
+        },
+        "perfil_vaga": {
+            "pais": "Brasil",
+            "estado": "São Paulo",
+            "cidade": "São Paulo",
+            "bairro": "",
+            "regiao": "",
+            "local_trabalho": "2000",
+            "vaga_especifica_para_pcd": rng.choice(["Sim", "Não"]),
+            "faixa_etaria": rng.choice(["De: Até:", "De: 25 Até: 45"]),
+            "horario_trabalho": "",
+            "nivel profissional": rng.choice(NIVEIS_PROFISSIONAIS),
+            "nivel_academico": rng.choice(NIVEIS_ACADEMICOS),
+            "nivel_ingles": rng.choice(NIVEIS_IDIOMA),
+            "nivel_espanhol": rng.choice(NIVEIS_IDIOMA),
+            "outro_idioma": "",
+            "areas_atuacao": rng.choice(AREAS),
+            "principais_atividades": _cv(rng, cargo, 3),
+            "competencia_tecnicas_e_comportamentais": ", ".join(rng.sample(TECNOLOGIAS, 4)),
+            "demais_observacoes": "",
+            "viagens_requeridas": "",
+            "equipamentos_necessarios": "",
+        },
+        "beneficios": {
+            "valor_venda": rng.choice(["-", f"{rng.randint(80, 200)},00 - "]),
+            "valor_compra_1": "",
+            "valor_compra_2": "",
+        },
+    }
+
+
+def gerar_prospects(rng, titulo, n):
+    return {
+        "titulo": titulo,
+        "modalidade": "",
+        "prospects": [
+            {
+                "nome": _nome(rng),
+                "codigo": str(rng.randint(1, 10 ** 6)),
+                "situacao_candidado": rng.choice(SITUACOES),
+                "data_candidatura": _data(rng, date(2020, 1, 1), 365 * 4).replace("/", "-"),
+                "ultima_atualizacao": _data(rng, date(2020, 1, 1), 365 * 4).replace("/", "-"),
+                "comentario": rng.choice(["", "Candidato com bom perfil técnico.", "Aguardando retorno."]),
+                "recrutador": _nome(rng),
+            }
+            for _ in range(n)
+        ],
+    }
+
+
+def _escrever_objeto(caminho, itens):
+    """Grava {chave: valor, ...} item a item, sem montar o dicionário inteiro."""
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write("{")
+        for i, (chave, valor) in enumerate(itens):
+            f.write(("," if i else "") + json.dumps(chave) + ":" + json.dumps(valor, ensure_ascii=False))
+        f.write("}")
+
+
+def gerar_dados(destino, n_applicants, n_vagas=None, prospects_por_vaga=10, semente=42):
+    """
+    Escreve os três JSON em `destino`. Por padrão há uma vaga a cada 10 candidatos
+    (a base real tem ~14 mil vagas para ~42 mil candidatos, limitado a 20 mil aqui).
+    Retorna os caminhos gravados.
+    """
+    os.makedirs(destino, exist_ok=True)
+    n_vagas = n_vagas or max(10, min(20000, n_applicants // 10))
+    codigos_vaga = [str(1000 + i) for i in range(n_vagas)]
+
+    # Um gerador por arquivo: cada JSON é reprodutível independentemente dos outros
+    rng_vagas = random.Random(semente)
+    vagas = {codigo: gerar_vaga(rng_vagas, codigo) for codigo in codigos_vaga}
+    _escrever_objeto(os.path.join(destino, "vagas.json"), vagas.items())
+
+    rng_prospects = random.Random(semente + 1)
+    _escrever_objeto(
+        os.path.join(destino, "prospects.json"),
+        ((codigo, gerar_prospects(rng_prospects, vaga["informacoes_basicas"]["titulo_vaga"],
+                                  rng_prospects.randint(0, 2 * prospects_por_vaga)))
+         for codigo, vaga in vagas.items()),
+    )
+
+    rng_applicants = random.Random(semente + 2)
+    _escrever_objeto(
+        os.path.join(destino, "applicants.json"),
+        ((str(i), gerar_applicant(rng_applicants, i, codigos_vaga)) for i in range(1, n_applicants + 1)),
+    )
+
+    return {nome: os.path.join(destino, f"{nome}.json") for nome in ("applicants", "prospects", "vagas")}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera as bases sintéticas do Datathon para benchmarks.")
+    parser.add_argument("--applicants", type=int, default=1000, help="quantidade de candidatos (1k a 1M)")
+    parser.add_argument("--vagas", type=int, default=None)
+    parser.add_argument("--prospects-por-vaga", type=int, default=10)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--destino", default=None, help="padrão: benchmarks/dados/<applicants>")
+    args = parser.parse_args()
+
+    destino = args.destino or os.path.join("benchmarks", "dados", str(args.applicants))
+    caminhos = gerar_dados(destino, args.applicants, args.vagas, args.prospects_por_vaga, args.semente)
+    for nome, caminho in caminhos.items():
+        print(f"✅ {nome}: {caminho} ({os.path.getsize(caminho) / 1024 ** 2:.1f} MB)")
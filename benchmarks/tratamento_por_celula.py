@@ -0,0 +1,75 @@
+"""
+Versão anterior do tratamento dos applicants (apply por célula), mantida como referência:
+o benchmark compara o tempo com o tratarbase.preparar_applicants atual e os testes
+conferem que a saída é a mesma.
+"""
+import uuid
+
+import pandas as pd
+
+import tratarbase as tb
+
+
+def tratar_base_por_celula(df, colunas_uuid=None):
+    df = df.replace({':': None, '-': None, '': None})
+
+    colunas_data = ['data_nascimento', 'data_admissao', 'data_ultima_promocao', 'data_criacao', 'data_atualizacao']
+    for col in colunas_data:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
+            df[col] = df[col].where(df[col] >= pd.to_datetime("1900-01-01"))
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+            df[col] = df[col].fillna('sem informacao').astype(str)
+
+    if 'remuneracao' in df.columns:
+        df['remuneracao'] = df['remuneracao'].replace('sem informacao', None)
+        df['remuneracao'] = df['remuneracao'].astype(str)
+        df['remuneracao'] = df['remuneracao'].str.replace('R$', '', regex=False)
+        df['remuneracao'] = df['remuneracao'].str.replace('.', '', regex=False)
+        df['remuneracao'] = df['remuneracao'].str.replace(',', '.', regex=False)
+        df['remuneracao'] = pd.to_numeric(df['remuneracao'], errors='coerce')
+        df['remuneracao'] = df['remuneracao'].fillna(-1)
+        df['remuneracao'] = df['remuneracao'].apply(lambda x: 'sem informacao' if x == -1 else f"{x:.2f}")
+
+    if colunas_uuid:
+        for col in colunas_uuid:
+            if col == 'id':
+                continue
+            if col in df.columns:
+                def validar_uuid(val):
+                    if val is None:
+                        return 'sem informacao'
+                    try:
+                        return str(uuid.UUID(str(val)))
+                    except Exception:
+                        return 'sem informacao'
+                df[col] = df[col].apply(validar_uuid)
+
+    numericas = df.select_dtypes(include=['float', 'int']).columns
+    for col in numericas:
+        df[col] = df[col].apply(lambda x: 'sem informacao' if pd.isna(x) or (isinstance(x, float) and (x != x)) else x)
+
+    colunas_outros = [c for c in df.columns if c not in colunas_data + ['remuneracao']]
+    df.loc[:, colunas_outros] = df.loc[:, colunas_outros].fillna('sem informacao')
+    df.loc[:, colunas_outros] = df.loc[:, colunas_outros].where(pd.notnull(df.loc[:, colunas_outros]), 'sem informacao')
+
+    if 'id' in df.columns:
+        df['id'] = df['id'].astype(str)
+    return df
+
+
+def preparar_applicants_por_celula(df):
+    df_tratado = tratar_base_por_celula(df)
+
+    for col in tb.colunas_texto:
+        if col in df_tratado.columns:
+            df_tratado[col] = df_tratado[col].apply(tb.limpar_texto)
+
+    applicants = df_tratado[tb.COLUNAS_APPLICANTS]
+
+    applicants.loc[:, 'pcd'] = applicants['pcd'].apply(lambda x: None if str(x).lower() == 'sem_informacao' else x)
+    applicants = applicants.rename(columns={"local": "localizacao"})
+
+    applicants["texto_cv"] = tb.montar_texto_cv(applicants)
+    applicants["cadastro_completo"] = tb.marcar_cadastro_completo(applicants)
+    return applicants
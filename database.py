@@ -1,38 +1,197 @@
 import os
 import json
 import re
+import threading
 import unidecode
+import numpy as np
 import pandas as pd
 
 from dotenv import load_dotenv
-from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Optional, TYPE_CHECKING
 from sklearn.metrics.pairwise import cosine_similarity
-from supabase_client import supabase
+from supabase_client import get_supabase, paginar_tabela
+from embedding_store import EmbeddingStore
+from embeddings_cv import TrechosCV
+from ranking_vagas import RankingsPrecalculados, assinatura_base
+from vector_index import VectorIndex, top_k
+from model_registry import obter_modelo, MODELO_PADRAO
+from hash_index import HashIndex
+from tracing import etapa, rastrear
 
 # Dados tratados locais (certifique-se que tratarbase.py não importa database)
-from tratarbase import applicants, perfil_vagas_tratada, prospects_tratada
-from models.analysis import Analysis  # usado no insert_analysis
+# As bases só são lidas no primeiro acesso (tratarbase.obter_bases)
+from tratarbase import (obter_bases, montar_texto_cv, tratar_registro_applicant, marcar_cadastro_completo,
+                        COLUNAS_TEXTO_CV, obter_textos_longos, construir_indice_bm25, montar_texto_bm25,
+                        montar_texto_vaga, DIRETORIO_SNAPSHOT)
+if TYPE_CHECKING:
+    from models.analysis import Analysis  # só na anotação do insert_analysis
 
 load_dotenv()
 
-# Para ativar Supabase no futuro, use algo assim:
-from supabase_client import supabase
+# Para ativar Supabase no futuro, use get_supabase() (o cliente só é criado na primeira chamada)
+
+DIRETORIO_EMBEDDINGS_SUPABASE = os.path.join("cache", "embeddings_supabase")
+DIRETORIO_EMBEDDINGS_VAGAS = os.path.join("cache", "embeddings_vagas")
 
 class AnalyseDatabase:
-    def __init__(self):
-        self.applicants = applicants
-        self.vagas = perfil_vagas_tratada
-        self.prospects = prospects_tratada
-        self.model = SentenceTransformer("all-MiniLM-L6-v2") # Inicializa modelo SentenceTransformer só uma vez
+    def __init__(self, applicants: Optional[pd.DataFrame] = None, prospects: Optional[pd.DataFrame] = None,
+                 vagas: Optional[pd.DataFrame] = None, embeddings: Optional[EmbeddingStore] = None,
+                 diretorio_snapshot: Optional[str] = None):
+        """
+        Sem argumentos, as bases vêm de tratarbase.obter_bases no primeiro acesso.
+        applicants/prospects/vagas e o EmbeddingStore podem ser passados prontos
+        (ex.: benchmarks sobre bases sintéticas); as bases que faltarem são lidas normalmente.
+        `diretorio_snapshot` é onde ficam o índice BM25 e os textos longos (padrão: o do app).
+        """
+        # Bases, modelo e índices são carregados no primeiro uso (ver propriedades abaixo)
+        self._applicants = applicants
+        self._vagas = vagas
+        self._prospects = prospects
+        self._model = None
+        self._indices = None
+        self.diretorio_snapshot = diretorio_snapshot or DIRETORIO_SNAPSHOT
+        # Embeddings de texto_cv persistidos em disco
+        self.embeddings = embeddings if embeddings is not None else EmbeddingStore(nome_modelo=MODELO_PADRAO)
+        self.indice = None  # VectorIndex sobre self.embeddings, construído na primeira busca
+        self.embeddings_supabase = None  # idem para a tabela applicants do Supabase (lida em streaming)
+        self.indice_supabase = None
+        self._bm25 = None  # IndiceBM25 sobre conhecimentos_tecnicos/certificacoes/titulo_profissional
+        self.rankings = None  # RankingsPrecalculados (job ranking_vagas.py), lidos no primeiro uso
+        self._assinatura_base = None  # assinatura de applicants/texto_cv comparada com a do job
+        self.embeddings_vagas = None  # título + perfil de cada vaga (match reverso applicant -> vagas)
+        self.indice_vetorial_vagas = None
+        self._vagas_do_applicant = {}  # id -> top vagas, recalculado quando o applicant é salvo
+        self.trechos_cv = None  # embeddings do cv_pt em trechos (job offline embeddings_cv.py)
+        self.indice_cv = None
+        self._lock = threading.RLock()  # instância compartilhada entre sessões do Streamlit
+
+    ####################### Carga preguiçosa ############################
+    #
+    def _carregar_bases(self):
+        with self._lock:
+            if self._applicants is None or self._prospects is None or self._vagas is None:
+                applicants, prospects, vagas = obter_bases()
+                self._applicants = applicants if self._applicants is None else self._applicants
+                self._prospects = prospects if self._prospects is None else self._prospects
+                self._vagas = vagas if self._vagas is None else self._vagas
+
+    @property
+    def applicants(self) -> pd.DataFrame:
+        if self._applicants is None:
+            self._carregar_bases()
+        return self._applicants
+
+    @applicants.setter
+    def applicants(self, df: pd.DataFrame):
+        self._applicants = df
+
+    @property
+    def vagas(self) -> pd.DataFrame:
+        if self._vagas is None:
+            self._carregar_bases()
+        return self._vagas
+
+    @property
+    def prospects(self) -> pd.DataFrame:
+        if self._prospects is None:
+            self._carregar_bases()
+        return self._prospects
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = obter_modelo(MODELO_PADRAO) # Modelo compartilhado pelo processo (carregado uma vez só)
+        return self._model
+
+    def _obter_indices(self) -> Dict[str, HashIndex]:
+        """Índices chave -> posição de linha, mantidos em dia pelos inserts e updates."""
+        if self._indices is None:
+            with self._lock:
+                if self._indices is None:
+                    self._indices = {
+                        "applicant_id": HashIndex(self.applicants["id"]),
+                        "codigo_profissional": HashIndex(self.applicants["codigo_profissional"]),
+                        "prospects_vaga": HashIndex(self.prospects["codigo_vaga"]),
+                        "vagas": HashIndex(self.vagas["codigo_vaga"]),
+                    }
+        return self._indices
+
+    @property
+    def indice_applicant_id(self) -> HashIndex:
+        return self._obter_indices()["applicant_id"]
+
+    @property
+    def indice_codigo_profissional(self) -> HashIndex:
+        return self._obter_indices()["codigo_profissional"]
+
+    @property
+    def indice_prospects_vaga(self) -> HashIndex:
+        return self._obter_indices()["prospects_vaga"]
+
+    @property
+    def indice_vagas(self) -> HashIndex:
+        return self._obter_indices()["vagas"]
+
+    ####################### Layout compacto ############################
+    #
+    # applicants usa category/string[pyarrow] (tratarbase.compactar_applicants): novos
+    # valores precisam entrar como categoria antes de serem gravados na coluna.
+
+    def _alinhar_dtypes(self, df_novo: pd.DataFrame) -> pd.DataFrame:
+        """Converte linhas novas para os dtypes do applicants, para o concat não voltar a object."""
+        for col in df_novo.columns.intersection(self.applicants.columns):
+            dtype = self.applicants[col].dtype
+            if isinstance(dtype, pd.CategoricalDtype):
+                novas = [v for v in df_novo[col].dropna().unique() if v not in dtype.categories]
+                if novas:
+                    self.applicants[col] = self.applicants[col].cat.add_categories(novas)
+                df_novo[col] = df_novo[col].astype(self.applicants[col].dtype)
+            elif isinstance(dtype, pd.StringDtype):
+                df_novo[col] = df_novo[col].map(lambda x: x if x is None or isinstance(x, str) else str(x)).astype(dtype)
+        return df_novo
+
+    def _atribuir(self, idx, coluna: str, valor) -> None:
+        """self.applicants.at[idx, coluna] = valor, aceitando colunas category e string."""
+        dtype = self.applicants[coluna].dtype
+        if isinstance(dtype, pd.CategoricalDtype) and not pd.isna(valor) and valor not in dtype.categories:
+            self.applicants[coluna] = self.applicants[coluna].cat.add_categories([valor])
+        elif isinstance(dtype, pd.StringDtype) and not pd.isna(valor) and not isinstance(valor, str):
+            valor = str(valor)
+        try:
+            self.applicants.at[idx, coluna] = valor
+        except ValueError:
+            # colunas lidas do snapshot Parquet podem vir somente leitura (buffers do Arrow): copia uma vez
+            self.applicants[coluna] = self.applicants[coluna].copy()
+            self.applicants.at[idx, coluna] = valor
+
+    @property
+    def textos_longos(self):
+        """cv_pt e demais textos longos, fora do DataFrame principal e lidos só quando pedidos."""
+        return obter_textos_longos(self.diretorio_snapshot)
+
+    def get_textos_longos(self, ids: List[str], colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        return self.textos_longos.obter(ids, colunas)
+
+    def _indexar_nova_linha(self, posicao: int) -> None:
+        linha = self.applicants.iloc[posicao]
+        self.indice_applicant_id.adicionar(linha["id"], posicao)
+        self.indice_codigo_profissional.adicionar(linha["codigo_profissional"], posicao)
 
     ####################### Applicants ##################################
     #
     def get_applicants(self, codigo_vaga: str) -> List[Dict]:
         """Retorna todos os candidatos vinculados à vaga."""
-        aplicados = self.applicants[self.applicants["codigo_profissional"] == codigo_vaga]
+        aplicados = self.applicants.iloc[self.indice_codigo_profissional.get(codigo_vaga)]
         return aplicados.to_dict(orient="records")
 
+    def mascara_cadastro_completo(self) -> np.ndarray:
+        """Flag booleana (calculada na carga) dos candidatos com os campos essenciais preenchidos."""
+        with self._lock:
+            if "cadastro_completo" not in self.applicants.columns:
+                self.applicants["cadastro_completo"] = marcar_cadastro_completo(self.applicants)
+        return self.applicants["cadastro_completo"].to_numpy(dtype=bool)
+
+    @rastrear("get_all_applicants")
     def get_all_applicants(self) -> List[Dict]:
         """Retorna todos os applicants da base."""
         return self.applicants.to_dict(orient="records")
@@ -41,8 +200,7 @@ class AnalyseDatabase:
     #
     def get_prospects(self, codigo_vaga: str) -> List[Dict]:
         """Retorna todos os prospects vinculados à vaga."""
-        df = self.prospects
-        return df[df['codigo_vaga'] == codigo_vaga].to_dict(orient="records")
+        return self.prospects.iloc[self.indice_prospects_vaga.get(codigo_vaga)].to_dict(orient="records")
     
     #####################   Vagas #######################################
     #
@@ -52,17 +210,25 @@ class AnalyseDatabase:
 
     def get_vaga_by_codigo(self, codigo_vaga: str) -> Optional[Dict]:
         """Retorna uma vaga específica com base no código."""
-        resultado = self.vagas[self.vagas["codigo_vaga"] == codigo_vaga]
-        if resultado.empty:
+        posicoes = self.indice_vagas.get(codigo_vaga)
+        if not posicoes:
             return None
-        return resultado.iloc[0].to_dict()
+        return self.vagas.iloc[posicoes[0]].to_dict()
     
     ####################################### Candidatos Compativeis
     #
-    def get_candidatos_compativeis_por_titulo(self, titulo_vaga: str) -> pd.DataFrame:
+    def get_candidatos_compativeis_por_titulo(self, titulo_vaga: str, k: Optional[int] = None,
+                                              nprobe: Optional[int] = None, exato: bool = False) -> pd.DataFrame:
         """
         Retorna DataFrame de candidatos ordenados pela similaridade com o título da vaga.
+        Com `k`, usa o índice vetorial e devolve só os k melhores (`nprobe` controla recall x velocidade).
         """
+        if k is not None:
+            posicoes, scores = self.buscar_posicoes_por_titulo(titulo_vaga, k=k, nprobe=nprobe, exato=exato)
+            df_top = self.applicants.iloc[posicoes].copy()
+            df_top["score_similaridade"] = scores
+            return df_top
+
         # 1. Buscar todos os candidatos
         candidatos = self.get_all_applicants()  # lista de dicts
 
@@ -73,61 +239,349 @@ class AnalyseDatabase:
         df_resultados = pd.DataFrame(resultados)
 
         # 4. Ordenar os resultados pela similaridade
-        resultados_ordenados = df_resultados.sort_values(by="score_similaridade", ascending=False)
+        with etapa("ordenar", linhas=len(df_resultados)):
+            resultados_ordenados = df_resultados.sort_values(by="score_similaridade", ascending=False)
 
         # 5. Retornar o DataFrame ordenado
         return resultados_ordenados
 
+    @property
+    def indice_bm25(self):
+        if self._bm25 is None:
+            with self._lock:
+                if self._bm25 is None:
+                    with etapa("construir_indice_bm25"):
+                        self._bm25 = construir_indice_bm25(self.applicants, diretorio_snapshot=self.diretorio_snapshot)
+        return self._bm25
+
+    def get_candidatos_compativeis_hibrido(self, titulo_vaga: str, k: int = 20, candidatos_lexicos: int = 500,
+                                           candidatos_semanticos: int = 100, peso_lexico: float = 0.5,
+                                           nprobe: Optional[int] = None) -> pd.DataFrame:
+        """
+        Busca híbrida: os `candidatos_lexicos` melhores do BM25 (tecnologias, certificações,
+        título) mais os `candidatos_semanticos` melhores do índice vetorial formam um conjunto
+        pequeno, e só ele recebe o score de cosseno. O score final combina o BM25 normalizado
+        pelo maior valor do conjunto (peso `peso_lexico`) com o cosseno.
+        Sem nenhum termo em comum com a base, vira a busca semântica pura.
+        """
+        with etapa("bm25", candidatos=candidatos_lexicos):
+            posicoes_lex, scores_lex = self.indice_bm25.buscar(titulo_vaga, k=candidatos_lexicos)
+
+        indice = self.get_indice_applicants()
+        with etapa("encode_vaga"):
+            embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+        with etapa("busca_vetorial", candidatos=candidatos_semanticos):
+            posicoes_sem, _ = indice.buscar_posicoes(embedding_vaga, k=candidatos_semanticos, nprobe=nprobe)
+
+        with etapa("fusao", linhas=len(posicoes_lex) + len(posicoes_sem)):
+            posicoes = np.union1d(posicoes_lex, posicoes_sem).astype(np.int64)
+            bm25 = np.zeros(len(posicoes), dtype=np.float32)
+            bm25[np.searchsorted(posicoes, posicoes_lex)] = scores_lex
+            if len(scores_lex) and scores_lex.max() > 0:
+                bm25 /= scores_lex.max()
+            semantico = np.asarray(self.embeddings.matriz[posicoes]) @ embedding_vaga
+            peso = peso_lexico if len(posicoes_lex) else 0.0
+            hibrido = peso * bm25 + (1 - peso) * semantico
+            top = top_k(hibrido, k)
+
+        df_top = self.applicants.iloc[posicoes[top]].copy()
+        df_top["score_bm25"] = bm25[top]
+        df_top["score_semantico"] = semantico[top]
+        df_top["score_similaridade"] = hibrido[top]
+        return df_top
+
+    def _atualizar_bm25(self, posicao: int) -> None:
+        """Reindexa só a linha alterada no BM25 (se o índice já foi construído neste processo)."""
+        if self._bm25 is not None:
+            self._bm25.atualizar(posicao, montar_texto_bm25(self.applicants.iloc[[posicao]]).iloc[0])
     
     def get_embedding_applicants(self, titulo_vaga: str, candidatos: list[dict]) -> list[dict]:
         """
         Recebe um título de vaga e uma lista de candidatos (lista de dicts),
         retorna os candidatos com o score de similaridade (0-1) adicionado.
         """
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+        model = self.model
 
         # Converte para DataFrame
-        df_applicants = pd.DataFrame(candidatos)
-
-        # Embeddings
-        embeddings_applicants = model.encode(df_applicants["texto_cv"].tolist(), convert_to_tensor=False)
-        embedding_vaga = model.encode(titulo_vaga, convert_to_tensor=False)
+        with etapa("montar_dataframe", linhas=len(candidatos)):
+            df_applicants = pd.DataFrame(candidatos)
+
+        # Embeddings: lidos do store em disco; só recodifica texto_cv novo ou alterado
+        with etapa("embeddings_candidatos"):
+            embeddings_applicants = self.embeddings.obter_vetores(
+                df_applicants["id"].tolist(), df_applicants["texto_cv"].tolist(), model
+            )
+        with etapa("encode_vaga"):
+            embedding_vaga = model.encode(titulo_vaga, convert_to_tensor=False)
         # codigo retirado para tratarbase.py limpar
         # Similaridade
-        scores = cosine_similarity([embedding_vaga], embeddings_applicants)[0]
+        with etapa("cosine_similarity"):
+            scores = cosine_similarity([embedding_vaga], embeddings_applicants)[0]
         df_applicants["score_similaridade"] = scores
 
         # Retorna lista de dicionários incluindo score_similaridade
         return df_applicants
 
-    def insert_analysis(self, analysis_obj: Analysis):
+    ####################################### Índice vetorial
+    #
+    def get_indice_applicants(self) -> VectorIndex:
+        """
+        Na primeira chamada sincroniza o store com self.applicants (mesma ordem de linhas)
+        e constrói o índice. Depois disso, inserts e updates mantêm os dois em dia.
+        """
+        with self._lock:
+            if self.indice is None:
+                with etapa("sincronizar_embeddings") as atributos:
+                    atributos["recodificados"] = self.embeddings.sincronizar(
+                        self.applicants["id"].tolist(), self.applicants["texto_cv"].tolist(), self.model
+                    )
+                with etapa("construir_indice_vetorial"):
+                    self.indice = VectorIndex(self.embeddings)
+        return self.indice
+
+    def buscar_posicoes_por_titulo(self, titulo_vaga: str, k: int = 20, nprobe: Optional[int] = None,
+                                   exato: bool = False):
+        """Retorna (posições em self.applicants, scores de cosseno) dos k candidatos mais similares."""
+        indice = self.get_indice_applicants()
+        embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+        return indice.buscar_posicoes(embedding_vaga, k=k, nprobe=nprobe, exato=exato)
+
+    def buscar_ids_por_titulo(self, titulo_vaga: str, k: int = 20, nprobe: Optional[int] = None,
+                              exato: bool = False):
+        """Retorna (ids, scores de cosseno) dos k candidatos mais similares ao título."""
+        indice = self.get_indice_applicants()
+        embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+        return indice.buscar(embedding_vaga, k=k, nprobe=nprobe, exato=exato)
+
+    def ranquear_por_titulo(self, titulo_vaga: str, k: int = 20, mascara=None):
+        """
+        Calcula o score de todos os candidatos elegíveis como um vetor NumPy e
+        materializa só os k melhores (argpartition), sem copiar/ordenar a base inteira.
+
+        Retorna (df_top, scores): df_top com as linhas completas dos k melhores e a
+        coluna score_similaridade; scores com a similaridade de todos os elegíveis
+        (para métricas e distribuição).
+        `mascara`: vetor booleano alinhado com self.applicants (None = todos).
+        """
+        self.get_indice_applicants()  # garante store alinhado com self.applicants
+        with etapa("encode_vaga"):
+            embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+
+        matriz = self.embeddings.matriz
+        with etapa("scores", linhas=int(matriz.shape[0])):
+            if mascara is None:
+                posicoes = np.arange(matriz.shape[0])
+                scores = np.asarray(matriz) @ embedding_vaga
+            else:
+                posicoes = np.flatnonzero(np.asarray(mascara, dtype=bool))
+                scores = np.asarray(matriz[posicoes]) @ embedding_vaga
+
+        with etapa("top_k", k=k):
+            top = top_k(scores, k)
+        with etapa("materializar_top_k"):
+            df_top = self.applicants.iloc[posicoes[top]].copy()
+            df_top["score_similaridade"] = scores[top]
+        return df_top, scores
+
+    def avaliar_indice(self, titulos: List[str], k: int = 20, nprobe: Optional[int] = None) -> dict:
+        """Recall@k do modo aproximado contra o exato, usando títulos de vaga como consultas."""
+        indice = self.get_indice_applicants()
+        consultas = self.model.encode(titulos, convert_to_numpy=True, normalize_embeddings=True)
+        return indice.medir_recall(consultas, k=k, nprobe=nprobe)
+
+    ####################################### Rankings pré-calculados
+    #
+    def get_ranking_precalculado(self, codigo_vaga: str, k: int = 20):
+        """
+        (df_top, resumo) da vaga a partir da tabela do job ranking_vagas.py, ou None se ela
+        não existir ou tiver sido gerada com outra base (inclusive depois de um insert/update
+        neste processo); nesse caso a tela volta a ranquear ao vivo (ranquear_por_titulo).
+        """
+        with self._lock:
+            if self.rankings is None:
+                self.rankings = RankingsPrecalculados()
+            if self.rankings.manifesto is None:
+                return None
+            if self._assinatura_base is None:
+                with etapa("assinatura_base"):
+                    self._assinatura_base = assinatura_base(
+                        self.applicants["id"].astype(str), self.applicants["texto_cv"], self.mascara_cadastro_completo()
+                    )
+            if not self.rankings.disponivel(self._assinatura_base):
+                return None
+
+        top = self.rankings.top(codigo_vaga).head(k)
+        resumo = self.rankings.resumo(codigo_vaga)
+        if resumo is None:
+            return None
+        df_top = self.applicants.iloc[[self.indice_applicant_id.get(id_)[0] for id_ in top["id"]]].copy()
+        df_top["score_similaridade"] = top["score"].to_numpy()
+        return df_top, resumo
+
+    ####################################### Match reverso (applicant -> vagas)
+    #
+    def get_indice_vagas(self) -> VectorIndex:
+        """Índice sobre os embeddings das vagas (montar_texto_vaga), sincronizado na primeira chamada."""
+        with self._lock:
+            if self.indice_vetorial_vagas is None:
+                if self.embeddings_vagas is None:
+                    self.embeddings_vagas = EmbeddingStore(DIRETORIO_EMBEDDINGS_VAGAS, nome_modelo=MODELO_PADRAO)
+                with etapa("sincronizar_embeddings_vagas") as atributos:
+                    atributos["recodificados"] = self.embeddings_vagas.sincronizar(
+                        self.vagas["codigo_vaga"].astype(str).tolist(), montar_texto_vaga(self.vagas).tolist(), self.model
+                    )
+                self.indice_vetorial_vagas = VectorIndex(self.embeddings_vagas)
+        return self.indice_vetorial_vagas
+
+    def get_vagas_compativeis(self, applicant_id: str, k: int = 10) -> pd.DataFrame:
+        """
+        Top-k vagas para o candidato: o vetor do texto_cv dele (do store; só é codificado se
+        for novo ou tiver mudado) contra o índice das vagas. Resultado guardado por id até o
+        próximo insert/update desse candidato; quem chama recebe sempre uma cópia e pode
+        alterá-la à vontade.
+        """
+        applicant_id = str(applicant_id)
+        indice = self.get_indice_vagas()
+
+        # Consulta, cálculo e gravação sob o mesmo lock de _atualizar_local: um update no meio
+        # não deixa guardado o top calculado com o texto_cv antigo
+        with self._lock:
+            guardado = self._vagas_do_applicant.get(applicant_id)
+            if guardado is not None and len(guardado) >= k:
+                return guardado.head(k).copy()
+
+            posicoes = self.indice_applicant_id.get(applicant_id)
+            if not posicoes:
+                raise ValueError(f"Nenhum candidato encontrado com id={applicant_id}.")
+            linha = self.applicants.iloc[posicoes[0]]
+
+            with etapa("vetor_applicant"):
+                vetor = self.embeddings.obter_vetores([applicant_id], [linha["texto_cv"]], self.model)[0]
+            with etapa("busca_vagas", k=k):
+                posicoes_vagas, scores = indice.buscar_posicoes(vetor, k=k)
+
+            df_top = self.vagas.iloc[posicoes_vagas].copy()
+            df_top["score_similaridade"] = scores
+            self._vagas_do_applicant[applicant_id] = df_top
+            return df_top.copy()
+
+    def _atualizar_vagas_do_applicant(self, applicant_id, k: int = 10) -> None:
+        """Descarta o top de vagas guardado e, com o índice das vagas pronto, já recalcula."""
+        self._vagas_do_applicant.pop(str(applicant_id), None)
+        if self.indice_vetorial_vagas is not None:
+            self.get_vagas_compativeis(applicant_id, k=k)
+
+    ####################################### CV completo (cv_pt em trechos)
+    #
+    def get_indice_cv(self) -> Optional[VectorIndex]:
+        """Índice sobre o vetor agregado do cv_pt de cada candidato. None se o job offline ainda não rodou."""
+        with self._lock:
+            if self.indice_cv is None:
+                self.trechos_cv = TrechosCV(nome_modelo=MODELO_PADRAO)
+                # limites ausentes: trechos de outro build ou build interrompido (só os agregados gravados)
+                if self.trechos_cv.limites is None or not len(self.trechos_cv):
+                    print("⚠️ Embeddings do CV completo não encontrados. Rode: python embeddings_cv.py")
+                    return None
+                with etapa("construir_indice_cv"):
+                    self.indice_cv = VectorIndex(self.trechos_cv)
+        return self.indice_cv
+
+    def get_candidatos_compativeis_por_cv(self, titulo_vaga: str, k: int = 20, nprobe: Optional[int] = None,
+                                          exato: bool = False, com_trecho: bool = True) -> pd.DataFrame:
+        """
+        Top-k pelo CV completo: um vetor por candidato (max-pooling dos trechos do cv_pt).
+        Com `com_trecho`, acrescenta o trecho do cv_pt mais parecido com a vaga (só para os k).
+        """
+        indice = self.get_indice_cv()
+        if indice is None:
+            return pd.DataFrame()
+
+        with etapa("encode_vaga"):
+            embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+        with etapa("busca_cv", k=k):
+            ids, scores = indice.buscar(embedding_vaga, k=k, nprobe=nprobe, exato=exato)
+
+        # candidatos removidos da base depois do build ficam de fora
+        posicoes = [self.indice_applicant_id.get(id_) for id_ in ids]
+        manter = [j for j, p in enumerate(posicoes) if p]
+        df_top = self.applicants.iloc[[posicoes[j][0] for j in manter]].copy()
+        df_top["score_similaridade"] = scores[manter]
+
+        if com_trecho and len(df_top):
+            with etapa("melhor_trecho"):
+                textos = self.get_textos_longos(df_top["id"].tolist(), ["cv_pt"])["cv_pt"].tolist()
+                trechos = []
+                for id_, texto in zip(df_top["id"], textos):
+                    vetores, spans = self.trechos_cv.trechos_de(id_)
+                    if not len(vetores) or not isinstance(texto, str):
+                        trechos.append("")
+                        continue
+                    inicio, fim = spans[int(np.argmax(vetores @ embedding_vaga))]
+                    trechos.append(texto[inicio:fim])
+                df_top["trecho_cv"] = trechos
+        return df_top
+
+    def insert_analysis(self, analysis_obj: "Analysis"):
         """Mock de inserção da análise. Pode ser adaptado ao Supabase futuramente."""
         print(f"🔄 Mock insert: {analysis_obj.codigo_vaga} - {analysis_obj.file}")
 
-    # Métodos para Supabase futuramente:
-    def inserir_applicant_supabase(self, dados: Dict) -> None:
-         supabase.table("applicants").insert(dados).execute()
-    
-    def atualizar_applicant_supabase(self, dados: Dict) -> None:
-         supabase.table("applicants").update(dados).eq("id", dados["id"]).execute()
-    
-    def get_all_applicants_supabase(self) -> List[Dict]:
-         response = supabase.table("applicants").select("*").execute()
-         return response.data if response.data else []
+    def iterar_applicants_supabase(self, colunas="*", tamanho_pagina: int = 1000, prefetch: bool = True):
+        """Páginas (listas de dicts) da tabela applicants em ordem de id, só com as colunas pedidas."""
+        return paginar_tabela("applicants", colunas=colunas, tamanho_pagina=tamanho_pagina, prefetch=prefetch)
+
+    def get_all_applicants_supabase(self, colunas="*") -> List[Dict]:
+        return [linha for pagina in self.iterar_applicants_supabase(colunas) for linha in pagina]
+
+    def get_indice_applicants_supabase(self, tamanho_pagina: int = 1000, reconstruir: bool = False) -> VectorIndex:
+        """
+        Embeddings e índice vetorial da tabela applicants do Supabase, montados página a
+        página (só id + colunas do texto_cv); a tabela nunca é lida numa resposta só.
+        """
+        with self._lock:
+            if self.indice_supabase is None or reconstruir:
+                if self.embeddings_supabase is None:
+                    self.embeddings_supabase = EmbeddingStore(DIRETORIO_EMBEDDINGS_SUPABASE, nome_modelo=MODELO_PADRAO)
+
+                def lotes():
+                    for pagina in self.iterar_applicants_supabase(["id", *COLUNAS_TEXTO_CV], tamanho_pagina):
+                        df_pagina = pd.DataFrame(pagina)
+                        yield df_pagina["id"].tolist(), montar_texto_cv(df_pagina).tolist()
+
+                self.embeddings_supabase.sincronizar_em_lotes(lotes(), self.model)
+                self.indice_supabase = VectorIndex(self.embeddings_supabase)
+        return self.indice_supabase
+
+    def get_candidatos_compativeis_supabase(self, titulo_vaga: str, k: int = 20, colunas="*",
+                                            nprobe: Optional[int] = None) -> pd.DataFrame:
+        """Top-k do índice do Supabase; busca na tabela só as linhas desses k candidatos."""
+        indice = self.get_indice_applicants_supabase()
+        embedding_vaga = self.model.encode(titulo_vaga, convert_to_numpy=True, normalize_embeddings=True)
+        ids, scores = indice.buscar(embedding_vaga, k=k, nprobe=nprobe)
+        if not ids:
+            return pd.DataFrame()
+
+        if colunas != "*" and "id" not in colunas.split(","):
+            colunas = f"id,{colunas}"
+        linhas = get_supabase().table("applicants").select(colunas).in_("id", ids).execute().data or []
+        df_top = pd.DataFrame(linhas)
+        df_top["id"] = df_top["id"].astype(str)
+        df_top = df_top.set_index("id").reindex(ids).reset_index()
+        df_top["score_similaridade"] = scores
+        return df_top
 
     ############################ Atualizar no Supabase e df_applicants
     #
     def atualizar_applicant_supabase(self, dados: Dict) -> None:
         if "id" not in dados:
             raise ValueError("O campo 'id' é obrigatório.")
-        response = supabase.table("applicants").update(dados).eq("id", dados["id"]).execute()
+        response = get_supabase().table("applicants").update(dados).eq("id", dados["id"]).execute()
         if response.error:
             raise Exception(f"Erro no Supabase: {response.error.message}")
 
-        idx = self.applicants.index[self.applicants['id'] == dados["id"]]
-        if not idx.empty:
-            for key, value in dados.items():
-                self.applicants.loc[idx, key] = value
+        # Mesma sincronização do atualizar_applicant (texto_cv, embedding, índices e caches)
+        with self._lock:
+            if str(dados["id"]) in self.indice_applicant_id:
+                self._atualizar_local(dados)
 
         return response.data
 
@@ -139,66 +593,104 @@ class AnalyseDatabase:
         Parâmetros:
             dados: dict com os dados do applicant a serem inseridos.
         """
-        response = supabase.table("applicants").insert(dados).execute()
+        response = get_supabase().table("applicants").insert(dados).execute()
         
         if response.error:
             raise Exception(f"Erro ao inserir no Supabase: {response.error.message}")
 
-        # Atualize o DataFrame local adicionando o novo registro 
-        novo_registro = pd.DataFrame([dados])
-        self.applicants = pd.concat([self.applicants, novo_registro], ignore_index=True)
-        
+        # Atualize o DataFrame local adicionando o novo registro (mesmo caminho do inserir_applicant_novo)
+        with self._lock:
+            if str(dados.get("id")) not in self.indice_applicant_id:
+                self._inserir_local(dados)
+
         return response.data
     
-    # Suponha que applicants seja seu DataFrame global importado de tratarbase.py
-    from tratarbase import applicants
-
     def inserir_applicant_novo(self,dados: dict):
         """
-        Insere novo registro no DataFrame global applicants.
+        Insere novo registro no DataFrame applicants da instância.
         Se o ID já existir, avisa que é duplicado e não insere.
+        O texto_cv do registro é montado como no tratarbase.py e só ele é codificado.
         """
-        global applicants
-
         if 'id' not in dados or not dados['id']:
             raise ValueError("O campo 'id' é obrigatório para inserir.")
 
-        if dados['id'] in applicants['id'].astype(str).values:
-            raise ValueError(f"Já existe um candidato com id={dados['id']}")
-
-        # Transforma dict em DataFrame de 1 linha
-        df_novo = pd.DataFrame([dados])
-
-        # Append ao DataFrame global
-        applicants = pd.concat([applicants, df_novo], ignore_index=True)
+        with self._lock:
+            if dados['id'] in self.indice_applicant_id:
+                raise ValueError(f"Já existe um candidato com id={dados['id']}")
+            self._inserir_local(dados)
+
+    def _inserir_local(self, dados: dict) -> None:
+        """Acrescenta a linha tratada ao applicants e mantém embeddings, índices e caches em dia."""
+        with self._lock:
+            # Transforma dict em DataFrame de 1 linha, com o mesmo tratamento da carga
+            df_novo = pd.DataFrame([tratar_registro_applicant(dados)])
+            df_novo["texto_cv"] = montar_texto_cv(df_novo.copy())
+            df_novo["cadastro_completo"] = marcar_cadastro_completo(df_novo)
+            df_novo = self._alinhar_dtypes(df_novo)
+
+            # Append ao DataFrame da instância (compartilhada entre sessões via st.cache_resource)
+            self.applicants = pd.concat([self.applicants, df_novo], ignore_index=True)
+
+            self._indexar_nova_linha(len(self.applicants) - 1)
+            self._atualizar_embedding(len(self.applicants) - 1)
+            self._atualizar_bm25(len(self.applicants) - 1)
+            self._assinatura_base = None
+            self._atualizar_vagas_do_applicant(dados['id'])
 
     def atualizar_applicant(self,dados: dict):
         """
-        Atualiza registro existente no DataFrame global applicants pelo campo 'id'.
+        Atualiza registro existente no DataFrame applicants da instância pelo campo 'id'.
         Se não encontrar o id, lança erro.
+        O texto_cv da linha é remontado e só ela é recodificada.
         """
-        global applicants
-
         if 'id' not in dados or not dados['id']:
             raise ValueError("O campo 'id' é obrigatório para atualizar.")
 
-        id_str = str(dados['id'])
+        self._atualizar_local(dados)
 
-        idxs = applicants.index[applicants['id'].astype(str) == id_str].tolist()
-        if not idxs:
-            raise ValueError(f"Nenhum candidato encontrado com id={id_str} para atualizar.")
+    def _atualizar_local(self, dados: dict) -> None:
+        """Aplica `dados` na linha do id e remonta texto_cv, cadastro_completo, embeddings, índices e caches."""
+        id_str = str(dados['id'])
 
-        idx = idxs[0]
+        with self._lock:
+            posicoes = self.indice_applicant_id.get(id_str)
+            if not posicoes:
+                raise ValueError(f"Nenhum candidato encontrado com id={id_str} para atualizar.")
+
+            posicao = posicoes[0]
+            idx = self.applicants.index[posicao]
+            codigo_antigo = self.applicants.at[idx, "codigo_profissional"]
+            dados = tratar_registro_applicant(dados)
+
+            # Atualiza linha inteira (mantendo a ordem das colunas do DataFrame)
+            for coluna in dados:
+                if coluna not in self.applicants.columns:
+                    # Se a coluna não existe, cria coluna vazia antes
+                    self.applicants[coluna] = None
+                self._atribuir(idx, coluna, dados[coluna])
+
+            linha = self.applicants.loc[[idx]].copy()
+            self._atribuir(idx, "texto_cv", montar_texto_cv(linha).iloc[0])
+            self.applicants.at[idx, "cadastro_completo"] = bool(marcar_cadastro_completo(linha).iloc[0])
+
+            self.indice_codigo_profissional.mover(codigo_antigo, self.applicants.at[idx, "codigo_profissional"], posicao)
+            self._atualizar_embedding(posicao)
+            self._atualizar_bm25(posicao)
+            self._assinatura_base = None
+            self._atualizar_vagas_do_applicant(id_str)
+
+    def _atualizar_embedding(self, posicao: int) -> None:
+        """
+        Codifica só a linha alterada e grava no store e no índice vetorial.
+        Se o índice ainda não foi construído neste processo, a próxima busca
+        sincroniza o store pelo hash do texto_cv.
+        """
+        if self.indice is None:
+            return
 
-        # Atualiza linha inteira (mantendo a ordem das colunas do DataFrame)
-        for coluna in dados:
-            if coluna in applicants.columns:
-                applicants.at[idx, coluna] = dados[coluna]
-            else:
-                # Se a coluna não existe, você pode optar por ignorar ou criar nova coluna:
-                applicants[coluna] = None  # criar coluna vazia antes
-                applicants.at[idx, coluna] = dados[coluna]
-                pass 
+        linha = self.applicants.iloc[posicao]
+        self.embeddings.obter_vetores([linha["id"]], [linha["texto_cv"]], self.model)
+        self.indice.atualizar([posicao])
 
 #################################################################################
 #
@@ -1,29 +1,249 @@
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2.credentials import Credentials
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 
-creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+folder_id = "1nrkXMY3C1sX1t6mURMOvRYJW0JpOo_3Z"
 
-service = build('drive', 'v3', credentials=creds)
+DESTINO_PADRAO = "./curriculum"
+NOME_MANIFESTO = ".manifesto_drive.json"
+CAMPOS_ARQUIVO = "id, name, mimeType, md5Checksum, modifiedTime, size"
 
-folder_id = "1nrkXMY3C1sX1t6mURMOvRYJW0JpOo_3Z"
 
-results = service.files().list(
-    q=f"'{folder_id}' in parents", fields = 'files(id, name)'
-).execute()
-
-files = results.get('files', [])
-
-if not files:
-    raise FileNotFoundError('Not Files in Results.')
-else:
-    for file in files:
-        requests = service.files().get_media(fileId=file['id'])
-        file_path = f"./curriculum/{file['name']}"
-        with open(file_path, 'wb') as file:
-            downloader = MediaIoBaseDownload(file, requests)
-            done = False
-            while not done:
-                status, done = downloader.next_chunk()
\ No newline at end of file
+####################### Fontes (Drive real e stub local) ##############
+#
+class GoogleDriveFonte:
+    """Acesso à API do Google Drive. Um `service` por thread (o cliente httplib2 não é thread-safe)."""
+
+    def __init__(self, token_path='token.json'):
+        from google.oauth2.credentials import Credentials
+
+        self.creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+        self._local = threading.local()
+
+    @property
+    def service(self):
+        if not hasattr(self._local, 'service'):
+            from googleapiclient.discovery import build
+            self._local.service = build('drive', 'v3', credentials=self.creds)
+        return self._local.service
+
+    def listar(self, pasta_id, page_token=None):
+        """Uma página da listagem: (arquivos, próximo page_token ou None)."""
+        results = self.service.files().list(
+            q=f"'{pasta_id}' in parents and trashed = false",
+            fields=f"nextPageToken, files({CAMPOS_ARQUIVO})",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        return results.get('files', []), results.get('nextPageToken')
+
+    def baixar(self, arquivo_id, destino):
+        from googleapiclient.http import MediaIoBaseDownload
+
+        requests = self.service.files().get_media(fileId=arquivo_id)
+        downloader = MediaIoBaseDownload(destino, requests)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk()
+
+
+class DriveLocalStub:
+    """
+    Substituto da API para testes: expõe os arquivos de um diretório local como se
+    fossem a pasta do Drive (mesmos campos, paginação com `tamanho_pagina`).
+    """
+
+    def __init__(self, diretorio, tamanho_pagina=100):
+        self.diretorio = diretorio
+        self.tamanho_pagina = tamanho_pagina
+
+    def _metadados(self, nome):
+        caminho = os.path.join(self.diretorio, nome)
+        with open(caminho, 'rb') as f:
+            md5 = hashlib.md5(f.read()).hexdigest()
+        info = os.stat(caminho)
+        return {
+            'id': nome,
+            'name': nome,
+            'mimeType': 'application/pdf',
+            'md5Checksum': md5,
+            'modifiedTime': datetime.fromtimestamp(info.st_mtime, timezone.utc).isoformat(),
+            'size': str(info.st_size),
+        }
+
+    def listar(self, pasta_id, page_token=None):
+        nomes = sorted(n for n in os.listdir(self.diretorio) if os.path.isfile(os.path.join(self.diretorio, n)))
+        inicio = int(page_token or 0)
+        fim = inicio + self.tamanho_pagina
+        pagina = [self._metadados(n) for n in nomes[inicio:fim]]
+        return pagina, (str(fim) if fim < len(nomes) else None)
+
+    def baixar(self, arquivo_id, destino):
+        with open(os.path.join(self.diretorio, arquivo_id), 'rb') as f:
+            destino.write(f.read())
+
+
+####################### Manifesto ######################################
+#
+class Manifesto:
+    """
+    Registro local do que já foi baixado: {id: {name, md5Checksum, modifiedTime, size}}.
+    É gravado a cada `intervalo_gravacao` downloads e no fim da sincronização (salvar),
+    então uma execução interrompida perde no máximo esse número de registros e só
+    rebaixa esses arquivos.
+    """
+
+    def __init__(self, destino, intervalo_gravacao=50):
+        self.caminho = os.path.join(destino, NOME_MANIFESTO)
+        self.intervalo_gravacao = intervalo_gravacao
+        self._lock = threading.Lock()
+        self._pendentes = 0
+        self.arquivos = {}
+        if os.path.exists(self.caminho):
+            with open(self.caminho, encoding='utf-8') as f:
+                self.arquivos = json.load(f)
+
+    def atualizado(self, arquivo, destino, nome=None):
+        """
+        True se o arquivo local corresponde à versão do Drive (md5 ou, na falta dele, modifiedTime).
+        `nome` é o nome local esperado (ver nomes_locais); se mudou, o arquivo é baixado de novo.
+        """
+        registro = self.arquivos.get(arquivo['id'])
+        if registro is None or not os.path.exists(os.path.join(destino, registro['name'])):
+            return False
+        if nome is not None and registro['name'] != nome:
+            return False
+        if arquivo.get('md5Checksum'):
+            return registro.get('md5Checksum') == arquivo['md5Checksum']
+        return registro.get('modifiedTime') == arquivo.get('modifiedTime')
+
+    def registrar(self, arquivo):
+        with self._lock:
+            self.arquivos[arquivo['id']] = {
+                'name': arquivo['name'],
+                'md5Checksum': arquivo.get('md5Checksum'),
+                'modifiedTime': arquivo.get('modifiedTime'),
+                'size': arquivo.get('size'),
+            }
+            self._pendentes += 1
+            if self._pendentes >= self.intervalo_gravacao:
+                self._gravar()
+
+    def salvar(self):
+        with self._lock:
+            if self._pendentes:
+                self._gravar()
+
+    def _gravar(self):
+        temporario = self.caminho + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.arquivos, f, ensure_ascii=False, indent=1)
+        os.replace(temporario, self.caminho)
+        self._pendentes = 0
+
+
+####################### Sincronização ##################################
+#
+def listar_pasta(fonte, pasta_id):
+    """Percorre todas as páginas da pasta (a listagem antiga lia só a primeira)."""
+    arquivos, page_token = [], None
+    while True:
+        pagina, page_token = fonte.listar(pasta_id, page_token)
+        arquivos.extend(pagina)
+        if not page_token:
+            return arquivos
+
+
+def nomes_locais(arquivos):
+    """
+    {id: nome local}. O Drive aceita vários arquivos com o mesmo nome na pasta; esses
+    recebem o id antes da extensão (cv__<id>.pdf) para não disputarem o mesmo caminho
+    e o mesmo .part. A comparação ignora maiúsculas (sistemas de arquivos do Windows/macOS).
+    """
+    contagem = {}
+    for arquivo in arquivos:
+        nome = os.path.basename(arquivo['name']).lower()
+        contagem[nome] = contagem.get(nome, 0) + 1
+
+    nomes = {}
+    for arquivo in arquivos:
+        nome = os.path.basename(arquivo['name'])
+        if contagem[nome.lower()] > 1:
+            base, extensao = os.path.splitext(nome)
+            nome = f"{base}__{arquivo['id']}{extensao}"
+        nomes[arquivo['id']] = nome
+    return nomes
+
+
+def _baixar_arquivo(fonte, arquivo, destino, manifesto, nome):
+    caminho = os.path.join(destino, nome)
+    parcial = caminho + '.part'
+
+    # baixa para .part e só renomeia no fim: um download interrompido nunca deixa PDF truncado
+    with open(parcial, 'wb') as f:
+        fonte.baixar(arquivo['id'], f)
+    os.replace(parcial, caminho)
+    manifesto.registrar({**arquivo, 'name': nome})
+    return nome
+
+
+def sincronizar(fonte=None, pasta_id=folder_id, destino=DESTINO_PADRAO, max_workers=8, forcar=False):
+    """
+    Sincroniza a pasta do Drive com `destino`: baixa em paralelo (até `max_workers`)
+    apenas arquivos novos ou alterados. Retorna {'baixados', 'ignorados', 'erros'}.
+    """
+    fonte = fonte or GoogleDriveFonte()
+    os.makedirs(destino, exist_ok=True)
+    manifesto = Manifesto(destino)
+
+    inicio = time.perf_counter()
+    files = listar_pasta(fonte, pasta_id)
+    if not files:
+        raise FileNotFoundError('Not Files in Results.')
+
+    # arquivos nativos do Google (Docs, Sheets...) não têm conteúdo binário para get_media
+    files = [f for f in files if not f.get('mimeType', '').startswith('application/vnd.google-apps')]
+    nomes = nomes_locais(files)
+    pendentes = [f for f in files if forcar or not manifesto.atualizado(f, destino, nomes[f['id']])]
+    print(f"📂 {len(files)} arquivo(s) na pasta, {len(pendentes)} para baixar.")
+
+    baixados, erros = 0, []
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futuros = {pool.submit(_baixar_arquivo, fonte, f, destino, manifesto, nomes[f['id']]): f
+                       for f in pendentes}
+            for futuro in as_completed(futuros):
+                arquivo = futuros[futuro]
+                try:
+                    futuro.result()
+                    baixados += 1
+                except Exception as e:
+                    erros.append(arquivo['name'])
+                    print(f"❌ Erro ao baixar {arquivo['name']}: {e}")
+    finally:
+        manifesto.salvar()
+
+    resumo = {'baixados': baixados, 'ignorados': len(files) - len(pendentes), 'erros': erros}
+    print(f"✅ Sincronização em {time.perf_counter() - inicio:.1f}s: {baixados} baixado(s), "
+          f"{resumo['ignorados']} já atualizado(s), {len(erros)} erro(s).")
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza os currículos da pasta do Google Drive.")
+    parser.add_argument("--pasta", default=folder_id, help="ID da pasta no Drive")
+    parser.add_argument("--destino", default=DESTINO_PADRAO)
+    parser.add_argument("--workers", type=int, default=8, help="downloads simultâneos")
+    parser.add_argument("--forcar", action="store_true", help="baixa tudo de novo, ignorando o manifesto")
+    parser.add_argument("--stub", metavar="DIR", help="usa um diretório local no lugar da API do Drive")
+    args = parser.parse_args()
+
+    fonte = DriveLocalStub(args.stub) if args.stub else GoogleDriveFonte()
+    sincronizar(fonte, pasta_id=args.pasta, destino=args.destino, max_workers=args.workers, forcar=args.forcar)
\ No newline at end of file
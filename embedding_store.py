@@ -0,0 +1,332 @@
+import os
+import json
+import base64
+import hashlib
+import threading
+import numpy as np
+
+from typing import List, Optional
+
+DIRETORIO_EMBEDDINGS = os.path.join("cache", "embeddings")
+
+
+def hash_texto(texto) -> str:
+    """Hash do conteúdo usado para detectar textos alterados desde o último build."""
+    return hashlib.sha1(str(texto).encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Matriz de embeddings persistida em disco.
+
+    Arquivos gravados em `diretorio`:
+        embeddings-<geracao>.npy     -> matriz float32 (capacidade x dim), normalizada, aberta com
+                                        mmap de leitura/escrita; só as primeiras len(ids) linhas valem
+        manifesto.json               -> modelo, geração, ids e hash do texto de cada linha
+        alteracoes-<geracao>.jsonl   -> inserts/updates pontuais feitos depois do último build
+
+    A linha i da matriz corresponde a ids[i]. Só as linhas cujo hash mudou são
+    recodificadas pelo modelo. Um insert/update pontual acrescenta uma linha ao log de
+    alterações e grava o vetor direto na matriz (sobra de capacidade), sem reescrever
+    a matriz nem o manifesto; o log é consolidado num novo build (salvar) quando cresce.
+    """
+
+    LIMITE_ALTERACOES = 5000  # linhas no log antes de consolidar num build novo
+
+    def __init__(self, diretorio: str = DIRETORIO_EMBEDDINGS, nome_modelo: str = "all-MiniLM-L6-v2"):
+        self.diretorio = diretorio
+        self.nome_modelo = nome_modelo
+        self.caminho_manifesto = os.path.join(diretorio, "manifesto.json")
+
+        self.ids: List[str] = []
+        self.hashes: List[str] = []
+        self.matriz: Optional[np.ndarray] = None
+        self.geracao = 0
+        self._base: Optional[np.ndarray] = None  # arquivo inteiro (com a capacidade extra); matriz = _base[:n]
+        self._alteracoes = 0
+        self._posicoes = {}
+        self._lock = threading.RLock()
+
+        self.carregar()
+
+    def _caminho_matriz(self, geracao: int) -> str:
+        return os.path.join(self.diretorio, f"embeddings-{geracao}.npy")
+
+    def _caminho_alteracoes(self, geracao: int) -> str:
+        return os.path.join(self.diretorio, f"alteracoes-{geracao}.jsonl")
+
+    ####################### Persistência ################################
+    #
+    def carregar(self) -> bool:
+        """Carrega matriz (mmap) e manifesto do disco e reaplica o log de alterações. False se não houver build válido."""
+        if not os.path.exists(self.caminho_manifesto):
+            return False
+
+        with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+        if manifesto.get("modelo") != self.nome_modelo:
+            print(f"⚠️ Embeddings em disco são do modelo '{manifesto.get('modelo')}'. Será feito novo build.")
+            return False
+
+        geracao = manifesto.get("geracao")
+        caminho = self._caminho_matriz(geracao) if geracao is not None else os.path.join(self.diretorio, "embeddings.npy")
+        if not os.path.exists(caminho):
+            return False
+        try:
+            base = np.load(caminho, mmap_mode="r+")
+        except OSError:
+            base = np.load(caminho, mmap_mode="c")  # sem permissão de escrita: edições só em memória (e no log)
+        n = len(manifesto["ids"])
+        if base.shape[0] < n:
+            print("⚠️ Manifesto e matriz de embeddings com tamanhos diferentes. Será feito novo build.")
+            return False
+
+        self._base = base
+        self.matriz = base[:n]
+        self.geracao = geracao or 0
+        self.ids = [str(i) for i in manifesto["ids"]]
+        self.hashes = manifesto["hashes"]
+        self._posicoes = {id_: pos for pos, id_ in enumerate(self.ids)}
+        self._alteracoes = 0
+        if geracao is not None:
+            self._reaplicar_alteracoes()
+        return True
+
+    def _reaplicar_alteracoes(self) -> None:
+        """Reaplica o log (idempotente): vale mesmo se o processo caiu antes de gravar a linha na matriz."""
+        caminho = self._caminho_alteracoes(self.geracao)
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    registro = json.loads(linha)
+                except ValueError:
+                    break  # última linha incompleta (gravação interrompida)
+                vetor = np.frombuffer(base64.b64decode(registro["vetor"]), dtype=np.float32)
+                if not self._aplicar(registro["id"], registro["hash"], vetor):
+                    print("⚠️ Log de alterações maior que a capacidade da matriz. Consolidando.")
+                    self.salvar()
+                    return
+                self._alteracoes += 1
+
+    def salvar(self, folga: Optional[int] = None) -> None:
+        """
+        Grava um build novo: matriz (com `folga` linhas livres para inserts) num arquivo da
+        próxima geração e, por último, o manifesto apontando para ele — a troca do manifesto
+        é o único passo que muda o build válido. Arquivos e log da geração anterior são apagados.
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        n, dimensao = self.matriz.shape
+        folga = max(1024, n // 8) if folga is None else folga
+        geracao = self.geracao + 1
+
+        tmp_matriz = self._caminho_matriz(geracao) + ".tmp"
+        destino = np.lib.format.open_memmap(tmp_matriz, mode="w+", dtype=np.float32, shape=(n + folga, dimensao))
+        for inicio in range(0, n, 65536):
+            fim = min(n, inicio + 65536)
+            destino[inicio:fim] = self.matriz[inicio:fim]
+        destino.flush()
+        del destino
+        os.replace(tmp_matriz, self._caminho_matriz(geracao))
+
+        manifesto = {
+            "modelo": self.nome_modelo,
+            "dimensao": int(dimensao),
+            "geracao": geracao,
+            "ids": self.ids,
+            "hashes": self.hashes,
+        }
+        tmp_manifesto = self.caminho_manifesto + ".tmp"
+        with open(tmp_manifesto, "w", encoding="utf-8") as f:
+            json.dump(manifesto, f)
+        os.replace(tmp_manifesto, self.caminho_manifesto)
+
+        # Reabre com mmap para não manter duas cópias em memória
+        anterior = self.geracao
+        self.geracao = geracao
+        self._base = np.load(self._caminho_matriz(geracao), mmap_mode="r+")
+        self.matriz = self._base[:n]
+        self._alteracoes = 0
+        for caminho in (self._caminho_matriz(anterior), self._caminho_alteracoes(anterior),
+                        os.path.join(self.diretorio, "embeddings.npy")):
+            try:
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+            except OSError:
+                pass  # ainda aberto por outro processo (Windows); fica para o próximo build
+
+    def substituir(self, ids: List[str], hashes: List[str], matriz: np.ndarray) -> None:
+        """Troca todo o conteúdo do store (ex.: vetores calculados fora dele) e grava um build novo."""
+        with self._lock:
+            self.matriz = np.asarray(matriz, dtype=np.float32)
+            self.ids = [str(i) for i in ids]
+            self.hashes = list(hashes)
+            self._posicoes = {id_: pos for pos, id_ in enumerate(self.ids)}
+            self.salvar()
+
+    ####################### Build ########################################
+    #
+    def _codificar(self, textos: List[str], model, batch_size: int = 256) -> np.ndarray:
+        vetores = model.encode(
+            textos,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vetores, dtype=np.float32)
+
+    def sincronizar(self, ids, textos, model, batch_size: int = 256) -> int:
+        """
+        Deixa a matriz alinhada com (ids, textos), na mesma ordem.
+        Reaproveita as linhas cujo hash não mudou e recodifica apenas o restante.
+        Retorna a quantidade de linhas recodificadas.
+        """
+        ids = [str(i) for i in ids]
+        textos = ["" if t is None else str(t) for t in textos]
+        novos_hashes = [hash_texto(t) for t in textos]
+
+        with self._lock:
+            if ids == self.ids and novos_hashes == self.hashes:
+                return 0
+
+            dimensao = self.matriz.shape[1] if self.matriz is not None else model.get_sentence_embedding_dimension()
+            nova = np.empty((len(ids), dimensao), dtype=np.float32)
+
+            destino, origem, pendentes = [], [], []
+            for i, (id_, h) in enumerate(zip(ids, novos_hashes)):
+                pos = self._posicoes.get(id_)
+                if pos is not None and self.hashes[pos] == h:
+                    destino.append(i)
+                    origem.append(pos)
+                else:
+                    pendentes.append(i)
+
+            if destino:
+                nova[destino] = self.matriz[origem]
+
+            if pendentes:
+                print(f"🔄 Recodificando {len(pendentes)} de {len(ids)} textos...")
+                nova[pendentes] = self._codificar([textos[i] for i in pendentes], model, batch_size)
+
+            self.matriz = nova
+            self.ids = ids
+            self.hashes = novos_hashes
+            self._posicoes = {id_: pos for pos, id_ in enumerate(ids)}
+            self.salvar()
+
+            return len(pendentes)
+
+    def sincronizar_em_lotes(self, lotes, model, batch_size: int = 256) -> int:
+        """
+        Como sincronizar, mas recebendo um iterável de (ids, textos) por página, para
+        montar a matriz a partir de uma leitura em streaming sem ter a base inteira em memória.
+        Retorna a quantidade de linhas recodificadas.
+        """
+        with self._lock:
+            dimensao = self.matriz.shape[1] if self.matriz is not None else model.get_sentence_embedding_dimension()
+            blocos, ids, hashes, recodificados = [], [], [], 0
+
+            for ids_lote, textos_lote in lotes:
+                ids_lote = [str(i) for i in ids_lote]
+                textos_lote = ["" if t is None else str(t) for t in textos_lote]
+                hashes_lote = [hash_texto(t) for t in textos_lote]
+                bloco = np.empty((len(ids_lote), dimensao), dtype=np.float32)
+
+                pendentes = []
+                for i, (id_, h) in enumerate(zip(ids_lote, hashes_lote)):
+                    pos = self._posicoes.get(id_)
+                    if pos is not None and self.hashes[pos] == h:
+                        bloco[i] = self.matriz[pos]
+                    else:
+                        pendentes.append(i)
+
+                if pendentes:
+                    bloco[pendentes] = self._codificar([textos_lote[i] for i in pendentes], model, batch_size)
+                    recodificados += len(pendentes)
+
+                blocos.append(bloco)
+                ids.extend(ids_lote)
+                hashes.extend(hashes_lote)
+
+            if ids == self.ids and hashes == self.hashes:
+                return 0
+
+            self.matriz = np.concatenate(blocos) if blocos else np.empty((0, dimensao), dtype=np.float32)
+            self.ids = ids
+            self.hashes = hashes
+            self._posicoes = {id_: pos for pos, id_ in enumerate(ids)}
+            self.salvar()
+
+            if recodificados:
+                print(f"🔄 {recodificados} de {len(ids)} textos recodificados a partir do streaming.")
+            return recodificados
+
+    def obter_vetores(self, ids, textos, model, batch_size: int = 256) -> np.ndarray:
+        """
+        Retorna os vetores de um subconjunto de ids (na ordem recebida).
+        Ids novos ou com texto alterado são codificados e gravados no store.
+        """
+        ids = [str(i) for i in ids]
+        textos = ["" if t is None else str(t) for t in textos]
+        hashes = [hash_texto(t) for t in textos]
+
+        with self._lock:
+            pendentes = [
+                j for j, (id_, h) in enumerate(zip(ids, hashes))
+                if self._posicoes.get(id_) is None or self.hashes[self._posicoes[id_]] != h
+            ]
+
+            if pendentes:
+                vetores = self._codificar([textos[j] for j in pendentes], model, batch_size)
+                self._gravar_linhas([ids[j] for j in pendentes], [hashes[j] for j in pendentes], vetores)
+
+            return np.asarray(self.matriz[[self._posicoes[id_] for id_ in ids]])
+
+    def _gravar_linhas(self, ids: List[str], hashes: List[str], vetores: np.ndarray) -> None:
+        """
+        Grava poucas linhas sem reescrever o build: primeiro no log de alterações, depois
+        na matriz (update no lugar, insert na capacidade livre). Sem capacidade (ou sem
+        build em disco), grava um build novo com folga antes.
+        """
+        novos = len({id_ for id_ in ids if id_ not in self._posicoes})
+        if self._base is None or len(self.ids) + novos > self._base.shape[0]:
+            if self.matriz is None:
+                self.matriz = np.empty((0, vetores.shape[1]), dtype=np.float32)
+            self.salvar(folga=max(1024, (len(self.ids) + novos) // 8, novos))
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        with open(self._caminho_alteracoes(self.geracao), "a", encoding="utf-8") as f:
+            for id_, h, vetor in zip(ids, hashes, vetores):
+                vetor = np.asarray(vetor, dtype=np.float32)
+                f.write(json.dumps({"id": id_, "hash": h, "vetor": base64.b64encode(vetor.tobytes()).decode("ascii")}) + "\n")
+            f.flush()
+
+        for id_, h, vetor in zip(ids, hashes, vetores):
+            self._aplicar(id_, h, vetor)
+        self._base.flush()
+        self._alteracoes += len(ids)
+
+        if self._alteracoes >= self.LIMITE_ALTERACOES:
+            self.salvar()
+
+    def _aplicar(self, id_: str, h: str, vetor: np.ndarray) -> bool:
+        """Grava uma linha na matriz (sem log). False se não houver capacidade para um id novo."""
+        pos = self._posicoes.get(id_)
+        if pos is None:
+            pos = len(self.ids)
+            if pos >= self._base.shape[0]:
+                return False
+            self._posicoes[id_] = pos
+            self.ids.append(id_)
+            self.hashes.append(h)
+            self.matriz = self._base[:pos + 1]
+        else:
+            self.hashes[pos] = h
+        self._base[pos] = vetor
+        return True
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -0,0 +1,263 @@
+"""
+Embeddings do CV completo (cv_pt), em trechos.
+
+O MiniLM trunca tudo que passa de `max_seq_length` tokens, então o cv_pt é dividido
+em trechos de até `max_tokens` tokens com `sobreposicao` tokens repetidos entre
+trechos vizinhos. Cada trecho é codificado (em lotes grandes) e o vetor do candidato
+é o max-pooling dos vetores dos seus trechos, normalizado. A busca continua com um
+vetor por candidato, com a mesma latência da busca pelo texto_cv.
+
+Arquivos gravados em `diretorio`:
+    embeddings-*.npy / manifesto.json -> vetor agregado por candidato (EmbeddingStore)
+    trechos.f32                       -> vetores dos trechos (float32, linha a linha)
+    trechos_limites.npy               -> trechos do candidato i: [limites[i], limites[i + 1])
+    trechos_spans.npy                 -> (início, fim) de cada trecho em caracteres do cv_pt
+    trechos.json                      -> dimensão, quantidade, parâmetros da divisão e geração
+                                         do EmbeddingStore; gravado por último (é o que valida o build)
+
+    python embeddings_cv.py [--max-tokens 256] [--sobreposicao 32] [--lote 5000] [--batch 512]
+"""
+import os
+import re
+import json
+import time
+import argparse
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+from embedding_store import EmbeddingStore, hash_texto
+from model_registry import obter_modelo, MODELO_PADRAO
+
+DIRETORIO_EMBEDDINGS_CV = os.path.join("cache", "embeddings_cv")
+
+MAX_TOKENS = 256
+SOBREPOSICAO = 32
+
+
+####################### Divisão em trechos ###########################
+#
+def _spans_tokens(textos: List[str], tokenizer=None) -> List[List[Tuple[int, int]]]:
+    """
+    (início, fim) em caracteres de cada token, por texto. Usa os offsets do tokenizer
+    do modelo (fast tokenizer); sem ele, cada palavra conta como um token.
+    """
+    if tokenizer is not None and getattr(tokenizer, "is_fast", False):
+        codificados = tokenizer(textos, add_special_tokens=False, return_offsets_mapping=True,
+                                return_attention_mask=False, return_token_type_ids=False, verbose=False)
+        return [[tuple(o) for o in offsets] for offsets in codificados["offset_mapping"]]
+    return [[m.span() for m in re.finditer(r"\S+", texto)] for texto in textos]
+
+
+def dividir_em_trechos(spans: List[Tuple[int, int]], max_tokens: int = MAX_TOKENS,
+                       sobreposicao: int = SOBREPOSICAO) -> List[Tuple[int, int]]:
+    """Janelas de até max_tokens tokens, andando max_tokens - sobreposicao a cada passo."""
+    if not spans:
+        return []
+    passo = max(1, max_tokens - sobreposicao)
+    trechos = []
+    for inicio in range(0, len(spans), passo):
+        janela = spans[inicio:inicio + max_tokens]
+        trechos.append((janela[0][0], janela[-1][1]))
+        if inicio + max_tokens >= len(spans):
+            break
+    return trechos
+
+
+def _limite_tokens(model, max_tokens: int) -> int:
+    """Tokens úteis por trecho: respeita o max_seq_length do modelo, descontando [CLS] e [SEP]."""
+    limite = getattr(model, "max_seq_length", None) or max_tokens
+    return max(8, min(max_tokens, limite) - 2)
+
+
+####################### Store ########################################
+#
+class TrechosCV:
+    """Vetores dos trechos e vetor agregado de cada candidato, persistidos em `diretorio`."""
+
+    def __init__(self, diretorio: str = DIRETORIO_EMBEDDINGS_CV, nome_modelo: str = MODELO_PADRAO):
+        self.diretorio = diretorio
+        self.agregados = EmbeddingStore(diretorio, nome_modelo=nome_modelo)
+        self.caminho_trechos = os.path.join(diretorio, "trechos.f32")
+        self.caminho_limites = os.path.join(diretorio, "trechos_limites.npy")
+        self.caminho_spans = os.path.join(diretorio, "trechos_spans.npy")
+        self.caminho_manifesto = os.path.join(diretorio, "trechos.json")
+
+        self.trechos: Optional[np.ndarray] = None
+        self.limites: Optional[np.ndarray] = None
+        self.spans: Optional[np.ndarray] = None
+        self.parametros: dict = {}
+        self.carregar()
+
+    def carregar(self) -> bool:
+        caminhos = (self.caminho_trechos, self.caminho_limites, self.caminho_spans, self.caminho_manifesto)
+        if not all(os.path.exists(c) for c in caminhos) or self.agregados.matriz is None:
+            return False
+
+        with open(self.caminho_manifesto, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        if manifesto.get("geracao_agregados", self.agregados.geracao) != self.agregados.geracao:
+            print("⚠️ Trechos do CV de outro build dos vetores agregados. Será feito novo build.")
+            return False
+        limites = np.load(self.caminho_limites)
+        if len(limites) != len(self.agregados) + 1 or limites[-1] != manifesto["trechos"]:
+            print("⚠️ Trechos e vetores agregados do CV com tamanhos diferentes. Será feito novo build.")
+            return False
+
+        self.trechos = np.memmap(self.caminho_trechos, dtype=np.float32, mode="r",
+                                 shape=(manifesto["trechos"], manifesto["dimensao"])) if manifesto["trechos"] \
+            else np.empty((0, manifesto["dimensao"]), dtype=np.float32)
+        self.limites = limites
+        self.spans = np.load(self.caminho_spans, mmap_mode="r")
+        self.parametros = manifesto["parametros"]
+        return True
+
+    @property
+    def ids(self) -> List[str]:
+        return self.agregados.ids
+
+    @property
+    def matriz(self) -> Optional[np.ndarray]:
+        return self.agregados.matriz
+
+    def trechos_de(self, id_) -> Tuple[np.ndarray, np.ndarray]:
+        """(vetores, spans) dos trechos de um candidato."""
+        pos = self.agregados._posicoes[str(id_)]
+        inicio, fim = self.limites[pos], self.limites[pos + 1]
+        return np.asarray(self.trechos[inicio:fim]), np.asarray(self.spans[inicio:fim])
+
+    def __len__(self) -> int:
+        return len(self.agregados)
+
+    ####################### Build ########################################
+    #
+    def construir(self, lotes, model, max_tokens: int = MAX_TOKENS, sobreposicao: int = SOBREPOSICAO,
+                  batch_size: int = 512) -> dict:
+        """
+        `lotes`: iterável de (ids, textos) — ex.: TextosLongos.iterar().
+        Candidatos com o mesmo cv_pt (e os mesmos parâmetros) do build anterior reaproveitam
+        os vetores; o restante é dividido e codificado. Os trechos são gravados em disco à
+        medida que cada lote termina, então a memória fica limitada ao tamanho do lote.
+        """
+        tokens_trecho = _limite_tokens(model, max_tokens)
+        sobreposicao = min(sobreposicao, tokens_trecho - 1)
+        parametros = {"max_tokens": tokens_trecho, "sobreposicao": sobreposicao}
+        reaproveitar = self.trechos is not None and self.parametros == parametros
+        dimensao = model.get_sentence_embedding_dimension()
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        tmp_trechos = self.caminho_trechos + ".tmp"
+        ids, hashes, agregados, limites, spans = [], [], [], [0], []
+        total_trechos, recodificados, inicio = 0, 0, time.perf_counter()
+
+        with open(tmp_trechos, "wb") as saida:
+            for ids_lote, textos_lote in lotes:
+                ids_lote = [str(i) for i in ids_lote]
+                textos_lote = ["" if t is None or (isinstance(t, float) and np.isnan(t)) else str(t)
+                               for t in textos_lote]
+                hashes_lote = [hash_texto(t) for t in textos_lote]
+
+                pendentes = [j for j, (id_, h) in enumerate(zip(ids_lote, hashes_lote))
+                             if not reaproveitar or id_ not in self.agregados._posicoes
+                             or self.agregados.hashes[self.agregados._posicoes[id_]] != h]
+
+                # divide e codifica todos os trechos pendentes do lote de uma vez
+                novos = {}
+                if pendentes:
+                    spans_tokens = _spans_tokens([textos_lote[j] for j in pendentes], getattr(model, "tokenizer", None))
+                    por_candidato = [dividir_em_trechos(s, tokens_trecho, sobreposicao) for s in spans_tokens]
+                    textos_trechos = [textos_lote[j][a:b] for j, trechos in zip(pendentes, por_candidato)
+                                      for a, b in trechos]
+                    vetores = model.encode(textos_trechos, batch_size=batch_size, convert_to_numpy=True,
+                                           normalize_embeddings=True, show_progress_bar=False) \
+                        if textos_trechos else np.empty((0, dimensao))
+                    vetores = np.asarray(vetores, dtype=np.float32)
+                    desloc = 0
+                    for j, trechos in zip(pendentes, por_candidato):
+                        novos[j] = (vetores[desloc:desloc + len(trechos)], np.asarray(trechos, dtype=np.int32))
+                        desloc += len(trechos)
+                    recodificados += len(pendentes)
+
+                for j, id_ in enumerate(ids_lote):
+                    if j in novos:
+                        vetores_cand, spans_cand = novos[j]
+                    else:
+                        vetores_cand, spans_cand = self.trechos_de(id_)
+                    vetores_cand = np.asarray(vetores_cand, dtype=np.float32)
+                    saida.write(vetores_cand.tobytes())
+                    spans.append(spans_cand.reshape(-1, 2))
+                    total_trechos += len(vetores_cand)
+                    limites.append(total_trechos)
+                    agregados.append(agregar(vetores_cand, dimensao))
+
+                ids.extend(ids_lote)
+                hashes.extend(hashes_lote)
+
+        # o vetor agregado vai para o EmbeddingStore (mmap) e o resto para os arquivos de trechos.
+        # trechos.json sai antes e volta por último, com a geração do store: um build
+        # interrompido no meio fica sem manifesto e não é carregado.
+        self.trechos = self.limites = self.spans = None
+        if os.path.exists(self.caminho_manifesto):
+            os.remove(self.caminho_manifesto)
+        os.replace(tmp_trechos, self.caminho_trechos)
+        np.save(self.caminho_limites, np.asarray(limites, dtype=np.int64))
+        np.save(self.caminho_spans, np.concatenate(spans) if spans else np.empty((0, 2), dtype=np.int32))
+        self.agregados.substituir(ids, hashes, np.vstack(agregados) if agregados
+                                  else np.empty((0, dimensao), dtype=np.float32))
+        tmp_manifesto = self.caminho_manifesto + ".tmp"
+        with open(tmp_manifesto, "w", encoding="utf-8") as f:
+            json.dump({"dimensao": dimensao, "trechos": total_trechos, "parametros": parametros,
+                       "geracao_agregados": self.agregados.geracao}, f)
+        os.replace(tmp_manifesto, self.caminho_manifesto)
+        self.carregar()
+
+        duracao = time.perf_counter() - inicio
+        return {
+            "candidatos": len(ids),
+            "recodificados": recodificados,
+            "trechos": total_trechos,
+            "tempo_s": round(duracao, 2),
+            "candidatos_por_s": round(len(ids) / duracao, 1) if duracao else None,
+        }
+
+
+def agregar(vetores: np.ndarray, dimensao: int) -> np.ndarray:
+    """Max-pooling dos trechos, normalizado. Candidato sem cv_pt fica com vetor nulo (score 0)."""
+    if len(vetores) == 0:
+        return np.zeros(dimensao, dtype=np.float32)
+    pooled = np.asarray(vetores).max(axis=0)
+    return (pooled / (np.linalg.norm(pooled) + 1e-12)).astype(np.float32)
+
+
+def construir_embeddings_cv(textos=None, diretorio: str = DIRETORIO_EMBEDDINGS_CV, max_tokens: int = MAX_TOKENS,
+                            sobreposicao: int = SOBREPOSICAO, tamanho_lote: int = 5000,
+                            batch_size: int = 512) -> dict:
+    """Job offline: (re)gera os embeddings em trechos a partir do TextosLongos das bases carregadas."""
+    if textos is None:
+        from tratarbase import obter_bases, obter_textos_longos
+        obter_bases()  # garante snapshot válido (e o registro dos textos longos)
+        textos = obter_textos_longos()
+
+    def lotes():
+        for ids, df in textos.iterar(tamanho_lote):
+            yield ids, df["cv_pt"].tolist()
+
+    store = TrechosCV(diretorio)
+    return store.construir(lotes(), obter_modelo(MODELO_PADRAO), max_tokens=max_tokens,
+                           sobreposicao=sobreposicao, batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embeddings do cv_pt em trechos, com vetor agregado por candidato.")
+    parser.add_argument("--max-tokens", type=int, default=MAX_TOKENS)
+    parser.add_argument("--sobreposicao", type=int, default=SOBREPOSICAO)
+    parser.add_argument("--lote", type=int, default=5000, help="candidatos lidos por vez do snapshot")
+    parser.add_argument("--batch", type=int, default=512, help="trechos por chamada do encode")
+    parser.add_argument("--diretorio", default=DIRETORIO_EMBEDDINGS_CV)
+    args = parser.parse_args()
+
+    resultado = construir_embeddings_cv(diretorio=args.diretorio, max_tokens=args.max_tokens,
+                                        sobreposicao=args.sobreposicao, tamanho_lote=args.lote,
+                                        batch_size=args.batch)
+    print(f"✅ {resultado['candidatos']} candidatos ({resultado['recodificados']} recodificados), "
+          f"{resultado['trechos']} trechos em {resultado['tempo_s']}s ({resultado['candidatos_por_s']} candidatos/s)")
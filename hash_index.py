@@ -0,0 +1,39 @@
+import pandas as pd
+
+from typing import Dict, List
+
+
+class HashIndex:
+    """
+    Índice chave -> posições de linha (para .iloc) de uma coluna de DataFrame.
+    As chaves são comparadas como string, então a busca custa O(1) + O(resultados).
+    """
+
+    def __init__(self, serie: pd.Series):
+        chaves = serie.astype(str).reset_index(drop=True)
+        grupos = chaves.groupby(chaves.values, sort=False, dropna=False).indices
+        self._posicoes: Dict[str, List[int]] = {chave: pos.tolist() for chave, pos in grupos.items()}
+
+    def get(self, chave) -> List[int]:
+        """Posições das linhas com a chave (lista vazia se não houver). É uma cópia: alterá-la não mexe no índice."""
+        return list(self._posicoes.get(str(chave), ()))
+
+    def adicionar(self, chave, posicao: int) -> None:
+        self._posicoes.setdefault(str(chave), []).append(posicao)
+
+    def mover(self, chave_antiga, chave_nova, posicao: int) -> None:
+        """Atualiza o índice quando o valor da coluna muda na linha `posicao`."""
+        if str(chave_antiga) == str(chave_nova):
+            return
+        posicoes = self._posicoes.get(str(chave_antiga), [])
+        if posicao in posicoes:
+            posicoes.remove(posicao)
+            if not posicoes:
+                del self._posicoes[str(chave_antiga)]
+        self.adicionar(chave_nova, posicao)
+
+    def __contains__(self, chave) -> bool:
+        return str(chave) in self._posicoes
+
+    def __len__(self) -> int:
+        return len(self._posicoes)
@@ -1,17 +1,17 @@
 import os
 import re
 import uuid
+import threading
 import fitz  # PyMuPDF
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pdf_cache import PdfTextCache
 
 ################################## PARA USAR O ARQUIVO TRANSFORMADO DE JSON -> DATAFRAME
 #
 def read_pdf(file_path):
-    text = ''
     with fitz.open(file_path) as pdf:
-        for page in pdf:
-            text += page.get_text()
-    return text
+        return ''.join(page.get_text() for page in pdf)
 
 
 def get_pdf_paths(directory):
@@ -22,6 +22,74 @@ def get_pdf_paths(directory):
     ]
 
 
+_cache_pdf = None
+_lock_cache_pdf = threading.Lock()
+
+def cache_pdf_padrao():
+    """Cache de textos de PDF compartilhado pelo processo."""
+    global _cache_pdf
+    with _lock_cache_pdf:
+        if _cache_pdf is None:
+            _cache_pdf = PdfTextCache()
+    return _cache_pdf
+
+
+def _ler_pdf_seguro(file_path):
+    """Executado nos processos do pool: erros viram texto vazio em vez de derrubar o lote."""
+    try:
+        return file_path, read_pdf(file_path), None
+    except Exception as e:
+        return file_path, '', str(e)
+
+
+def extrair_textos_pdf(caminhos, max_workers=None, cache=None, usar_cache=True):
+    """
+    Extrai o texto de vários PDFs. Retorna {caminho: texto}.
+
+    Só os arquivos novos ou alterados (caminho + mtime + tamanho) são lidos, e em
+    paralelo num ProcessPoolExecutor; os demais vêm do cache em disco.
+    """
+    cache = (cache or cache_pdf_padrao()) if usar_cache else None
+    textos, pendentes, assinaturas = {}, [], {}
+
+    for caminho in dict.fromkeys(caminhos):
+        texto, assinatura = cache.consultar(caminho) if cache is not None else (None, None)
+        if texto is None:
+            pendentes.append(caminho)
+            assinaturas[caminho] = assinatura  # stat de antes da extração
+        else:
+            textos[caminho] = texto
+
+    if not pendentes:
+        return textos
+
+    if len(pendentes) == 1 or max_workers == 1:
+        resultados = map(_ler_pdf_seguro, pendentes)
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(pendentes))
+        chunksize = max(1, len(pendentes) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            resultados = list(pool.map(_ler_pdf_seguro, pendentes, chunksize=chunksize))
+
+    lidos = {}
+    for caminho, texto, erro in resultados:
+        if erro:
+            print(f"⚠️ Erro ao ler PDF {caminho}: {erro}")
+        else:
+            lidos[caminho] = texto
+        textos[caminho] = texto
+
+    if cache is not None and lidos:
+        cache.set_muitos(lidos, assinaturas)
+    print(f"📄 {len(lidos)} PDF(s) extraído(s), {len(textos) - len(pendentes)} do cache.")
+    return textos
+
+
+def extrair_textos_diretorio(directory, **kwargs):
+    """extrair_textos_pdf sobre todos os PDFs de `directory` (ex.: ./curriculum)."""
+    return extrair_textos_pdf(get_pdf_paths(directory), **kwargs)
+
+
 def filtrar_candidatos_validos(df, colunas_obrigatorias):
     df_copy = df.copy()
     for col in colunas_obrigatorias:
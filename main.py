@@ -1,5 +1,6 @@
 import streamlit as st
 import os
+import json
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -7,6 +8,8 @@ import plotly.graph_objects as go
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from database import AnalyseDatabase
 from ai import GroqClient
+from model_registry import aquecer, metricas_modelos, MODELO_PADRAO
+import tracing
 #from tratarbase import applicants
 from scipy.stats import gaussian_kde
 from fpdf import FPDF
@@ -24,8 +27,13 @@ def validar_data(data_str, data_padrao="2000-01-01"):
 # Configuração da página
 st.set_page_config(layout='wide', page_title='Análise de Currículo')
 
-# Inicializa conexões
-database = AnalyseDatabase()
+# Inicializa conexões uma vez por processo (compartilhadas entre sessões e reruns)
+@st.cache_resource(show_spinner="Carregando modelo e bases...")
+def carregar_database():
+    aquecer(MODELO_PADRAO)
+    return AnalyseDatabase()
+
+database = carregar_database()
 ai = GroqClient()
 
 # Menu lateral
@@ -35,6 +43,33 @@ acao = st.sidebar.selectbox(
     ["Análise de Currículo", "Inserir/Atualizar Applicants"] # "IA Groq / Análise dos Escolhidos",
 )
 
+with st.sidebar.expander("Modelos carregados"):
+    st.dataframe(pd.DataFrame(metricas_modelos()), use_container_width=True)
+
+# Diagnóstico: tempo de parede, CPU e memória de cada etapa do último ranking
+def mostrar_diagnostico(painel):
+    with painel.container():
+        st.markdown("**Etapas do último ranking**")
+        etapas = st.session_state.get("etapas_ranking")
+        if not etapas:
+            st.caption("Rode uma análise para ver as etapas.")
+            return
+        st.dataframe(pd.DataFrame(etapas).drop(columns=["inicio"], errors="ignore"), use_container_width=True)
+        st.download_button(
+            "Exportar (JSON Lines)",
+            "\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in etapas),
+            file_name="etapas_ranking.jsonl",
+            key=f"exportar_etapas_{len(etapas)}_{etapas[-1]['inicio']}",
+        )
+
+painel_diagnostico = None
+if st.sidebar.checkbox("Diagnóstico de desempenho", value=False):
+    # tracemalloc é global ao processo: liga-se na subida do app (TRACING_MEMORIA=1), não por sessão
+    st.sidebar.caption("Memória: " + ("medida (tracemalloc)" if tracing.memoria_ativa()
+                                      else "desligada, suba o app com TRACING_MEMORIA=1"))
+    painel_diagnostico = st.sidebar.empty()
+    mostrar_diagnostico(painel_diagnostico)
+
 # --- Seção: Análise de Currículo ---
 if acao == "Análise de Currículo":
     st.title("🔎 Análise de Currículos")
@@ -103,70 +138,88 @@ if acao == "Análise de Currículo":
 
             # 🔎 Análise com IA local via embeddings
             if st.button("🔍 Identificar e Avaliar Candidatos com IA"):
-                with st.spinner("Analisando candidatos..."):
-
-                    campos_essenciais = ["cargo_atual", "objetivo_profissional", "titulo_profissional", "area_atuacao"]
-
-                    def campo_valido(x):
-                        return bool(str(x).strip()) and str(x).strip().lower() not in ['nan', 'sem informação']
+                with st.spinner("Analisando candidatos..."), tracing.coletar() as etapas_ranking:
+                    st.session_state.etapas_ranking = etapas_ranking  # preenchida conforme as etapas terminam
 
                     titulo_vaga = vaga_selecionada.get("titulo_vaga", "")
                     if not titulo_vaga:
                         st.warning("Título da vaga não encontrado.")
                         st.stop()
 
-                    candidatos_ia = database.get_candidatos_compativeis_por_titulo(titulo_vaga)
-                    if candidatos_ia is None or candidatos_ia.empty:
-                        st.warning("Nenhum candidato compatível com o título da vaga.")
-                        st.stop()
-
-                    df_ia = candidatos_ia
-                    for campo in campos_essenciais:
-                        if campo not in df_ia.columns:
-                            df_ia[campo] = ""
-
-                    df_filtrado = df_ia[df_ia[campos_essenciais].applymap(campo_valido).all(axis=1)]
-                    if df_filtrado.empty:
-                        st.warning("Nenhum candidato com dados completos para análise.")
-                        st.stop()
-
-                    df_avaliado = df_filtrado.copy()
-                    df_avaliado["Score"] = (df_avaliado["score_similaridade"].fillna(0) * 10).round(2)
-                    df_avaliado.drop(columns=["score_similaridade"], inplace=True, errors='ignore')
-                    df_avaliado["tipo"] = "applicant"
-                    st.session_state.df_filtrado = df_avaliado.copy()
-
-                    if (df_avaliado["Score"] <= 4).all():
+                    # Ranking pré-calculado pelo job em lote (ranking_vagas.py); se não houver
+                    # ou estiver desatualizado, ranqueia ao vivo como antes
+                    with tracing.etapa("ranking_precalculado"):
+                        precalculado = database.get_ranking_precalculado(codigo_vaga, k=20)
+
+                    if precalculado is not None:
+                        df_top20, resumo = precalculado
+                        total_analisados = resumo["analisados"]
+                        score_mean, score_max = resumo["media"], resumo["maximo"]
+                        score_min, score_stdev = resumo["minimo"], resumo["desvio"]
+                        score_dist = pd.Series(resumo["faixas"])
+                    else:
+                        # Completude dos campos essenciais já vem calculada da carga: incompletos
+                        # nem chegam a ser pontuados. Scores dos elegíveis ficam num vetor e só
+                        # os 20 melhores viram DataFrame
+                        with tracing.etapa("mascara_cadastro_completo"):
+                            mascara = database.mascara_cadastro_completo()
+                        if not mascara.any():
+                            st.warning("Nenhum candidato com dados completos para análise.")
+                            st.stop()
+
+                        with tracing.etapa("ranquear_por_titulo"):
+                            df_top20, scores = database.ranquear_por_titulo(titulo_vaga, k=20, mascara=mascara)
+                        if len(scores) == 0:
+                            st.warning("Nenhum candidato compatível com o título da vaga.")
+                            st.stop()
+
+                        with tracing.etapa("notas", linhas=len(scores)):
+                            notas = pd.Series(np.round(np.nan_to_num(scores.astype(float)) * 10, 2))
+
+                        with tracing.etapa("estatisticas_scores"):
+                            total_analisados = len(notas)
+                            score_mean = notas.mean()
+                            score_max = notas.max()
+                            score_min = notas.min()
+                            score_stdev = notas.std()
+
+                        with tracing.etapa("distribuicao_scores"):
+                            score_bins = pd.cut(notas, bins=[0, 2, 4, 6, 8, 10], include_lowest=True)
+                            score_dist = score_bins.value_counts().sort_index()
+                            score_dist.index = score_dist.index.astype(str)
+
+                    # Nos dois caminhos a sessão guarda os mesmos top 20 (id, Score): o ranking
+                    # pré-calculado não tem a nota de cada elegível, só o resumo acima
+                    st.session_state.df_filtrado = pd.DataFrame({
+                        "id": df_top20["id"].to_numpy(),
+                        "Score": np.round(np.nan_to_num(df_top20["score_similaridade"].to_numpy(dtype=float)) * 10, 2),
+                        "tipo": "applicant",
+                    })
+
+                    if score_max <= 4:
                         st.warning("⚠️ Todos os candidatos avaliados apresentaram score abaixo ou igual a 4.")
                         st.info("📭 Nenhum candidato com compatibilidade suficiente para a vaga. Ajuste a vaga ou amplie os critérios.")
                         st.stop()
 
-                    score_mean = df_avaliado["Score"].mean()
-                    score_max = df_avaliado["Score"].max()
-                    score_min = df_avaliado["Score"].min()
-                    score_stdev = df_avaliado['Score'].std()
-
                     col1, col2, col3, col4 = st.columns(4)
                     col1.metric("📈 Score Médio", f"{score_mean:.2f}")
                     col2.metric("🔝 Máximo", f"{score_max:.2f}")
                     col3.metric("🔻 Mínimo", f"{score_min:.2f}")
                     col4.metric("🔻 Desvio Padrão", f"{score_stdev:.2f}")
 
-                    score_bins = pd.cut(df_avaliado["Score"], bins=[0, 2, 4, 6, 8, 10], include_lowest=True)
-                    score_dist = score_bins.value_counts().sort_index()
-                    score_dist.index = score_dist.index.astype(str)
                     score_dist_df = score_dist.reset_index()
                     score_dist_df.columns = ['Faixa', 'Quantidade']
 
                     st.write("📊 Distribuição dos scores:")
                     st.bar_chart(score_dist_df.set_index('Faixa'))
 
-                    st.info(f"🔎 Total de candidatos analisados: {len(df_avaliado)}")
+                    st.info(f"🔎 Total de candidatos analisados: {total_analisados}")
                     st.success("✅ Candidatos avaliados com sucesso.")
 
-                    # Top 20 com Score mais alto
-                    df_top20 = df_avaliado.sort_values("Score", ascending=False).head(20).copy()
-                    df_top20["Score"] = df_top20["Score"].round(2)
+                    # Top 20 com Score mais alto (já selecionados por argpartition)
+                    df_top20["Score"] = (df_top20["score_similaridade"].fillna(0) * 10).round(2)
+                    df_top20.drop(columns=["score_similaridade"], inplace=True, errors='ignore')
+                    df_top20["tipo"] = "applicant"
                     st.session_state.df_top20 = df_top20
 
                     st.plotly_chart(
@@ -188,6 +241,9 @@ if acao == "Análise de Currículo":
                         use_container_width=True
                     )
 
+                    if painel_diagnostico is not None:
+                        mostrar_diagnostico(painel_diagnostico)
+
 #################################### Formulário                     
 #
 elif acao == "Inserir/Atualizar Applicants":
@@ -311,6 +367,13 @@ elif acao == "Inserir/Atualizar Applicants":
             else:
                 database.atualizar_applicant(dados)
                 st.success(f'✅ Dados do candidato {id_final} atualizados com sucesso!')
+
+            # Vagas em que o candidato salvo mais se encaixa (índice das vagas, atualizado no save)
+            if id_final:
+                st.subheader("🎯 Vagas mais compatíveis com o candidato")
+                df_vagas_candidato = database.get_vagas_compativeis(id_final, k=10)
+                df_vagas_candidato["Score"] = (df_vagas_candidato["score_similaridade"] * 10).round(2)
+                st.dataframe(df_vagas_candidato[["codigo_vaga", "titulo_vaga", "Score"]], use_container_width=True)
                 
         #if st.button("💾 Salvar Candidato"):
         #    if modo_cadastro == "Cadastrar novo candidato":
@@ -0,0 +1,65 @@
+import time
+import threading
+
+from typing import Dict
+
+MODELO_PADRAO = "all-MiniLM-L6-v2"
+
+# Registro do processo: cada modelo é carregado uma única vez e compartilhado
+# entre sessões do Streamlit e threads.
+_modelos: Dict[str, "SentenceTransformer"] = {}
+_metricas: Dict[str, dict] = {}
+_locks: Dict[str, threading.Lock] = {}
+_lock_registro = threading.Lock()
+
+
+def _memoria_modelo(model) -> int:
+    """Bytes ocupados pelos parâmetros e buffers do modelo."""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return int(total)
+    except Exception:
+        return 0
+
+
+def obter_modelo(nome: str = MODELO_PADRAO) -> "SentenceTransformer":
+    """Retorna o modelo já carregado ou carrega (uma vez só, mesmo com chamadas concorrentes)."""
+    model = _modelos.get(nome)
+    if model is not None:
+        return model
+
+    with _lock_registro:
+        lock = _locks.setdefault(nome, threading.Lock())
+
+    with lock:
+        model = _modelos.get(nome)
+        if model is None:
+            # import adiado: sentence_transformers/torch só são importados quando um modelo é pedido
+            from sentence_transformers import SentenceTransformer
+
+            inicio = time.perf_counter()
+            model = SentenceTransformer(nome)
+            _metricas[nome] = {
+                "modelo": nome,
+                "tempo_carga_s": round(time.perf_counter() - inicio, 3),
+                "memoria_mb": round(_memoria_modelo(model) / 1024 ** 2, 1),
+                "tempo_aquecimento_s": None,
+            }
+            _modelos[nome] = model
+            print(f"✅ Modelo '{nome}' carregado em {_metricas[nome]['tempo_carga_s']:.2f}s")
+    return model
+
+
+def aquecer(*nomes: str) -> None:
+    """Carrega os modelos e roda um encode curto para a primeira consulta não pagar a inicialização."""
+    for nome in nomes or (MODELO_PADRAO,):
+        model = obter_modelo(nome)
+        inicio = time.perf_counter()
+        model.encode(["aquecimento"], convert_to_numpy=True, show_progress_bar=False)
+        _metricas[nome]["tempo_aquecimento_s"] = round(time.perf_counter() - inicio, 3)
+
+
+def metricas_modelos() -> list:
+    """Tempo de carga, tempo de aquecimento e memória de cada modelo carregado."""
+    return [dict(m) for m in _metricas.values()]
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+
+from typing import Optional, Tuple
+
+CAMINHO_CACHE = os.path.join("cache", "pdf_textos.sqlite")
+
+
+class PdfTextCache:
+    """
+    Cache persistente (SQLite) do texto extraído dos PDFs.
+
+    A entrada vale enquanto o arquivo tiver o mesmo caminho, mtime e tamanho;
+    qualquer alteração no PDF faz a próxima leitura extrair o texto de novo.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_CACHE):
+        self.caminho = caminho
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS textos (
+                caminho  TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                tamanho  INTEGER NOT NULL,
+                texto    TEXT NOT NULL
+            )
+        """)
+        self._conexao.commit()
+
+    @staticmethod
+    def assinatura(caminho_pdf: str):
+        """(caminho absoluto, mtime em ns, tamanho em bytes) do arquivo."""
+        info = os.stat(caminho_pdf)
+        return os.path.abspath(caminho_pdf), info.st_mtime_ns, info.st_size
+
+    def consultar(self, caminho_pdf: str) -> Tuple[Optional[str], Optional[tuple]]:
+        """
+        (texto, assinatura) do PDF; texto é None quando não está no cache. A assinatura
+        lida aqui, antes da extração, é a que deve ir para set_muitos: se o arquivo mudar
+        durante a leitura, a entrada gravada já nasce desatualizada e é refeita.
+        """
+        try:
+            assinatura = self.assinatura(caminho_pdf)
+        except OSError:
+            return None, None
+
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT texto FROM textos WHERE caminho = ? AND mtime_ns = ? AND tamanho = ?",
+                assinatura,
+            ).fetchone()
+
+        if linha is None:
+            self.misses += 1
+            return None, assinatura
+        self.hits += 1
+        return linha[0], assinatura
+
+    def get(self, caminho_pdf: str) -> Optional[str]:
+        return self.consultar(caminho_pdf)[0]
+
+    def set_muitos(self, textos: dict, assinaturas: Optional[dict] = None) -> None:
+        """
+        Grava {caminho: texto} numa única transação. `assinaturas` ({caminho: assinatura}
+        de consultar) evita um novo stat depois da extração; sem ela, o arquivo é lido agora.
+        """
+        linhas = []
+        for caminho_pdf, texto in textos.items():
+            if assinaturas is not None:
+                assinatura = assinaturas.get(caminho_pdf)
+            else:
+                try:
+                    assinatura = self.assinatura(caminho_pdf)
+                except OSError:
+                    assinatura = None
+            if assinatura is None:
+                continue
+            linhas.append((*assinatura, texto))
+        with self._lock:
+            self._conexao.executemany(
+                "INSERT OR REPLACE INTO textos (caminho, mtime_ns, tamanho, texto) VALUES (?, ?, ?, ?)",
+                linhas,
+            )
+            self._conexao.commit()
+
+    def set(self, caminho_pdf: str, texto: str) -> None:
+        self.set_muitos({caminho_pdf: texto})
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            entradas = self._conexao.execute("SELECT COUNT(*) FROM textos").fetchone()[0]
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": self.hits / consultas if consultas else 0.0,
+            "entradas": entradas,
+        }
@@ -0,0 +1,287 @@
+"""
+Ranking pré-calculado de todas as vagas contra todos os applicants.
+
+Job em lote: codifica cada titulo_vaga distinto do perfil_vagas_tratada uma vez só e
+multiplica os títulos pela matriz de embeddings dos candidatos elegíveis (cadastro
+completo) em blocos, com memória limitada a bloco_vagas x bloco_applicants scores.
+Para cada vaga guarda os top-N candidatos e as estatísticas que a tela de análise
+mostra (média, máximo, mínimo, desvio e distribuição das notas de todos os elegíveis).
+
+Arquivos gravados em `diretorio`:
+    rankings.parquet      -> codigo_vaga, posicao, id, score (top-N de cada vaga)
+    estatisticas.parquet  -> uma linha por vaga com o resumo das notas
+    manifesto.json        -> assinatura da base usada, modelo, top-N e desempenho do job
+
+Os embeddings do job ficam num store próprio (DIRETORIO_EMBEDDINGS_JOB): o salvar de um
+store apaga a geração anterior, e o do app pode estar aberto (mmap) pelo Streamlit.
+Na primeira execução o store do job parte de uma cópia do build do app.
+
+    python ranking_vagas.py [--top 100] [--bloco-vagas 256] [--bloco-applicants 50000] [--workers 8]
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from model_registry import MODELO_PADRAO
+
+DIRETORIO_RANKINGS = os.path.join("cache", "rankings")
+DIRETORIO_EMBEDDINGS_JOB = os.path.join("cache", "embeddings_ranking")
+FAIXAS_NOTA = [0, 2, 4, 6, 8, 10]  # mesmas faixas da distribuição mostrada no main.py
+
+
+def assinatura_base(ids, textos, mascara=None) -> str:
+    """Identifica a base ranqueada (ids, texto_cv e elegíveis); muda com qualquer insert ou update."""
+    sha = hashlib.sha1(MODELO_PADRAO.encode("utf-8"))
+    for id_, texto in zip(ids, textos):
+        sha.update(f"{id_}\x00{texto}\x01".encode("utf-8"))
+    if mascara is not None:
+        sha.update(np.packbits(np.asarray(mascara, dtype=bool)).tobytes())
+    return sha.hexdigest()
+
+
+####################### Job em lote ##################################
+#
+def copiar_build(origem: str, destino: str) -> bool:
+    """
+    Copia o build atual de um EmbeddingStore (manifesto, matriz e log da geração) para
+    `destino`, se ele ainda não tiver um. Só lê `origem`. False se não houver o que copiar
+    ou se o build mudou durante a cópia (o job então recodifica o que faltar).
+    """
+    caminho_manifesto = os.path.join(origem, "manifesto.json")
+    if os.path.exists(os.path.join(destino, "manifesto.json")) or not os.path.exists(caminho_manifesto):
+        return False
+    try:
+        with open(caminho_manifesto, "r", encoding="utf-8") as f:
+            manifesto = json.load(f)
+        geracao = manifesto.get("geracao")
+        nomes = [f"embeddings-{geracao}.npy", f"alteracoes-{geracao}.jsonl"] if geracao is not None else ["embeddings.npy"]
+        os.makedirs(destino, exist_ok=True)
+        for nome in nomes:
+            if os.path.exists(os.path.join(origem, nome)):
+                shutil.copyfile(os.path.join(origem, nome), os.path.join(destino, nome))
+        # manifesto por último, do conteúdo lido antes das cópias
+        with open(os.path.join(destino, "manifesto.json"), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f)
+        return True
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Não foi possível copiar os embeddings de '{origem}' ({e}). Recodificando.")
+        shutil.rmtree(destino, ignore_errors=True)
+        return False
+
+
+def ranquear_em_blocos(consultas: np.ndarray, matriz, posicoes: Optional[np.ndarray] = None, top_n: int = 100,
+                       bloco_vagas: int = 256, bloco_applicants: int = 50000, max_workers: Optional[int] = None):
+    """
+    Top-N de `matriz[posicoes]` para cada linha de `consultas` (vetores normalizados).
+
+    O laço externo lê um bloco de applicants por vez (a matriz pode ser mmap); os blocos
+    de consultas são distribuídos entre threads (o produto de matrizes e o argpartition
+    do NumPy liberam o GIL), cada uma atualizando só as suas linhas dos resultados.
+
+    Retorna (posições top-N, scores top-N, estatísticas das notas de cada consulta).
+    """
+    consultas = np.ascontiguousarray(consultas, dtype=np.float32)
+    posicoes = np.arange(matriz.shape[0]) if posicoes is None else np.asarray(posicoes, dtype=np.int64)
+    n_consultas, n = len(consultas), len(posicoes)
+    top_n = min(top_n, n)
+
+    top_scores = np.full((n_consultas, top_n), -np.inf, dtype=np.float32)
+    top_posicoes = np.full((n_consultas, top_n), -1, dtype=np.int64)
+    soma = np.zeros(n_consultas)
+    soma_quadrados = np.zeros(n_consultas)
+    minimo = np.full(n_consultas, np.inf)
+    maximo = np.full(n_consultas, -np.inf)
+    faixas = np.zeros((n_consultas, len(FAIXAS_NOTA)), dtype=np.int64)  # última coluna: fora de [0, 10]
+
+    def processar(a, z, bloco, posicoes_bloco):
+        scores = consultas[a:z] @ bloco.T
+        notas = np.round(scores.astype(np.float64) * 10, 2)
+        soma[a:z] += notas.sum(axis=1)
+        soma_quadrados[a:z] += np.square(notas).sum(axis=1)
+        np.minimum(minimo[a:z], notas.min(axis=1), out=minimo[a:z])
+        np.maximum(maximo[a:z], notas.max(axis=1), out=maximo[a:z])
+
+        # faixas fechadas à direita, com 0 incluído na primeira (pd.cut com include_lowest)
+        faixa = np.clip(np.searchsorted(FAIXAS_NOTA, notas, side="left") - 1, 0, None)
+        faixa[(notas < 0) | (notas > 10)] = len(FAIXAS_NOTA) - 1
+        linhas = np.arange(z - a)[:, None] * len(FAIXAS_NOTA)
+        faixas[a:z] += np.bincount((linhas + faixa).ravel(), minlength=(z - a) * len(FAIXAS_NOTA)) \
+            .reshape(z - a, len(FAIXAS_NOTA))
+
+        # top-N do bloco e fusão com o top-N acumulado
+        if scores.shape[1] > top_n:
+            melhores = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+            scores = np.take_along_axis(scores, melhores, axis=1)
+            candidatos = posicoes_bloco[melhores]
+        else:
+            candidatos = np.broadcast_to(posicoes_bloco, scores.shape)
+        juntos_scores = np.concatenate([top_scores[a:z], scores], axis=1)
+        juntos_posicoes = np.concatenate([top_posicoes[a:z], candidatos], axis=1)
+        melhores = np.argpartition(-juntos_scores, top_n - 1, axis=1)[:, :top_n]
+        top_scores[a:z] = np.take_along_axis(juntos_scores, melhores, axis=1)
+        top_posicoes[a:z] = np.take_along_axis(juntos_posicoes, melhores, axis=1)
+
+    faixas_consultas = [(a, min(a + bloco_vagas, n_consultas)) for a in range(0, n_consultas, bloco_vagas)]
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        for inicio in range(0, n, bloco_applicants):
+            posicoes_bloco = posicoes[inicio:inicio + bloco_applicants]
+            bloco = np.ascontiguousarray(matriz[posicoes_bloco], dtype=np.float32)
+            list(executor.map(lambda faixa: processar(*faixa, bloco, posicoes_bloco), faixas_consultas))
+
+    ordem = np.argsort(-top_scores, axis=1, kind="stable")
+    media = soma / n if n else soma
+    estatisticas = {
+        "analisados": np.full(n_consultas, n),
+        "media": media,
+        "maximo": maximo,
+        "minimo": minimo,
+        "desvio": np.sqrt(np.maximum(soma_quadrados - n * media ** 2, 0) / max(n - 1, 1)),  # ddof=1, como pd.Series.std
+        "faixas": faixas[:, :-1],
+    }
+    return np.take_along_axis(top_posicoes, ordem, axis=1), np.take_along_axis(top_scores, ordem, axis=1), estatisticas
+
+
+def executar_job(applicants: pd.DataFrame, vagas: pd.DataFrame, matriz, model, mascara=None, top_n: int = 100,
+                 bloco_vagas: int = 256, bloco_applicants: int = 50000, max_workers: Optional[int] = None,
+                 diretorio: str = DIRETORIO_RANKINGS) -> dict:
+    """
+    Ranqueia todas as vagas e grava a tabela de resultados. `matriz` deve estar alinhada
+    com `applicants` (linha i = applicants.iloc[i]); `mascara` marca os elegíveis.
+    """
+    inicio = time.perf_counter()
+    titulos = vagas["titulo_vaga"].fillna("").astype(str)
+    unicos, titulo_de = np.unique(titulos.to_numpy(), return_inverse=True)  # títulos repetidos: um encode só
+    consultas = model.encode(list(unicos), batch_size=256, convert_to_numpy=True, normalize_embeddings=True,
+                             show_progress_bar=False)
+    tempo_encode = time.perf_counter() - inicio
+
+    posicoes = None if mascara is None else np.flatnonzero(np.asarray(mascara, dtype=bool))
+    top_posicoes, top_scores, est = ranquear_em_blocos(consultas, matriz, posicoes, top_n=top_n,
+                                                       bloco_vagas=bloco_vagas, bloco_applicants=bloco_applicants,
+                                                       max_workers=max_workers)
+    tempo_total = time.perf_counter() - inicio
+
+    # expande de títulos distintos para vagas
+    codigos = vagas["codigo_vaga"].astype(str).to_numpy()
+    top_n = top_posicoes.shape[1]
+    ids = applicants["id"].astype(str).to_numpy()
+    rankings = pd.DataFrame({
+        "codigo_vaga": np.repeat(codigos, top_n),
+        "posicao": np.tile(np.arange(1, top_n + 1, dtype=np.int32), len(codigos)),
+        "id": ids[top_posicoes[titulo_de].ravel()] if top_n else np.empty(0, dtype=object),
+        "score": top_scores[titulo_de].ravel(),
+    })
+    estatisticas = pd.DataFrame({
+        "codigo_vaga": codigos,
+        **{nome: valores[titulo_de] for nome, valores in est.items() if nome != "faixas"},
+        **{f"faixa_{a}_{b}": est["faixas"][titulo_de, i] for i, (a, b) in enumerate(zip(FAIXAS_NOTA, FAIXAS_NOTA[1:]))},
+    })
+
+    manifesto = {
+        "modelo": MODELO_PADRAO,
+        "assinatura": assinatura_base(applicants["id"].astype(str), applicants["texto_cv"], mascara),
+        "top_n": int(top_n),
+        "vagas": len(codigos),
+        "titulos_distintos": len(unicos),
+        "applicants_elegiveis": int(est["analisados"][0]) if len(unicos) else 0,
+        "tempo_encode_s": round(tempo_encode, 3),
+        "tempo_total_s": round(tempo_total, 3),
+        "vagas_por_s": round(len(codigos) / tempo_total, 1) if tempo_total else None,
+        "workers": max_workers or os.cpu_count(),
+    }
+
+    os.makedirs(diretorio, exist_ok=True)
+    for nome, df in (("rankings", rankings), ("estatisticas", estatisticas)):
+        tmp = os.path.join(diretorio, f"{nome}.parquet.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(diretorio, f"{nome}.parquet"))
+    # manifesto por último: tabela incompleta nunca é considerada válida
+    with open(os.path.join(diretorio, "manifesto.json"), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2)
+    return manifesto
+
+
+####################### Consulta #####################################
+#
+class RankingsPrecalculados:
+    """Tabela gerada pelo job, indexada por codigo_vaga para a tela de análise."""
+
+    def __init__(self, diretorio: str = DIRETORIO_RANKINGS):
+        self.diretorio = diretorio
+        self.manifesto = None
+        self.rankings = None
+        self.estatisticas = None
+
+        caminho_manifesto = os.path.join(diretorio, "manifesto.json")
+        if os.path.exists(caminho_manifesto):
+            with open(caminho_manifesto, "r", encoding="utf-8") as f:
+                self.manifesto = json.load(f)
+            self.rankings = pd.read_parquet(os.path.join(diretorio, "rankings.parquet")).set_index("codigo_vaga")
+            self.estatisticas = pd.read_parquet(os.path.join(diretorio, "estatisticas.parquet")).set_index("codigo_vaga")
+
+    def disponivel(self, assinatura: str) -> bool:
+        return self.manifesto is not None and self.manifesto.get("assinatura") == assinatura
+
+    def top(self, codigo_vaga: str) -> pd.DataFrame:
+        """(posicao, id, score) da vaga, já em ordem; vazio se a vaga não estava na base do job."""
+        if self.rankings is None or codigo_vaga not in self.rankings.index:
+            return pd.DataFrame(columns=["posicao", "id", "score"])
+        return self.rankings.loc[[codigo_vaga]].reset_index(drop=True)
+
+    def resumo(self, codigo_vaga: str) -> Optional[dict]:
+        if self.estatisticas is None or codigo_vaga not in self.estatisticas.index:
+            return None
+        linha = self.estatisticas.loc[codigo_vaga]
+        # mesmos rótulos do pd.cut usado no ranking ao vivo
+        rotulos = pd.cut(pd.Series([], dtype=float), bins=FAIXAS_NOTA, include_lowest=True).cat.categories.astype(str)
+        faixas = {rotulo: int(linha[f"faixa_{a}_{b}"])
+                  for rotulo, a, b in zip(rotulos, FAIXAS_NOTA, FAIXAS_NOTA[1:])}
+        return {
+            "analisados": int(linha["analisados"]),
+            "media": float(linha["media"]),
+            "maximo": float(linha["maximo"]),
+            "minimo": float(linha["minimo"]),
+            "desvio": float(linha["desvio"]),
+            "faixas": faixas,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking pré-calculado de todas as vagas x todos os applicants.")
+    parser.add_argument("--top", type=int, default=100, help="candidatos guardados por vaga")
+    parser.add_argument("--bloco-vagas", type=int, default=256)
+    parser.add_argument("--bloco-applicants", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=None, help="threads (padrão: todos os núcleos)")
+    parser.add_argument("--diretorio", default=DIRETORIO_RANKINGS)
+    parser.add_argument("--embeddings", default=DIRETORIO_EMBEDDINGS_JOB, help="store de embeddings do job")
+    args = parser.parse_args()
+
+    from tratarbase import obter_bases, marcar_cadastro_completo
+    from embedding_store import EmbeddingStore, DIRETORIO_EMBEDDINGS
+    from model_registry import obter_modelo
+
+    applicants, _, vagas = obter_bases()
+    model = obter_modelo(MODELO_PADRAO)
+    # mesmos vetores e mesma elegibilidade da tela de análise (AnalyseDatabase.ranquear_por_titulo),
+    # num store separado do que o app usa
+    if os.path.abspath(args.embeddings) != os.path.abspath(DIRETORIO_EMBEDDINGS):
+        copiar_build(DIRETORIO_EMBEDDINGS, args.embeddings)
+    store = EmbeddingStore(args.embeddings, nome_modelo=MODELO_PADRAO)
+    store.sincronizar(applicants["id"].tolist(), applicants["texto_cv"].tolist(), model)
+    mascara = applicants["cadastro_completo"].to_numpy(dtype=bool) if "cadastro_completo" in applicants.columns \
+        else marcar_cadastro_completo(applicants).to_numpy(dtype=bool)
+
+    resultado = executar_job(applicants, vagas, store.matriz, model, mascara=mascara, top_n=args.top,
+                             bloco_vagas=args.bloco_vagas, bloco_applicants=args.bloco_applicants,
+                             max_workers=args.workers, diretorio=args.diretorio)
+    print(f"✅ {resultado['vagas']} vagas ({resultado['titulos_distintos']} títulos distintos) x "
+          f"{resultado['applicants_elegiveis']} applicants em {resultado['tempo_total_s']}s "
+          f"({resultado['vagas_por_s']} vagas/s, {resultado['workers']} threads)")
@@ -0,0 +1,70 @@
+import time
+import random
+import asyncio
+
+from typing import Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) para código assíncrono.
+
+    `capacidade` fichas no máximo, repostas continuamente a `por_minuto` fichas/minuto.
+    Cada chamada a adquirir(n) espera até haver n fichas disponíveis.
+    """
+
+    def __init__(self, por_minuto: float, capacidade: Optional[float] = None):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = capacidade if capacidade is not None else por_minuto
+        self.fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _repor(self) -> None:
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    async def adquirir(self, n: float = 1) -> None:
+        n = min(n, self.capacidade)  # pedido maior que o balde nunca seria atendido
+        async with self._lock:
+            while True:
+                self._repor()
+                if self.fichas >= n:
+                    self.fichas -= n
+                    return
+                await asyncio.sleep((n - self.fichas) / self.taxa)
+
+
+async def com_retentativas(funcao: Callable[[], Awaitable[T]], max_tentativas: int = 4,
+                           espera_inicial: float = 1.0, espera_maxima: float = 30.0,
+                           descricao: str = "chamada") -> T:
+    """Executa `funcao` com retentativas e backoff exponencial com jitter."""
+    for tentativa in range(1, max_tentativas + 1):
+        try:
+            return await funcao()
+        except Exception as e:
+            if tentativa == max_tentativas:
+                raise
+            espera = min(espera_maxima, espera_inicial * 2 ** (tentativa - 1))
+            espera *= random.uniform(0.5, 1.5)
+            print(f"⚠️ {descricao} falhou ({e}). Tentativa {tentativa}/{max_tentativas}, nova em {espera:.1f}s.")
+            await asyncio.sleep(espera)
+
+
+def com_retentativas_sync(funcao: Callable[[], T], max_tentativas: int = 4,
+                          espera_inicial: float = 1.0, espera_maxima: float = 30.0,
+                          descricao: str = "chamada") -> T:
+    """Versão síncrona de com_retentativas (para uso em threads)."""
+    for tentativa in range(1, max_tentativas + 1):
+        try:
+            return funcao()
+        except Exception as e:
+            if tentativa == max_tentativas:
+                raise
+            espera = min(espera_maxima, espera_inicial * 2 ** (tentativa - 1))
+            espera *= random.uniform(0.5, 1.5)
+            print(f"⚠️ {descricao} falhou ({e}). Tentativa {tentativa}/{max_tentativas}, nova em {espera:.1f}s.")
+            time.sleep(espera)
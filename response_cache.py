@@ -0,0 +1,126 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+from typing import Optional
+
+CAMINHO_CACHE = os.path.join("cache", "groq_respostas.sqlite")
+
+
+class ResponseCache:
+    """
+    Cache persistente (SQLite) de respostas do LLM, endereçado pelo conteúdo:
+    chave = sha256(model_id + prompt).
+
+    - `max_bytes`: tamanho máximo somado das respostas; ao passar, as menos usadas
+      recentemente são removidas (LRU);
+    - `ttl_segundos`: respostas mais antigas que isso são descartadas (None = sem expiração).
+    """
+
+    def __init__(self, caminho: str = CAMINHO_CACHE, max_bytes: int = 200 * 1024 ** 2,
+                 ttl_segundos: Optional[float] = 30 * 24 * 3600):
+        self.caminho = caminho
+        self.max_bytes = max_bytes
+        self.ttl_segundos = ttl_segundos
+        self.hits = 0
+        self.misses = 0
+        self.removidos = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._conexao.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave    TEXT PRIMARY KEY,
+                modelo   TEXT NOT NULL,
+                resposta TEXT NOT NULL,
+                tamanho  INTEGER NOT NULL,
+                criado   REAL NOT NULL,
+                acessado REAL NOT NULL
+            )
+        """)
+        self._conexao.execute("CREATE INDEX IF NOT EXISTS idx_acessado ON respostas (acessado)")
+        self._conexao.commit()
+
+    @staticmethod
+    def chave(model_id: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model_id}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, model_id: str, prompt: str) -> Optional[str]:
+        chave = self.chave(model_id, prompt)
+        agora = time.time()
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT resposta, criado FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+
+            if linha is not None and self.ttl_segundos is not None and agora - linha[1] > self.ttl_segundos:
+                self._conexao.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+                self._conexao.commit()
+                self.removidos += 1
+                linha = None
+
+            if linha is None:
+                self.misses += 1
+                return None
+
+            self._conexao.execute("UPDATE respostas SET acessado = ? WHERE chave = ?", (agora, chave))
+            self._conexao.commit()
+            self.hits += 1
+            return linha[0]
+
+    def set(self, model_id: str, prompt: str, resposta: str) -> None:
+        agora = time.time()
+        tamanho = len(resposta.encode("utf-8"))
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO respostas (chave, modelo, resposta, tamanho, criado, acessado) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.chave(model_id, prompt), model_id, resposta, tamanho, agora, agora),
+            )
+            self._remover_excedente()
+            self._conexao.commit()
+
+    def _remover_excedente(self) -> None:
+        """Remove expirados e, se ainda passar de max_bytes, os acessados há mais tempo."""
+        if self.ttl_segundos is not None:
+            cursor = self._conexao.execute(
+                "DELETE FROM respostas WHERE criado < ?", (time.time() - self.ttl_segundos,)
+            )
+            self.removidos += cursor.rowcount
+
+        total = self._conexao.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excedente = total - self.max_bytes
+        removidas = []
+        for chave, tamanho in self._conexao.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado"):
+            if excedente <= 0:
+                break
+            removidas.append((chave,))
+            excedente -= tamanho
+        self._conexao.executemany("DELETE FROM respostas WHERE chave = ?", removidas)
+        self.removidos += len(removidas)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            entradas, total = self._conexao.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+            ).fetchone()
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": self.hits / consultas if consultas else 0.0,
+            "removidos": self.removidos,
+            "entradas": entradas,
+            "tamanho_mb": round(total / 1024 ** 2, 2),
+        }
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._conexao.execute("DELETE FROM respostas")
+            self._conexao.commit()
@@ -1,5 +1,6 @@
 import os
-from supabase import create_client
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,4 +8,46 @@ load_dotenv()
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_ANON_KEY')
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Cria o cliente Supabase na primeira chamada e reaproveita nas seguintes."""
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def paginar_tabela(tabela, colunas="*", tamanho_pagina=1000, chave="id", prefetch=True, filtros=None):
+    """
+    Lê a tabela em páginas ordenadas por `chave` (keyset: `chave > último valor lido`),
+    então cada página custa o mesmo, ao contrário de offset/range, que fica mais lento
+    conforme o deslocamento cresce. Gera listas de dicts com só as `colunas` pedidas.
+
+    Com `prefetch`, a próxima página é buscada numa thread enquanto o chamador processa a atual.
+    `filtros`: dict {coluna: valor} aplicado com eq.
+    """
+    if isinstance(colunas, (list, tuple)):
+        colunas = ",".join(dict.fromkeys([chave, *colunas]))
+    elif colunas != "*" and chave not in colunas.split(","):
+        colunas = f"{chave},{colunas}"
+
+    def buscar(ultimo):
+        consulta = get_supabase().table(tabela).select(colunas)
+        for coluna, valor in (filtros or {}).items():
+            consulta = consulta.eq(coluna, valor)
+        if ultimo is not None:
+            consulta = consulta.gt(chave, ultimo)
+        return consulta.order(chave).limit(tamanho_pagina).execute().data or []
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pagina = buscar(None)
+        while pagina:
+            completa = len(pagina) == tamanho_pagina
+            proxima = pool.submit(buscar, pagina[-1][chave]) if prefetch and completa else None
+            yield pagina
+            if not completa:
+                return
+            pagina = proxima.result() if proxima is not None else buscar(pagina[-1][chave])
+
+def __getattr__(nome):
+    # Compatibilidade: `from supabase_client import supabase` cria o cliente só nesse momento
+    if nome == 'supabase':
+        return get_supabase()
+    raise AttributeError(f"module 'supabase_client' has no attribute '{nome}'")
@@ -0,0 +1,301 @@
+import os
+import re
+import json
+import sqlite3
+import argparse
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from typing import Optional
+
+CAMINHO_BANCO = os.path.join("cache", "supabase_local.sqlite")
+
+# Operadores de filtro do PostgREST suportados (coluna=op.valor)
+OPERADORES = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+PARAMETROS_RESERVADOS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+_NOME_VALIDO = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+class ErroPostgrest(Exception):
+    def __init__(self, status: int, codigo: str, mensagem: str):
+        super().__init__(mensagem)
+        self.status = status
+        self.codigo = codigo
+        self.mensagem = mensagem
+
+
+def _coluna(nome: str) -> str:
+    if not _NOME_VALIDO.match(nome):
+        raise ErroPostgrest(400, "PGRST100", f"coluna inválida: {nome}")
+    return f"json_extract(dados, '$.{nome}')"
+
+
+class BancoLocal:
+    """
+    Armazenamento das tabelas do servidor local: uma tabela SQLite por tabela do
+    Supabase, com cada linha guardada como JSON e uma coluna `chave` única com
+    o valor das colunas de conflito (on_conflict) usadas no upsert.
+    """
+
+    def __init__(self, caminho: str = CAMINHO_BANCO):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._indices = set()
+
+    def _tabela(self, tabela: str) -> str:
+        if not _NOME_VALIDO.match(tabela):
+            raise ErroPostgrest(404, "PGRST205", f"tabela inválida: {tabela}")
+        self._conexao.execute(
+            f'CREATE TABLE IF NOT EXISTS "{tabela}" (rowid INTEGER PRIMARY KEY, chave UNIQUE, dados TEXT NOT NULL)'
+        )
+        return f'"{tabela}"'
+
+    def _indexar(self, tabela: str, coluna: str) -> None:
+        """Índice de expressão na coluna, para filtros/ordenação por ela (ex.: paginação por id)."""
+        if (tabela, coluna) in self._indices:
+            return
+        self._conexao.execute(
+            f'CREATE INDEX IF NOT EXISTS "idx_{tabela}_{coluna}" ON "{tabela}" ({_coluna(coluna)})'
+        )
+        self._indices.add((tabela, coluna))
+
+    @staticmethod
+    def _chave(linha: dict, colunas_conflito):
+        if not colunas_conflito:
+            return None
+        valores = [linha.get(c) for c in colunas_conflito]
+        return valores[0] if len(valores) == 1 else json.dumps(valores, ensure_ascii=False)
+
+    ####################### Leitura ######################################
+    #
+    def _where(self, nome: str, filtros) -> tuple:
+        condicoes, parametros = [], []
+        for coluna, expressao in filtros:
+            op, _, valor = expressao.partition(".")
+            expr = _coluna(coluna)
+            if op in OPERADORES:
+                condicoes.append(f"{expr} {OPERADORES[op]} ?")
+                parametros.append(self._converter(nome, coluna, valor))
+            elif op == "in":
+                valores = [v.strip().strip('"') for v in valor.strip("()").split(",") if v.strip()]
+                condicoes.append(f"{expr} IN ({', '.join('?' * len(valores))})")
+                parametros.extend(self._converter(nome, coluna, v) for v in valores)
+            elif op == "is":
+                condicoes.append(f"{expr} IS NULL" if valor == "null" else f"{expr} IS NOT NULL")
+            else:
+                raise ErroPostgrest(400, "PGRST100", f"operador não suportado: {op}")
+        return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+    def _converter(self, nome: str, coluna: str, valor: str):
+        """Os valores chegam como texto na URL; converte para número se a coluna for numérica."""
+        tipo = self._conexao.execute(
+            f"SELECT json_type(dados, '$.{coluna}') FROM {nome} "
+            f"WHERE json_type(dados, '$.{coluna}') NOT IN ('null') LIMIT 1"
+        ).fetchone()
+        if tipo and tipo[0] in ("integer", "real"):
+            try:
+                return int(valor) if tipo[0] == "integer" else float(valor)
+            except ValueError:
+                return valor
+        return valor
+
+    def selecionar(self, tabela: str, colunas: Optional[list], filtros, ordem: Optional[str],
+                   limite: Optional[int], deslocamento: Optional[int]) -> list:
+        with self._lock:
+            nome = self._tabela(tabela)
+            where, parametros = self._where(nome, filtros)
+
+            order_by = " ORDER BY rowid"
+            if ordem:
+                partes = []
+                for item in ordem.split(","):
+                    coluna, *modificadores = item.split(".")
+                    self._indexar(tabela, coluna)
+                    direcao = "DESC" if "desc" in modificadores else "ASC"
+                    partes.append(f"{_coluna(coluna)} {direcao}")
+                order_by = " ORDER BY " + ", ".join(partes)
+
+            sql = f"SELECT dados FROM {nome}{where}{order_by}"
+            if limite is not None:
+                sql += f" LIMIT {int(limite)} OFFSET {int(deslocamento or 0)}"
+            linhas = [json.loads(d) for (d,) in self._conexao.execute(sql, parametros)]
+
+        if colunas and colunas != ["*"]:
+            linhas = [{c: linha.get(c) for c in colunas} for linha in linhas]
+        return linhas
+
+    ####################### Escrita ######################################
+    #
+    def inserir(self, tabela: str, linhas: list, colunas_conflito, resolucao: Optional[str]) -> list:
+        with self._lock:
+            nome = self._tabela(tabela)
+            for coluna in colunas_conflito or []:
+                self._indexar(tabela, coluna)
+
+            if resolucao == "merge-duplicates" and colunas_conflito:
+                # PostgREST atualiza só as colunas enviadas: mescla com a linha existente
+                chaves = [self._chave(l, colunas_conflito) for l in linhas]
+                existentes = {}
+                for i in range(0, len(chaves), 500):
+                    bloco = chaves[i:i + 500]
+                    for chave, dados in self._conexao.execute(
+                        f"SELECT chave, dados FROM {nome} WHERE chave IN ({', '.join('?' * len(bloco))})", bloco
+                    ):
+                        existentes[chave] = json.loads(dados)
+                gravadas = []
+                for chave, linha in zip(chaves, linhas):
+                    linha = {**existentes.get(chave, {}), **linha}
+                    existentes[chave] = linha
+                    gravadas.append(linha)
+                self._conexao.executemany(
+                    f"INSERT INTO {nome} (chave, dados) VALUES (?, ?) "
+                    f"ON CONFLICT(chave) DO UPDATE SET dados = excluded.dados",
+                    [(self._chave(l, colunas_conflito), json.dumps(l, ensure_ascii=False)) for l in gravadas],
+                )
+                self._conexao.commit()
+                return gravadas
+
+            verbo = "INSERT OR IGNORE" if resolucao == "ignore-duplicates" else "INSERT"
+            try:
+                self._conexao.executemany(
+                    f"{verbo} INTO {nome} (chave, dados) VALUES (?, ?)",
+                    [(self._chave(l, colunas_conflito), json.dumps(l, ensure_ascii=False)) for l in linhas],
+                )
+            except sqlite3.IntegrityError as e:
+                self._conexao.rollback()
+                raise ErroPostgrest(409, "23505", f"duplicate key value violates unique constraint: {e}")
+            self._conexao.commit()
+            return linhas
+
+    def atualizar(self, tabela: str, valores: dict, filtros) -> list:
+        with self._lock:
+            nome = self._tabela(tabela)
+            where, parametros = self._where(nome, filtros)
+            atualizadas = []
+            for rowid, dados in self._conexao.execute(f"SELECT rowid, dados FROM {nome}{where}", parametros).fetchall():
+                linha = {**json.loads(dados), **valores}
+                self._conexao.execute(f"UPDATE {nome} SET dados = ? WHERE rowid = ?",
+                                      (json.dumps(linha, ensure_ascii=False), rowid))
+                atualizadas.append(linha)
+            self._conexao.commit()
+            return atualizadas
+
+    def remover(self, tabela: str, filtros) -> list:
+        with self._lock:
+            nome = self._tabela(tabela)
+            where, parametros = self._where(nome, filtros)
+            removidas = [json.loads(d) for (d,) in self._conexao.execute(f"SELECT dados FROM {nome}{where}", parametros)]
+            self._conexao.execute(f"DELETE FROM {nome}{where}", parametros)
+            self._conexao.commit()
+            return removidas
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Atende o subconjunto da API REST do PostgREST (/rest/v1/<tabela>) usado pelo supabase-py."""
+
+    banco: BancoLocal = None
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _rota(self):
+        url = urlsplit(self.path)
+        partes = url.path.strip("/").split("/")
+        if len(partes) != 3 or partes[:2] != ["rest", "v1"]:
+            raise ErroPostgrest(404, "PGRST000", f"rota não encontrada: {url.path}")
+        parametros = parse_qsl(url.query, keep_blank_values=True)
+        filtros = [(k, v) for k, v in parametros if k not in PARAMETROS_RESERVADOS]
+        return partes[2], dict(parametros), filtros
+
+    def _preferencias(self) -> dict:
+        preferencias = {}
+        for item in self.headers.get("Prefer", "").split(","):
+            chave, _, valor = item.strip().partition("=")
+            if chave:
+                preferencias[chave] = valor
+        return preferencias
+
+    def _corpo(self):
+        tamanho = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(tamanho) or b"null")
+
+    def _responder(self, status: int, corpo=None):
+        dados = b"" if corpo is None else json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if isinstance(corpo, list):
+            self.send_header("Content-Range", f"0-{max(len(corpo) - 1, 0)}/*")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _executar(self, operacao):
+        try:
+            tabela, parametros, filtros = self._rota()
+            linhas = operacao(tabela, parametros, filtros)
+            if self.command == "GET" or self._preferencias().get("return") == "representation":
+                self._responder(201 if self.command == "POST" else 200, linhas)
+            else:
+                self._responder(201 if self.command == "POST" else 204)
+        except ErroPostgrest as e:
+            self._responder(e.status, {"code": e.codigo, "message": e.mensagem, "details": None, "hint": None})
+        except (ValueError, sqlite3.Error) as e:
+            self._responder(400, {"code": "PGRST100", "message": str(e), "details": None, "hint": None})
+
+    def do_GET(self):
+        def operacao(tabela, parametros, filtros):
+            colunas = [c.strip() for c in parametros.get("select", "*").split(",")]
+            limite = int(parametros["limit"]) if "limit" in parametros else None
+            deslocamento = int(parametros["offset"]) if "offset" in parametros else None
+            # supabase-py manda .range() como cabeçalho Range: inicio-fim
+            faixa = self.headers.get("Range")
+            if faixa and limite is None:
+                inicio, _, fim = faixa.partition("-")
+                deslocamento, limite = int(inicio), int(fim) - int(inicio) + 1
+            return self.banco.selecionar(tabela, colunas, filtros, parametros.get("order"), limite, deslocamento)
+        self._executar(operacao)
+
+    def do_POST(self):
+        def operacao(tabela, parametros, filtros):
+            corpo = self._corpo()
+            linhas = corpo if isinstance(corpo, list) else [corpo]
+            conflito = [c.strip() for c in parametros["on_conflict"].split(",")] if parametros.get("on_conflict") else None
+            return self.banco.inserir(tabela, linhas, conflito, self._preferencias().get("resolution"))
+        self._executar(operacao)
+
+    def do_PATCH(self):
+        self._executar(lambda tabela, parametros, filtros: self.banco.atualizar(tabela, self._corpo(), filtros))
+
+    def do_DELETE(self):
+        self._executar(lambda tabela, parametros, filtros: self.banco.remover(tabela, filtros))
+
+
+def iniciar_servidor(caminho: str = CAMINHO_BANCO, host: str = "127.0.0.1", porta: int = 54321,
+                     em_segundo_plano: bool = True):
+    """
+    Sobe o servidor local compatível com o PostgREST. Retorna (servidor, url).
+    Para usar com o app: SUPABASE_URL=<url> e qualquer SUPABASE_ANON_KEY no formato JWT.
+    """
+    handler = type("Handler", (_Handler,), {"banco": BancoLocal(caminho)})
+    servidor = ThreadingHTTPServer((host, porta), handler)
+    url = f"http://{host}:{servidor.server_address[1]}"
+    if em_segundo_plano:
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, url
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local compatível com a API REST do Supabase (PostgREST).")
+    parser.add_argument("--banco", default=CAMINHO_BANCO)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=54321)
+    args = parser.parse_args()
+
+    servidor, url = iniciar_servidor(args.banco, args.host, args.porta, em_segundo_plano=False)
+    print(f"✅ Supabase local em {url} (banco: {args.banco})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        servidor.shutdown()
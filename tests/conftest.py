@@ -0,0 +1,44 @@
+import os
+import re
+import sys
+import hashlib
+
+import numpy as np
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ModeloFalso:
+    """
+    Substitui o SentenceTransformer nos testes: bag-of-words com hashing dos termos mais
+    um ruído pequeno fixo por texto (para não haver empates exatos de score), vetores
+    normalizados. Textos com termos em comum ficam próximos, e `codificados` conta
+    quantos textos passaram pelo encode.
+    """
+
+    def __init__(self, dimensao=64):
+        self.dimensao = dimensao
+        self.codificados = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimensao
+
+    def encode(self, textos, convert_to_numpy=True, normalize_embeddings=True, **kwargs):
+        unico = isinstance(textos, str)
+        textos = [textos] if unico else list(textos)
+        self.codificados += len(textos)
+        vetores = np.zeros((len(textos), self.dimensao), dtype=np.float32)
+        for i, texto in enumerate(textos):
+            for termo in re.findall(r'\w+', str(texto).lower()):
+                vetores[i, int(hashlib.md5(termo.encode('utf-8')).hexdigest(), 16) % self.dimensao] += 1.0
+            semente = int(hashlib.md5(str(texto).encode('utf-8')).hexdigest()[:8], 16)
+            vetores[i] += 0.05 * np.random.default_rng(semente).random(self.dimensao)
+        vetores /= np.linalg.norm(vetores, axis=1, keepdims=True) + 1e-12
+        return vetores[0] if unico else vetores
+
+
+@pytest.fixture
+def modelo():
+    return ModeloFalso()
@@ -0,0 +1,122 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from database import AnalyseDatabase
+from embedding_store import EmbeddingStore
+from tratarbase import montar_texto_cv, marcar_cadastro_completo
+
+
+def frame_applicants():
+    df = pd.DataFrame({
+        'id': ['1', '2', '3', '4'],
+        'codigo_profissional': ['10', '20', '10', '30'],
+        'cargo_atual': ['Analista SAP', 'Desenvolvedor', 'Gerente de Projetos', 'Desenvolvedor'],
+        'objetivo_profissional': ['Consultoria SAP', 'Backend', 'Gestão', 'Backend'],
+        'titulo_profissional': ['Analista SAP ABAP', 'Desenvolvedor Python', 'Gerente de Projetos', 'Desenvolvedor Java'],
+        'area_atuacao': ['TI', 'TI', 'Gestão', 'TI'],
+        'conhecimentos_tecnicos': ['sap abap fiori', 'python django postgres', 'scrum kanban', 'java spring'],
+        'certificacoes': ['', 'aws', 'pmp', ''],
+    })
+    df['texto_cv'] = montar_texto_cv(df.copy())
+    df['cadastro_completo'] = marcar_cadastro_completo(df)
+    return df
+
+
+@pytest.fixture
+def database(tmp_path, modelo):
+    db = AnalyseDatabase(applicants=frame_applicants(), prospects=pd.DataFrame({'codigo_vaga': ['10']}),
+                         vagas=pd.DataFrame({'codigo_vaga': ['10'], 'titulo_vaga': ['Analista SAP']}),
+                         embeddings=EmbeddingStore(diretorio=str(tmp_path / 'embeddings')),
+                         diretorio_snapshot=str(tmp_path / 'snapshot'))
+    db._model = modelo
+    return db
+
+
+def ids_bm25(database, consulta):
+    posicoes, _ = database.indice_bm25.buscar(consulta, k=10)
+    return database.applicants.iloc[posicoes]['id'].tolist()
+
+
+def test_indice_bm25_gravado_no_snapshot_da_instancia(database, tmp_path):
+    database.indice_bm25
+    assert os.path.exists(tmp_path / 'snapshot' / 'indice_bm25.npz')
+
+
+def test_bm25_insert_encontrado_pelo_termo_novo(database):
+    assert ids_bm25(database, 'kubernetes') == []
+    database.inserir_applicant_novo({'id': '5', 'codigo_profissional': '40', 'titulo_profissional': 'SRE',
+                                     'conhecimentos_tecnicos': 'kubernetes terraform'})
+    assert ids_bm25(database, 'kubernetes') == ['5']
+    assert ids_bm25(database, 'django kubernetes')[:2] in (['5', '2'], ['2', '5'])
+
+
+def test_bm25_update_descarta_termos_antigos(database):
+    assert ids_bm25(database, 'django') == ['2']
+    database.atualizar_applicant({'id': '2', 'conhecimentos_tecnicos': 'rust tokio'})
+    assert ids_bm25(database, 'django') == []
+    assert ids_bm25(database, 'rust') == ['2']
+    # o título não mudou e continua indexado
+    assert '2' in ids_bm25(database, 'python')
+
+
+def test_hibrido_combina_bm25_e_cosseno(database):
+    df = database.get_candidatos_compativeis_hibrido('sap abap', k=4, candidatos_lexicos=10, candidatos_semanticos=4)
+    assert df['id'].iloc[0] == '1'
+    assert df['score_bm25'].iloc[0] == pytest.approx(1.0)
+    esperado = 0.5 * df['score_bm25'] + 0.5 * df['score_semantico']
+    np.testing.assert_allclose(df['score_similaridade'], esperado, rtol=1e-5)
+    assert df['score_similaridade'].is_monotonic_decreasing
+
+
+def test_hibrido_sem_termo_em_comum_vira_semantico(database):
+    df = database.get_candidatos_compativeis_hibrido('zzz', k=3, candidatos_lexicos=10, candidatos_semanticos=4)
+    np.testing.assert_allclose(df['score_similaridade'], df['score_semantico'], rtol=1e-6)
+    assert (df['score_bm25'] == 0).all()
+
+
+@pytest.fixture
+def database_com_vagas(database, tmp_path):
+    database._vagas = pd.DataFrame({'codigo_vaga': ['10', '11', '12'],
+                                    'titulo_vaga': ['Analista SAP ABAP', 'Desenvolvedor Python Django', 'Scrum Master']})
+    database.embeddings_vagas = EmbeddingStore(diretorio=str(tmp_path / 'embeddings_vagas'))
+    return database
+
+
+def test_vagas_compativeis_devolve_copia_e_recalcula_no_update(database_com_vagas):
+    df = database_com_vagas.get_vagas_compativeis('2', k=3)
+    assert df['codigo_vaga'].iloc[0] == '11'
+    df['codigo_vaga'] = 'alterado'
+    assert database_com_vagas.get_vagas_compativeis('2', k=3)['codigo_vaga'].iloc[0] == '11'
+
+    database_com_vagas.atualizar_applicant({'id': '2', 'titulo_profissional': 'Analista SAP ABAP',
+                                            'conhecimentos_tecnicos': 'sap abap fiori'})
+    assert database_com_vagas.get_vagas_compativeis('2', k=3)['codigo_vaga'].iloc[0] == '10'
+
+
+def test_vagas_compativeis_com_update_concorrente(database_com_vagas):
+    indice = database_com_vagas.get_indice_vagas()
+    buscar_original = indice.buscar_posicoes
+    updates = []
+
+    def buscar_com_update_no_meio(*args, **kwargs):
+        # na primeira busca outra sessão salva o applicant enquanto o top dele é calculado
+        if not updates:
+            update = threading.Thread(target=database_com_vagas.atualizar_applicant,
+                                      args=({'id': '2', 'conhecimentos_tecnicos': 'sap abap fiori'},))
+            updates.append(update)
+            update.start()
+            update.join(timeout=0.2)
+        return buscar_original(*args, **kwargs)
+
+    indice.buscar_posicoes = buscar_com_update_no_meio
+    database_com_vagas.get_vagas_compativeis('2', k=3)
+    updates[0].join()
+
+    # o top guardado é o do texto_cv novo, não o calculado antes do update
+    guardado = database_com_vagas.get_vagas_compativeis('2', k=3)
+    database_com_vagas._vagas_do_applicant.clear()
+    pd.testing.assert_frame_equal(guardado, database_com_vagas.get_vagas_compativeis('2', k=3))
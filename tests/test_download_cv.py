@@ -0,0 +1,129 @@
+import os
+import json
+
+import pytest
+
+import download_cv as dc
+
+
+class DriveContado(dc.DriveLocalStub):
+    """DriveLocalStub que registra as páginas listadas e os ids baixados."""
+
+    def __init__(self, diretorio, tamanho_pagina=100, nomes=None, falhar=()):
+        super().__init__(diretorio, tamanho_pagina)
+        self.nomes = nomes or {}
+        self.falhar = set(falhar)
+        self.paginas = []
+        self.baixados = []
+
+    def _metadados(self, nome):
+        # `nomes` simula arquivos diferentes com o mesmo nome na pasta do Drive
+        return {**super()._metadados(nome), 'name': self.nomes.get(nome, nome)}
+
+    def listar(self, pasta_id, page_token=None):
+        self.paginas.append(page_token)
+        return super().listar(pasta_id, page_token)
+
+    def baixar(self, arquivo_id, destino):
+        self.baixados.append(arquivo_id)
+        if arquivo_id in self.falhar:
+            destino.write(b'%PDF-truncado')
+            raise ConnectionError('conexão perdida')
+        super().baixar(arquivo_id, destino)
+
+
+def criar_pasta(diretorio, quantidade):
+    os.makedirs(diretorio, exist_ok=True)
+    for i in range(quantidade):
+        with open(os.path.join(diretorio, f'cv{i}.pdf'), 'wb') as f:
+            f.write(f'%PDF conteudo {i}'.encode())
+
+
+@pytest.fixture
+def pastas(tmp_path):
+    origem, destino = str(tmp_path / 'drive'), str(tmp_path / 'local')
+    criar_pasta(origem, 5)
+    return origem, destino
+
+
+def ler(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read()
+
+
+def test_sincronizar_percorre_todas_as_paginas(pastas):
+    origem, destino = pastas
+    fonte = DriveContado(origem, tamanho_pagina=2)
+
+    resumo = dc.sincronizar(fonte, destino=destino, max_workers=2)
+
+    assert fonte.paginas == [None, '2', '4']
+    assert resumo == {'baixados': 5, 'ignorados': 0, 'erros': []}
+    for i in range(5):
+        assert ler(os.path.join(destino, f'cv{i}.pdf')) == ler(os.path.join(origem, f'cv{i}.pdf'))
+
+
+def test_sincronizar_ignora_arquivos_do_manifesto(pastas):
+    origem, destino = pastas
+    dc.sincronizar(DriveContado(origem), destino=destino)
+    with open(os.path.join(destino, dc.NOME_MANIFESTO), encoding='utf-8') as f:
+        assert sorted(json.load(f)) == [f'cv{i}.pdf' for i in range(5)]
+
+    fonte = DriveContado(origem)
+    assert dc.sincronizar(fonte, destino=destino) == {'baixados': 0, 'ignorados': 5, 'erros': []}
+    assert fonte.baixados == []
+
+    # conteúdo alterado no Drive (md5 diferente) e arquivo local apagado: só esses dois voltam
+    with open(os.path.join(origem, 'cv1.pdf'), 'wb') as f:
+        f.write(b'%PDF versao nova')
+    os.remove(os.path.join(destino, 'cv3.pdf'))
+    fonte = DriveContado(origem)
+    assert dc.sincronizar(fonte, destino=destino)['baixados'] == 2
+    assert sorted(fonte.baixados) == ['cv1.pdf', 'cv3.pdf']
+    assert ler(os.path.join(destino, 'cv1.pdf')) == b'%PDF versao nova'
+
+
+def test_sincronizar_retoma_depois_de_interrupcao(pastas):
+    origem, destino = pastas
+    resumo = dc.sincronizar(DriveContado(origem, falhar={'cv2.pdf'}), destino=destino, max_workers=1)
+    assert resumo['baixados'] == 4 and resumo['erros'] == ['cv2.pdf']
+    # o download interrompido fica só no .part, nunca como PDF truncado
+    assert not os.path.exists(os.path.join(destino, 'cv2.pdf'))
+    assert ler(os.path.join(destino, 'cv2.pdf.part')) == b'%PDF-truncado'
+
+    fonte = DriveContado(origem)
+    assert dc.sincronizar(fonte, destino=destino) == {'baixados': 1, 'ignorados': 4, 'erros': []}
+    assert fonte.baixados == ['cv2.pdf']
+    assert ler(os.path.join(destino, 'cv2.pdf')) == ler(os.path.join(origem, 'cv2.pdf'))
+    assert not os.path.exists(os.path.join(destino, 'cv2.pdf.part'))
+
+
+def test_manifesto_gravado_mesmo_sem_atingir_o_intervalo(pastas):
+    origem, destino = pastas
+    dc.sincronizar(DriveContado(origem, falhar={'cv4.pdf'}), destino=destino, max_workers=1)
+    manifesto = dc.Manifesto(destino)
+    assert sorted(manifesto.arquivos) == [f'cv{i}.pdf' for i in range(4)]
+
+
+def test_nomes_locais_resolve_colisoes():
+    arquivos = [{'id': '1', 'name': 'CV.pdf'}, {'id': '2', 'name': 'cv.pdf'}, {'id': '3', 'name': 'outro.pdf'},
+                {'id': '4', 'name': 'sub/unico.pdf'}]
+    assert dc.nomes_locais(arquivos) == {'1': 'CV__1.pdf', '2': 'cv__2.pdf', '3': 'outro.pdf', '4': 'unico.pdf'}
+
+    # a comparação usa só o nome do arquivo, sem o caminho e sem diferenciar maiúsculas
+    arquivos[3]['name'] = 'sub/OUTRO.PDF'
+    assert dc.nomes_locais(arquivos)['3'] == 'outro__3.pdf'
+    assert dc.nomes_locais(arquivos)['4'] == 'OUTRO__4.PDF'
+
+
+def test_sincronizar_mantem_arquivos_com_mesmo_nome(pastas):
+    origem, destino = pastas
+    fonte = DriveContado(origem, nomes={'cv0.pdf': 'curriculo.pdf', 'cv1.pdf': 'Curriculo.pdf'})
+
+    assert dc.sincronizar(fonte, destino=destino)['baixados'] == 5
+    assert ler(os.path.join(destino, 'curriculo__cv0.pdf.pdf')) == ler(os.path.join(origem, 'cv0.pdf'))
+    assert ler(os.path.join(destino, 'Curriculo__cv1.pdf.pdf')) == ler(os.path.join(origem, 'cv1.pdf'))
+    assert not os.path.exists(os.path.join(destino, 'curriculo.pdf'))
+
+    # na execução seguinte os nomes resolvidos batem com o manifesto e nada é baixado
+    assert dc.sincronizar(DriveContado(origem, nomes=fonte.nomes), destino=destino)['baixados'] == 0
@@ -0,0 +1,114 @@
+import os
+import json
+
+import numpy as np
+import pytest
+
+from embedding_store import EmbeddingStore
+
+IDS = ['1', '2', '3', '4', '5']
+TEXTOS = ['python django', 'sap abap', 'java spring', 'gestao de projetos', 'dados spark']
+
+
+@pytest.fixture
+def store(tmp_path, modelo):
+    store = EmbeddingStore(diretorio=str(tmp_path))
+    assert store.sincronizar(IDS, TEXTOS, modelo) == 5
+    return store
+
+
+def reabrir(store):
+    return EmbeddingStore(diretorio=store.diretorio, nome_modelo=store.nome_modelo)
+
+
+def arquivos(store):
+    return sorted(os.listdir(store.diretorio))
+
+
+def test_sincronizar_recodifica_so_textos_alterados(store, modelo):
+    antes = np.array(store.matriz)
+    store = reabrir(store)
+    assert store.ids == IDS
+    np.testing.assert_array_equal(store.matriz, antes)
+    assert store.sincronizar(IDS, TEXTOS, modelo) == 0
+    assert modelo.codificados == 5
+
+    # id 2 com texto novo, id 4 removido, id 6 novo e ordem trocada
+    ids = ['6', '1', '2', '3', '5']
+    textos = ['kubernetes', TEXTOS[0], 'sap fiori', TEXTOS[2], TEXTOS[4]]
+    assert store.sincronizar(ids, textos, modelo) == 2
+    assert modelo.codificados == 7
+
+    store = reabrir(store)
+    assert store.ids == ids
+    np.testing.assert_array_equal(store.matriz[[1, 3, 4]], antes[[0, 2, 4]])
+    np.testing.assert_allclose(store.matriz[[0, 2]], modelo.encode(['kubernetes', 'sap fiori']), rtol=1e-6)
+
+
+def test_alteracoes_vao_para_o_log_e_sao_reaplicadas(store, modelo):
+    geracao = store.geracao
+    with open(store.caminho_manifesto, encoding='utf-8') as f:
+        manifesto = f.read()
+
+    vetores = store.obter_vetores(['2', '7'], ['sap fiori', 'rust tokio'], modelo)
+    assert modelo.codificados == 7
+    np.testing.assert_array_equal(store.obter_vetores(['2', '7'], ['sap fiori', 'rust tokio'], modelo), vetores)
+    assert modelo.codificados == 7  # a segunda chamada não recodifica
+    np.testing.assert_allclose(vetores, modelo.encode(['sap fiori', 'rust tokio']), rtol=1e-6)
+
+    # nem a matriz nem o manifesto são regravados; a edição fica no log da geração atual
+    assert store.geracao == geracao
+    with open(store.caminho_manifesto, encoding='utf-8') as f:
+        assert f.read() == manifesto
+    with open(os.path.join(store.diretorio, f'alteracoes-{geracao}.jsonl'), encoding='utf-8') as f:
+        assert [json.loads(linha)['id'] for linha in f] == ['2', '7']
+
+    reaberto = reabrir(store)
+    assert reaberto.ids == IDS + ['7']
+    np.testing.assert_array_equal(reaberto.matriz, store.matriz)
+    assert reaberto.sincronizar(IDS + ['7'], ['python django', 'sap fiori', *TEXTOS[2:], 'rust tokio'], modelo) == 0
+
+
+def test_log_com_ultima_linha_incompleta(store, modelo):
+    store.obter_vetores(['7'], ['rust tokio'], modelo)
+    caminho = os.path.join(store.diretorio, f'alteracoes-{store.geracao}.jsonl')
+    with open(caminho, 'a', encoding='utf-8') as f:
+        f.write('{"id": "8", "hash": "ab')  # processo caiu no meio da gravação
+
+    reaberto = reabrir(store)
+    assert reaberto.ids == IDS + ['7']
+    np.testing.assert_array_equal(reaberto.matriz, store.matriz)
+
+
+def test_nova_geracao_ao_consolidar_o_log(store, modelo, monkeypatch):
+    monkeypatch.setattr(EmbeddingStore, 'LIMITE_ALTERACOES', 3)
+    geracao = store.geracao
+    assert arquivos(store) == [f'embeddings-{geracao}.npy', 'manifesto.json']
+
+    store.obter_vetores(['6', '7'], ['a b', 'c d'], modelo)
+    assert store.geracao == geracao
+    store.obter_vetores(['8'], ['e f'], modelo)
+
+    # 3 alterações: build novo, arquivos e log da geração anterior apagados
+    assert store.geracao == geracao + 1
+    assert arquivos(store) == [f'embeddings-{geracao + 1}.npy', 'manifesto.json']
+    reaberto = reabrir(store)
+    assert reaberto.geracao == geracao + 1 and reaberto.ids == IDS + ['6', '7', '8']
+    np.testing.assert_array_equal(reaberto.matriz, store.matriz)
+
+
+def test_nova_geracao_sem_capacidade_livre(store, modelo):
+    store.salvar(folga=0)
+    geracao = store.geracao
+    store.obter_vetores(['9'], ['cobol'], modelo)
+
+    assert store.geracao == geracao + 1
+    reaberto = reabrir(store)
+    assert reaberto.ids == IDS + ['9']
+    np.testing.assert_allclose(reaberto.matriz[-1], modelo.encode('cobol'), rtol=1e-6)
+
+
+def test_modelo_diferente_descarta_o_build(store, modelo):
+    outro = EmbeddingStore(diretorio=store.diretorio, nome_modelo='outro-modelo')
+    assert outro.ids == [] and outro.matriz is None
+    assert outro.sincronizar(IDS, TEXTOS, modelo) == 5
@@ -0,0 +1,90 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import database as db_modulo
+import embeddings_cv as ecv
+from embedding_store import EmbeddingStore
+
+IDS = ['1', '2', '3']
+CVS = [' '.join(f'python{i}' for i in range(30)), 'sap abap fiori', '']
+
+
+def lotes(ids, textos, tamanho=2):
+    for i in range(0, len(ids), tamanho):
+        yield ids[i:i + tamanho], textos[i:i + tamanho]
+
+
+def test_dividir_em_trechos_com_sobreposicao():
+    spans = [(i * 2, i * 2 + 1) for i in range(10)]
+    assert ecv.dividir_em_trechos(spans, max_tokens=4, sobreposicao=1) == [(0, 7), (6, 13), (12, 19)]
+    assert ecv.dividir_em_trechos([], max_tokens=4) == []
+
+
+def test_construir_e_recarregar(tmp_path, modelo):
+    trechos = ecv.TrechosCV(str(tmp_path))
+    resultado = trechos.construir(lotes(IDS, CVS), modelo, max_tokens=10, sobreposicao=2)
+    assert resultado['candidatos'] == 3 and resultado['trechos'] == 5 + 1 + 0  # janelas de 8 tokens, passo 6
+
+    recarregado = ecv.TrechosCV(str(tmp_path))
+    assert recarregado.ids == IDS
+    vetores, spans = recarregado.trechos_de('1')
+    assert len(vetores) == 5 and CVS[0][spans[0][0]:spans[0][1]].split()[0] == 'python0'
+    np.testing.assert_allclose(recarregado.matriz[0], ecv.agregar(vetores, modelo.dimensao), rtol=1e-6)
+    assert not recarregado.matriz[2].any()  # sem cv_pt: vetor nulo
+
+    # só o cv_pt alterado é recodificado
+    resultado = recarregado.construir(lotes(IDS, [CVS[0], 'sap hana', CVS[2]]), modelo, max_tokens=10, sobreposicao=2)
+    assert resultado['recodificados'] == 1
+
+
+def interromper_depois_dos_agregados(trechos, monkeypatch):
+    original = trechos.agregados.substituir
+
+    def substituir_e_cair(*args, **kwargs):
+        original(*args, **kwargs)
+        raise KeyboardInterrupt
+    monkeypatch.setattr(trechos.agregados, 'substituir', substituir_e_cair)
+
+
+def test_build_interrompido_nao_e_carregado(tmp_path, modelo, monkeypatch):
+    ecv.TrechosCV(str(tmp_path)).construir(lotes(IDS, CVS), modelo, max_tokens=10, sobreposicao=2)
+
+    trechos = ecv.TrechosCV(str(tmp_path))
+    interromper_depois_dos_agregados(trechos, monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        trechos.construir(lotes(IDS + ['4'], CVS + ['java spring']), modelo, max_tokens=10, sobreposicao=2)
+
+    # agregados já gravados (4 candidatos), mas sem trechos.json os trechos não valem
+    recarregado = ecv.TrechosCV(str(tmp_path))
+    assert len(recarregado) == 4 and recarregado.limites is None
+
+    # o build seguinte refaz tudo e volta a valer
+    resultado = recarregado.construir(lotes(IDS + ['4'], CVS + ['java spring']), modelo, max_tokens=10, sobreposicao=2)
+    assert resultado['recodificados'] == 4
+    assert len(ecv.TrechosCV(str(tmp_path)).trechos_de('4')[0]) == 1
+
+
+def test_trechos_de_outra_geracao_dos_agregados(tmp_path, modelo):
+    ecv.TrechosCV(str(tmp_path)).construir(lotes(IDS, CVS), modelo, max_tokens=10, sobreposicao=2)
+    # os agregados ganham um build novo por fora, com o mesmo tamanho
+    store = EmbeddingStore(str(tmp_path))
+    store.substituir(store.ids, store.hashes, np.array(store.matriz))
+    assert ecv.TrechosCV(str(tmp_path)).limites is None
+
+
+def test_get_indice_cv_sem_trechos(tmp_path, modelo, monkeypatch):
+    trechos = ecv.TrechosCV(str(tmp_path))
+    interromper_depois_dos_agregados(trechos, monkeypatch)
+    with pytest.raises(KeyboardInterrupt):
+        trechos.construir(lotes(IDS, CVS), modelo, max_tokens=10, sobreposicao=2)
+
+    monkeypatch.setattr(db_modulo, 'TrechosCV', functools.partial(ecv.TrechosCV, str(tmp_path)))
+    database = db_modulo.AnalyseDatabase(applicants=pd.DataFrame({'id': IDS}), prospects=pd.DataFrame(),
+                                         vagas=pd.DataFrame(), embeddings=EmbeddingStore(str(tmp_path / 'emb')),
+                                         diretorio_snapshot=str(tmp_path / 'snapshot'))
+    database._model = modelo
+    assert database.get_indice_cv() is None
+    assert database.get_candidatos_compativeis_por_cv('sap').empty
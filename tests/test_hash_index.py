@@ -0,0 +1,48 @@
+import pandas as pd
+
+from hash_index import HashIndex
+
+
+def test_get_por_chave_como_string():
+    indice = HashIndex(pd.Series([10, 20, 10, None, 30], dtype=object))
+    assert indice.get(10) == [0, 2]
+    assert indice.get('10') == [0, 2]
+    assert indice.get('None') == [3]
+    assert indice.get(99) == []
+    assert len(indice) == 4 and '30' in indice and 99 not in indice
+
+
+def test_get_devolve_copia():
+    indice = HashIndex(pd.Series(['a', 'b', 'a']))
+    posicoes = indice.get('a')
+    posicoes.append(1)
+    posicoes.clear()
+    indice.get('zz').append(0)
+    assert indice.get('a') == [0, 2]
+    assert indice.get('zz') == [] and 'zz' not in indice
+
+
+def test_adicionar():
+    indice = HashIndex(pd.Series(['a', 'b']))
+    indice.adicionar('a', 2)
+    indice.adicionar('c', 3)
+    assert indice.get('a') == [0, 2] and indice.get('c') == [3]
+
+
+def test_mover():
+    indice = HashIndex(pd.Series(['a', 'b', 'a']))
+
+    indice.mover('a', 'b', 2)
+    assert indice.get('a') == [0] and indice.get('b') == [1, 2]
+
+    # última posição da chave: a chave sai do índice
+    indice.mover('a', 'c', 0)
+    assert 'a' not in indice and indice.get('c') == [0]
+
+    # mesma chave (comparada como string): nada muda
+    indice.mover(1, '1', 1)
+    assert indice.get('b') == [1, 2] and '1' not in indice
+
+    # posição que não estava na chave antiga: só é acrescentada na nova
+    indice.mover('b', 'd', 5)
+    assert indice.get('b') == [1, 2] and indice.get('d') == [5]
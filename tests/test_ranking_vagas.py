@@ -0,0 +1,129 @@
+import os
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import ranking_vagas as rv
+from database import AnalyseDatabase
+from embedding_store import EmbeddingStore
+from tratarbase import montar_texto_cv, marcar_cadastro_completo
+
+CARGOS = ['Analista SAP', 'Desenvolvedor Python', 'Desenvolvedor Java', 'Gerente de Projetos', 'Cientista de Dados',
+          'Analista de Suporte', 'DBA Oracle', 'Scrum Master']
+TECNOLOGIAS = ['sap', 'abap', 'python', 'django', 'java', 'spring', 'oracle', 'sql', 'scrum', 'kanban', 'spark',
+               'pandas', 'linux', 'aws', 'azure', 'docker', 'excel', 'itil', 'react', 'node']
+
+
+def frame_applicants(n=400, semente=3):
+    rng = random.Random(semente)
+    linhas = []
+    for i in range(n):
+        linhas.append({
+            'id': str(1000 + i),
+            'codigo_profissional': str(i),
+            'cargo_atual': rng.choice(CARGOS),
+            # ~1/5 sem objetivo: fica fora dos elegíveis (cadastro incompleto)
+            'objetivo_profissional': '' if i % 5 == 0 else rng.choice(CARGOS),
+            'titulo_profissional': rng.choice(CARGOS),
+            'area_atuacao': 'TI',
+            'conhecimentos_tecnicos': ' '.join(rng.sample(TECNOLOGIAS, rng.randint(2, 7))),
+        })
+    df = pd.DataFrame(linhas)
+    df['texto_cv'] = montar_texto_cv(df.copy())
+    df['cadastro_completo'] = marcar_cadastro_completo(df)
+    return df
+
+
+def sem_empate_entre(scores, todos):
+    """True nas posições cujo score não empata com o de nenhum outro elegível."""
+    return np.array([np.isclose(todos, score, rtol=1e-5, atol=1e-6).sum() == 1 for score in scores])
+
+
+@pytest.fixture
+def database(tmp_path, modelo):
+    vagas = pd.DataFrame({'codigo_vaga': [f'v{i}' for i in range(10)],
+                          'titulo_vaga': CARGOS + ['Consultor SAP ABAP', 'Analista SAP']})  # título repetido
+    db = AnalyseDatabase(applicants=frame_applicants(), prospects=pd.DataFrame({'codigo_vaga': []}), vagas=vagas,
+                         embeddings=EmbeddingStore(diretorio=str(tmp_path / 'embeddings')),
+                         diretorio_snapshot=str(tmp_path / 'snapshot'))
+    db._model = modelo
+    db.get_indice_applicants()
+    return db
+
+
+def test_ranquear_em_blocos_igual_ao_ranking_ao_vivo(database, modelo):
+    mascara = database.mascara_cadastro_completo()
+    assert 0 < mascara.sum() < len(mascara)
+    titulos = database.vagas['titulo_vaga'].tolist()
+    consultas = modelo.encode(titulos)
+    top_n = 20
+
+    # blocos pequenos: vários blocos de applicants e de vagas, com a fusão dos top-N entre eles
+    posicoes, scores, est = rv.ranquear_em_blocos(consultas, database.embeddings.matriz, np.flatnonzero(mascara),
+                                                  top_n=top_n, bloco_vagas=3, bloco_applicants=37, max_workers=2)
+
+    matriz = np.asarray(database.embeddings.matriz)
+    for i, titulo in enumerate(titulos):
+        df_top, scores_vivo = database.ranquear_por_titulo(titulo, k=top_n, mascara=mascara)
+
+        # mesmos scores na mesma ordem; com empate, qualquer candidato do empate serve
+        np.testing.assert_allclose(scores[i], df_top['score_similaridade'].to_numpy(), rtol=1e-5, atol=1e-6)
+        assert mascara[posicoes[i]].all()
+        np.testing.assert_allclose(matriz[posicoes[i]] @ consultas[i], scores[i], rtol=1e-5, atol=1e-6)
+        sem_empate = sem_empate_entre(scores[i], scores_vivo)
+        assert sem_empate.sum() >= top_n // 2
+        assert (database.applicants['id'].to_numpy()[posicoes[i]][sem_empate]
+                == df_top['id'].to_numpy()[sem_empate]).all()
+
+        # estatísticas das notas, como calculadas pela tela (notas 0-10 e pd.cut)
+        notas = pd.Series(np.round(scores_vivo.astype(np.float64) * 10, 2))
+        assert est['analisados'][i] == len(notas)
+        assert est['media'][i] == pytest.approx(notas.mean(), abs=1e-4)
+        assert est['maximo'][i] == pytest.approx(notas.max(), abs=1e-4)
+        assert est['minimo'][i] == pytest.approx(notas.min(), abs=1e-4)
+        assert est['desvio'][i] == pytest.approx(notas.std(), abs=1e-4)
+        faixas = pd.cut(notas, bins=rv.FAIXAS_NOTA, include_lowest=True).value_counts(sort=False)
+        assert est['faixas'][i].tolist() == faixas.tolist()
+
+
+def test_job_gravado_e_lido_pela_tela(database, modelo, tmp_path):
+    mascara = database.mascara_cadastro_completo()
+    diretorio = str(tmp_path / 'rankings')
+    manifesto = rv.executar_job(database.applicants, database.vagas, database.embeddings.matriz, modelo,
+                                mascara=mascara, top_n=15, bloco_applicants=50, max_workers=2, diretorio=diretorio)
+    assert manifesto['vagas'] == 10 and manifesto['titulos_distintos'] == 9
+
+    database.rankings = rv.RankingsPrecalculados(diretorio)
+    for codigo, titulo in zip(database.vagas['codigo_vaga'], database.vagas['titulo_vaga']):
+        df_job, resumo = database.get_ranking_precalculado(codigo, k=10)
+        df_vivo, scores_vivo = database.ranquear_por_titulo(titulo, k=10, mascara=mascara)
+        np.testing.assert_allclose(df_job['score_similaridade'].to_numpy(), df_vivo['score_similaridade'].to_numpy(),
+                                   rtol=1e-5, atol=1e-6)
+        assert resumo['analisados'] == int(mascara.sum())
+
+    # depois de um update a assinatura muda e a tela volta ao ranking ao vivo
+    database.atualizar_applicant({'id': '1001', 'conhecimentos_tecnicos': 'cobol'})
+    assert database.get_ranking_precalculado('v0') is None
+
+
+def test_copiar_build_nao_altera_o_store_do_app(tmp_path, modelo):
+    app = EmbeddingStore(diretorio=str(tmp_path / 'app'))
+    app.sincronizar(['1', '2'], ['python', 'java'], modelo)
+    app.obter_vetores(['3'], ['sap'], modelo)  # edição ainda no log da geração
+    arquivos_app = sorted(os.listdir(app.diretorio))
+
+    destino = str(tmp_path / 'job')
+    assert rv.copiar_build(app.diretorio, destino)
+    job = EmbeddingStore(diretorio=destino)
+    assert job.ids == ['1', '2', '3']
+    np.testing.assert_array_equal(job.matriz, app.matriz)
+
+    # o build do job troca de geração sem apagar nada do app
+    assert job.sincronizar(['1', '2', '3', '4'], ['python', 'java', 'sap', 'rust'], modelo) == 1
+    assert sorted(os.listdir(app.diretorio)) == arquivos_app
+    assert EmbeddingStore(diretorio=app.diretorio).ids == ['1', '2', '3']
+
+    # o store do job já existe: não é sobrescrito
+    assert not rv.copiar_build(app.diretorio, destino)
@@ -0,0 +1,190 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tratarbase as tb
+from benchmarks.tratamento_por_celula import tratar_base_por_celula, preparar_applicants_por_celula
+
+
+UUID = '12345678-1234-5678-1234-567812345678'
+TEXTOS = ['  Dev\tPython\n\nSênior ', 'aspas "duplas" e “curvas” – ’', 'barra\\invertida\r\n', '', '-', None, 'ok',
+          'a\u3000\xa0b\x85 c ', '\x1c x\x1f', ' \\ ', 'um  dois \t três']
+
+
+def frame_exemplo(repeticoes=1):
+    linhas = {
+        'id': [1, 2, 3, 4, 5, 6, 7],
+        'data_criacao': ['01/02/2020', '31/12/1899', 'xx', '', None, '15/08/2021', '-'],
+        'remuneracao': ['R$ 1.234,56', 'sem informacao', '', '-', None, 'abc', '5000'],
+        'codigo_uuid': [UUID, '{' + UUID.upper() + '}', 'urn:uuid:' + UUID, UUID.replace('-', ''),
+                        'nao-e-uuid', None, '1234'],
+        'nota': [1.5, np.nan, 3.0, np.nan, 2.25, 0.0, np.nan],
+        'cargo_atual': TEXTOS[:7],
+        'cv_pt': TEXTOS[-7:],
+        'pcd': ['Sim', 'Não', 'sem_informacao', 'SEM_INFORMACAO', None, '', '-'],
+    }
+    df = pd.DataFrame(linhas)
+    return pd.concat([df] * repeticoes, ignore_index=True)
+
+
+@pytest.mark.parametrize('repeticoes', [1, 50])
+def test_tratar_base_igual_a_versao_por_celula(repeticoes):
+    df = frame_exemplo(repeticoes)
+    esperado = tratar_base_por_celula(df.copy(), colunas_uuid=['codigo_uuid'])
+    obtido = tb.tratar_base(df.copy(), colunas_uuid=['codigo_uuid'])
+    pd.testing.assert_frame_equal(obtido, esperado)
+
+
+def test_preparar_applicants_igual_a_versao_por_celula():
+    df = frame_exemplo(20).reindex(columns=tb.COLUNAS_APPLICANTS)
+    pd.testing.assert_frame_equal(tb.preparar_applicants(df.copy()), preparar_applicants_por_celula(df.copy()))
+
+
+def test_tratar_base_valores():
+    df = tb.tratar_base(frame_exemplo(), colunas_uuid=['codigo_uuid'])
+    assert df['remuneracao'].tolist()[:3] == ['1234.56', 'sem informacao', 'sem informacao']
+    assert df['codigo_uuid'].tolist()[:5] == [UUID] * 4 + ['sem informacao']
+    assert df['data_criacao'].tolist()[:2] == ['2020-02-01', 'sem informacao']
+    assert df['id'].tolist()[0] == '1'
+
+
+def test_limpar_texto_coluna_misturada_igual_a_limpar_texto():
+    serie = pd.Series(TEXTOS + [3.5, np.nan], dtype=object)
+    esperado = serie.map(tb.limpar_texto)
+    pd.testing.assert_series_equal(tb.limpar_texto_coluna(serie), esperado)
+
+
+def test_limpar_texto_coluna_pyarrow_igual_a_limpar_texto(monkeypatch):
+    serie = pd.Series(TEXTOS * 3 + [None, 'fim\u2028linha'], dtype=object)
+    esperado = serie.map(tb.limpar_texto)
+
+    def sem_fallback(texto):
+        raise AssertionError('limpar_texto_coluna caiu no limpar_texto por célula')
+    monkeypatch.setattr(tb, 'limpar_texto', sem_fallback)
+
+    pd.testing.assert_series_equal(tb.limpar_texto_coluna(serie), esperado)
+
+
+def test_espacos_iguais_ao_isspace():
+    assert set(tb.ESPACOS) == {chr(c) for c in range(0x110000) if chr(c).isspace()}
+
+
+def test_limpar_texto_coluna_sem_texto():
+    serie = pd.Series([np.nan, 1.0], dtype=object)
+    pd.testing.assert_series_equal(tb.limpar_texto_coluna(serie), serie.map(tb.limpar_texto))
+
+
+def test_tratar_registro_applicant():
+    registro = tb.tratar_registro_applicant({'id': 10, 'cargo_atual': ' Dev\n  Python ', 'local': 'SP',
+                                             'remuneracao': 'R$ 10,00'})
+    assert registro['cargo_atual'] == 'Dev Python'
+    assert registro['localizacao'] == 'SP'
+    assert registro['remuneracao'] == '10.00'
+
+
+TEXTOS_BM25 = pd.DataFrame({
+    'conhecimentos_tecnicos': ['SAP ABAP, Fiori', 'Python; Django', 'C++ e C#', 'Node.js, Python', None],
+    'certificacoes': ['', 'AWS', 'sem informacao', 'Gestão de Projetos', 'PMP'],
+    'titulo_profissional': ['Analista SAP', 'Desenvolvedor Python', 'Dev C++', 'Dev Node.js', 'Gerente'],
+})
+
+
+def test_termos_bm25():
+    assert tb.termos_bm25('Node.js, C++ e C# — Gestão') == ['node.js', 'c++', 'c#', 'gestao']
+
+
+def test_indice_bm25_busca():
+    indice = tb.IndiceBM25.construir(tb.montar_texto_bm25(TEXTOS_BM25).tolist())
+    posicoes, scores = indice.buscar('python', k=10)
+    assert sorted(posicoes.tolist()) == [1, 3]
+    assert posicoes[0] == 1  # dois termos "python" pesam mais que um
+    assert (np.diff(scores) <= 0).all()
+    assert indice.buscar('gestao', k=10)[0].tolist() == [3]
+    assert len(indice.buscar('cobol', k=10)[0]) == 0
+
+
+def test_indice_bm25_recarregado_do_npz(tmp_path):
+    indice = tb.construir_indice_bm25(TEXTOS_BM25, diretorio_snapshot=str(tmp_path))
+    caminho = tmp_path / 'indice_bm25.npz'
+    assert caminho.exists()
+
+    recarregado = tb.construir_indice_bm25(TEXTOS_BM25, diretorio_snapshot=str(tmp_path))
+    assert recarregado is not indice and recarregado.assinatura == indice.assinatura
+    for consulta in ['python', 'sap fiori aws', 'node.js c++ pmp', 'gestao de projetos']:
+        esperado, obtido = indice.buscar(consulta, k=10), recarregado.buscar(consulta, k=10)
+        np.testing.assert_array_equal(obtido[0], esperado[0])
+        np.testing.assert_allclose(obtido[1], esperado[1], rtol=1e-6)
+
+    # texto diferente: o .npz gravado não é reaproveitado
+    alterado = TEXTOS_BM25.assign(certificacoes=['', 'AWS', '', '', 'ITIL'])
+    assert tb.construir_indice_bm25(alterado, diretorio_snapshot=str(tmp_path)).assinatura != indice.assinatura
+
+
+class ClienteBancoLocal:
+    """
+    O pedaço do cliente Supabase usado por subir_para_supabase (table().upsert/insert().execute()),
+    gravando no BancoLocal do supabase_local. Com `cair_no_lote`, esse envio e todos os
+    seguintes falham, como uma conexão que caiu no meio da carga.
+    """
+
+    def __init__(self, banco, cair_no_lote=None):
+        self.banco = banco
+        self.cair_no_lote = cair_no_lote
+        self.enviados = []
+
+    def table(self, tabela):
+        cliente = self
+
+        class Consulta:
+            def upsert(self, linhas, on_conflict):
+                return self._operacao(linhas, [on_conflict], 'merge-duplicates')
+
+            def insert(self, linhas):
+                return self._operacao(linhas, None, None)
+
+            def _operacao(self, linhas, conflito, resolucao):
+                self.argumentos = (linhas, conflito, resolucao)
+                return self
+
+            def execute(self):
+                linhas, conflito, resolucao = self.argumentos
+                if cliente.cair_no_lote is not None and len(cliente.enviados) >= cliente.cair_no_lote:
+                    raise ConnectionError('conexão perdida')
+                cliente.enviados.append([linha['id'] for linha in linhas])
+                return cliente.banco.inserir(tabela, linhas, conflito, resolucao)
+
+        return Consulta()
+
+
+def test_subir_para_supabase_retoma_do_checkpoint_sem_duplicar(tmp_path, monkeypatch):
+    from supabase_local import BancoLocal
+
+    banco = BancoLocal(str(tmp_path / 'supabase.sqlite'))
+    monkeypatch.setattr(tb, 'DIRETORIO_CHECKPOINT', str(tmp_path / 'upload'))
+    checkpoint = tmp_path / 'upload' / 'applicants_new.json'
+    df = pd.DataFrame({'id': [str(i) for i in range(23)], 'nome': [f'Candidato {i}' for i in range(23)],
+                       'email': [None if i % 4 else f'c{i}@x.com' for i in range(23)], 'texto_cv': 'fora da tabela'})
+
+    # carga interrompida depois de 2 dos 5 lotes
+    cliente = ClienteBancoLocal(banco, cair_no_lote=2)
+    monkeypatch.setattr(tb, 'get_supabase', lambda: cliente)
+    resumo = tb.subir_para_supabase(df, 'applicants_new', tamanho_lote=5, paralelismo=1, max_tentativas=1)
+    assert resumo['enviados'] == 10 and resumo['falhas'] == [2, 3, 4]
+    assert json.loads(checkpoint.read_text())['lotes_concluidos'] == [0, 1]
+
+    # nova execução: só os lotes que faltam
+    cliente = ClienteBancoLocal(banco)
+    monkeypatch.setattr(tb, 'get_supabase', lambda: cliente)
+    resumo = tb.subir_para_supabase(df, 'applicants_new', tamanho_lote=5, paralelismo=2, max_tentativas=1)
+    assert resumo['enviados'] == 13 and resumo['falhas'] == []
+    assert sorted(i for lote in cliente.enviados for i in lote) == sorted(df['id'][10:])
+    assert not checkpoint.exists()
+
+    # reenviar tudo é um upsert: nenhuma linha duplicada
+    tb.subir_para_supabase(df, 'applicants_new', tamanho_lote=5, retomar=False, max_tentativas=1)
+    linhas = banco.selecionar('applicants_new', None, [], 'id', None, None)
+    assert sorted(linha['id'] for linha in linhas) == sorted(df['id'])
+    assert {linha['id']: linha['email'] for linha in linhas}['1'] == 'sem_informacao'
+    assert all('texto_cv' not in linha for linha in linhas)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from vector_index import VectorIndex, top_k
+
+
+class Fonte:
+    """O que o VectorIndex lê de um EmbeddingStore: matriz normalizada e ids."""
+
+    def __init__(self, matriz):
+        self.matriz = matriz
+        self.ids = [f'c{i}' for i in range(len(matriz))]
+
+    def acrescentar(self, vetores):
+        self.matriz = np.concatenate([self.matriz, vetores])
+        self.ids = [f'c{i}' for i in range(len(self.matriz))]
+
+
+def normalizar(matriz):
+    return (matriz / np.linalg.norm(matriz, axis=1, keepdims=True)).astype(np.float32)
+
+
+def matriz_agrupada(n=6000, dimensao=32, grupos=60, semente=7):
+    """Vetores em torno de `grupos` centros, como embeddings de currículos parecidos."""
+    rng = np.random.default_rng(semente)
+    centros = rng.normal(size=(grupos, dimensao))
+    return normalizar(centros[rng.integers(grupos, size=n)] + 0.35 * rng.normal(size=(n, dimensao)))
+
+
+@pytest.fixture(scope='module')
+def indice():
+    return VectorIndex(Fonte(matriz_agrupada()))
+
+
+@pytest.fixture(scope='module')
+def consultas():
+    return matriz_agrupada(n=100, semente=11)
+
+
+def test_top_k():
+    scores = np.array([0.1, 0.9, 0.5, 0.9, 0.3])
+    assert top_k(scores, 2).tolist() == [1, 3]
+    assert top_k(scores, 10).tolist() == [1, 3, 2, 4, 0]
+
+
+def test_busca_exata_e_forca_bruta(indice, consultas):
+    for vetor in consultas[:10]:
+        posicoes, scores = indice.buscar_posicoes(vetor, k=20, exato=True)
+        esperado = np.argsort(-(indice.matriz @ vetor), kind='stable')[:20]
+        np.testing.assert_array_equal(posicoes, esperado)
+        np.testing.assert_allclose(scores, indice.matriz[esperado] @ vetor, rtol=1e-6)
+
+
+def test_recall_ivf(indice, consultas):
+    assert indice.centroides is not None and len(indice.listas) == int(np.sqrt(6000))
+    assert indice.medir_recall(consultas, k=20, nprobe=8)['recall'] >= 0.95  # 0.9865 com esta matriz
+    assert indice.medir_recall(consultas, k=20, nprobe=len(indice.listas))['recall'] == 1.0
+
+
+def test_base_pequena_fica_na_forca_bruta(consultas):
+    pequeno = VectorIndex(Fonte(matriz_agrupada(n=500)))
+    assert pequeno.centroides is None
+    assert pequeno.medir_recall(consultas, k=20)['recall'] == 1.0
+
+
+def test_atualizar_depois_de_insert():
+    fonte = Fonte(matriz_agrupada())
+    indice = VectorIndex(fonte)
+    novos = normalizar(np.random.default_rng(3).normal(size=(5, fonte.matriz.shape[1])))
+    fonte.acrescentar(novos)
+    indice.atualizar(np.arange(6000, 6005))
+
+    assert sum(len(lista) for lista in indice.listas) == 6005
+    for i, vetor in enumerate(novos):
+        ids, scores = indice.buscar(vetor, k=1, nprobe=1)
+        assert ids == [f'c{6000 + i}'] and scores[0] == pytest.approx(1.0, abs=1e-5)
+
+    # update no lugar: a linha muda de lista e sai da antiga
+    fonte.matriz[6000] = novos[1]
+    indice.atualizar([6000])
+    assert sum(len(lista) for lista in indice.listas) == 6005
+    assert (np.concatenate(indice.listas) == 6000).sum() == 1
+    assert 6000 in indice.listas[indice.lista_de[6001]]
+
+
+def test_atualizar_constroi_ivf_ao_passar_do_minimo():
+    fonte = Fonte(matriz_agrupada(n=1990))
+    indice = VectorIndex(fonte)
+    assert indice.centroides is None
+    fonte.acrescentar(matriz_agrupada(n=20, semente=9))
+    indice.atualizar(np.arange(1990, 2010))
+    assert indice.centroides is not None
+    assert sum(len(lista) for lista in indice.listas) == 2010
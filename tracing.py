@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import logging
+import functools
+import tracemalloc
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+logger = logging.getLogger("datathon.tracing")
+
+# Pilha de etapas abertas e coleta ativa são por contexto (thread/sessão do Streamlit)
+_pilha: ContextVar[tuple] = ContextVar("tracing_pilha", default=())
+_coleta: ContextVar[Optional[list]] = ContextVar("tracing_coleta", default=None)
+
+
+def ativar_memoria() -> None:
+    """
+    Liga o tracemalloc. Sem ele as etapas medem só tempo de parede e CPU (custo desprezível).
+    O tracemalloc vale para o processo inteiro (todas as sessões do Streamlit), por isso é
+    ligado só na inicialização, com TRACING_MEMORIA=1.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def memoria_ativa() -> bool:
+    return tracemalloc.is_tracing()
+
+
+if os.getenv("TRACING_MEMORIA", "0") == "1":
+    ativar_memoria()
+
+
+class _Etapa:
+    __slots__ = ("nome", "atributos", "data", "inicio", "cpu_inicio", "memoria_inicio", "pico")
+
+    def __init__(self, nome, atributos):
+        self.nome = nome
+        self.atributos = atributos
+        self.pico = 0
+
+
+def _atualizar_picos(pilha) -> None:
+    """O pico do tracemalloc é global: repassa o valor atual para todas as etapas abertas."""
+    _, pico = tracemalloc.get_traced_memory()
+    for etapa in pilha:
+        etapa.pico = max(etapa.pico, pico)
+
+
+@contextmanager
+def etapa(nome: str, **atributos):
+    """
+    Mede um trecho: tempo de parede, tempo de CPU do processo e, com o tracemalloc
+    ligado, memória alocada (saldo e pico) durante a etapa. Etapas aninhadas
+    ficam com o caminho completo no nome (ex.: "ranking/encode_vaga").
+    """
+    pilha = _pilha.get()
+    memoria = tracemalloc.is_tracing()
+    registro = _Etapa("/".join([e.nome for e in pilha] + [nome]) if pilha else nome, atributos)
+
+    if memoria:
+        _atualizar_picos(pilha)
+        tracemalloc.reset_peak()
+        registro.memoria_inicio, _ = tracemalloc.get_traced_memory()
+
+    token = _pilha.set(pilha + (registro,))
+    registro.data = time.time()
+    registro.inicio = time.perf_counter()
+    registro.cpu_inicio = time.process_time()
+    try:
+        yield registro.atributos
+    finally:
+        dados = {
+            "etapa": registro.nome,
+            "inicio": round(registro.data, 3),
+            "tempo_s": round(time.perf_counter() - registro.inicio, 6),
+            "cpu_s": round(time.process_time() - registro.cpu_inicio, 6),
+        }
+        if memoria and tracemalloc.is_tracing():
+            atual, _ = tracemalloc.get_traced_memory()
+            _atualizar_picos(pilha + (registro,))
+            dados["memoria_alocada_mb"] = round((atual - registro.memoria_inicio) / 1024 ** 2, 3)
+            dados["memoria_pico_mb"] = round(max(0, registro.pico - registro.memoria_inicio) / 1024 ** 2, 3)
+        dados.update(registro.atributos)
+        _pilha.reset(token)
+        _registrar(dados)
+
+
+def rastrear(nome: Optional[str] = None):
+    """Decorador: mede cada chamada da função como uma etapa (nome padrão = nome da função)."""
+    def decorador(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with etapa(rotulo):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+
+def _registrar(dados: dict) -> None:
+    coleta = _coleta.get()
+    if coleta is not None:
+        coleta.append(dados)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(dados, ensure_ascii=False, default=str))
+
+
+@contextmanager
+def coletar():
+    """Junta numa lista as etapas executadas dentro do bloco (ex.: um clique de ranking)."""
+    registros: List[dict] = []
+    token = _coleta.set(registros)
+    try:
+        yield registros
+    finally:
+        _coleta.reset(token)
+
+
+def configurar_log(caminho: Optional[str] = None, nivel: int = logging.INFO) -> None:
+    """Envia cada etapa concluída como uma linha JSON para `caminho` (ou stderr)."""
+    handler = logging.FileHandler(caminho, encoding="utf-8") if caminho else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(nivel)
+    logger.propagate = False
+
+
+if os.getenv("TRACING_LOG"):
+    configurar_log(os.getenv("TRACING_LOG"))
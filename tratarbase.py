@@ -1,3 +1,6 @@
+import os
+import sys
+import hashlib
 import pandas as pd
 import numpy as np
 import json
@@ -6,20 +9,29 @@ import unicodedata
 import re
 import warnings
 import uuid
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from supabase_client import supabase
+try:
+    import ijson  # leitura incremental do applicants.json (modo streaming)
+except ImportError:
+    ijson = None
 
-############################# LER ARQUIVOS JSON
-######## applicants.json
+from supabase_client import get_supabase
+from rate_limiter import com_retentativas_sync
+from vector_index import top_k
 
-with open('documents/applicants.json', 'r', encoding='utf-8') as candidatos:
-    dados = json.load(candidatos)
+DIRETORIO_DOCUMENTOS = 'documents'
+DIRETORIO_SNAPSHOT = os.path.join('cache', 'snapshot')
 
-# Vamos transformar os dados aninhados
-lista_candidatos = []
+# Aumentar quando o tratamento abaixo mudar, para invalidar snapshots antigos
+VERSAO_TRATAMENTO = 2
 
-# Percorrer cada candidato
-for id_candidato, info in dados.items():
+############################# LER ARQUIVOS JSON
+######## applicants.json
+
+def achatar_candidato(id_candidato, info):
     registro = {'id': id_candidato}  # Começamos armazenando o ID
     registro.update(info.get('infos_basicas', {}))
     registro.update(info.get('informacoes_pessoais', {}))
@@ -27,10 +39,51 @@ for id_candidato, info in dados.items():
     registro.update(info.get('formacao_e_idiomas', {}))
     registro.update(info.get('cargo_atual', {}))
     registro['cv_pt'] = info.get('cv_pt', '')
-    lista_candidatos.append(registro)
+    return registro
+
+def ler_applicants(caminho):
+    with open(caminho, 'r', encoding='utf-8') as candidatos:
+        dados = json.load(candidatos)
+
+    # Vamos transformar os dados aninhados
+    lista_candidatos = []
+
+    # Percorrer cada candidato
+    for id_candidato, info in dados.items():
+        lista_candidatos.append(achatar_candidato(id_candidato, info))
+
+    # Criar o DataFrame estruturado
+    return pd.DataFrame(lista_candidatos)
+
+# Colunas brutas mantidas na base applicants (antes do rename de 'local')
+COLUNAS_APPLICANTS = [
+    'id','codigo_profissional','nome','email','sexo','estado_civil',
+    'data_nascimento','telefone','telefone_celular','local','endereco',
+    'pcd','cargo_atual','objetivo_profissional','url_linkedin','titulo_profissional',
+    'area_atuacao','conhecimentos_tecnicos','nivel_academico','cursos','certificacoes',
+    'remuneracao','nivel_profissional', 'nivel_ingles', 'nivel_espanhol','outro_idioma',
+    'cv_pt','instituicao_ensino_superior','qualificacoes','experiencias','outro_curso',
+    'projeto_atual','unidade','download_cv'
+]
 
-# Criar o DataFrame estruturado
-df = pd.DataFrame(lista_candidatos)
+def ler_applicants_em_chunks(caminho, tamanho_chunk=5000):
+    """
+    Lê o applicants.json um candidato por vez (ijson) e gera DataFrames de até
+    `tamanho_chunk` linhas, sempre com as mesmas colunas (COLUNAS_APPLICANTS).
+    O JSON inteiro nunca fica em memória.
+    """
+    if ijson is None:
+        raise ImportError("O modo streaming precisa do pacote 'ijson' (pip install ijson).")
+
+    with open(caminho, 'rb') as candidatos:
+        lote = []
+        for id_candidato, info in ijson.kvitems(candidatos, '', use_float=True):
+            lote.append(achatar_candidato(id_candidato, info))
+            if len(lote) >= tamanho_chunk:
+                yield pd.DataFrame.from_records(lote, columns=COLUNAS_APPLICANTS)
+                lote = []
+        if lote:
+            yield pd.DataFrame.from_records(lote, columns=COLUNAS_APPLICANTS)
 
 #duplicados = df['id'].duplicated(keep=False)  # keep=False marca todas as duplicatas, não só a partir da segunda
 
@@ -55,41 +108,62 @@ def tratar_base(df, colunas_uuid=None, colunas_bool=None):
         if col in df.columns:
             df[col] = pd.to_datetime(df[col], errors='coerce', dayfirst=True)
             df[col] = df[col].where(df[col] >= pd.to_datetime("1900-01-01"))
-            # converter para string ISO ou 'sem informacao'
             df[col] = df[col].dt.strftime('%Y-%m-%d')
             df[col] = df[col].fillna('sem informacao').astype(str)
 
-    # 3. Coluna de remuneração
+    # 3. Coluna de remuneração: '%.2f' aplicado ao array inteiro
     if 'remuneracao' in df.columns:
         df['remuneracao'] = df['remuneracao'].replace('sem informacao', None)
         df['remuneracao'] = df['remuneracao'].astype(str)
         df['remuneracao'] = df['remuneracao'].str.replace('R$', '', regex=False)
         df['remuneracao'] = df['remuneracao'].str.replace('.', '', regex=False)
         df['remuneracao'] = df['remuneracao'].str.replace(',', '.', regex=False)
-        # Converter para float pra limpeza, mas manter como string no final
-        df['remuneracao'] = pd.to_numeric(df['remuneracao'], errors='coerce')
-        df['remuneracao'] = df['remuneracao'].fillna(-1)  # placeholder para nulo
-        df['remuneracao'] = df['remuneracao'].apply(lambda x: 'sem informacao' if x == -1 else f"{x:.2f}")
-
-    # 4. Validar UUIDs nas colunas indicadas, exceto a coluna 'id'
+        valores = pd.to_numeric(df['remuneracao'], errors='coerce').fillna(-1).to_numpy(dtype=float)
+        formatados = np.char.mod('%.2f', valores).astype(object)
+        df['remuneracao'] = pd.Series(
+            np.where(valores == -1, 'sem informacao', formatados).astype(object), index=df.index
+        )
+
+    # 4. Validar UUIDs: forma canônica montada por regex/fatias; só o que foge
+    #    do formato de 32 dígitos hexadecimais passa pelo uuid.UUID
     if colunas_uuid:
+        def validar_uuid(val):
+            if val is None:
+                return 'sem informacao'
+            try:
+                return str(uuid.UUID(str(val)))
+            except Exception:
+                return 'sem informacao'
+
         for col in colunas_uuid:
             if col == 'id':  # pular coluna id
                 continue
             if col in df.columns:
-                def validar_uuid(val):
-                    if val is None:
-                        return 'sem informacao'
-                    try:
-                        return str(uuid.UUID(str(val)))
-                    except Exception:
-                        return 'sem informacao'
-                df[col] = df[col].apply(validar_uuid)
+                serie = df[col]
+                nulos = serie.isna().to_numpy()
+                hexa = (serie.astype(str)
+                        .str.replace('urn:', '', regex=False)
+                        .str.replace('uuid:', '', regex=False)
+                        .str.strip('{}')
+                        .str.replace('-', '', regex=False)
+                        .str.lower())
+                validos = hexa.str.fullmatch(r'[0-9a-f]{32}').fillna(False).to_numpy(dtype=bool) & ~nulos
+                canonico = (hexa.str[:8] + '-' + hexa.str[8:12] + '-' + hexa.str[12:16] + '-' +
+                            hexa.str[16:20] + '-' + hexa.str[20:])
+
+                resultado = np.full(len(serie), 'sem informacao', dtype=object)
+                resultado[validos] = canonico.to_numpy(dtype=object)[validos]
+                outros = ~validos & ~nulos
+                if outros.any():
+                    resultado[outros] = [validar_uuid(v) for v in serie.to_numpy(dtype=object)[outros]]
+                df[col] = pd.Series(resultado, index=df.index)
 
     # 5. Tratar colunas numéricas para não ter nan (out of range)
     numericas = df.select_dtypes(include=['float', 'int']).columns
     for col in numericas:
-        df[col] = df[col].apply(lambda x: 'sem informacao' if pd.isna(x) or (isinstance(x, float) and (x != x)) else x)
+        ausentes = df[col].isna()
+        if ausentes.any():
+            df[col] = df[col].astype(object).where(~ausentes, 'sem informacao')
 
     # 6. Para todas as colunas EXCETO as de data e remuneração, substituir None/NaN por 'sem informacao'
     colunas_excecao = colunas_data + ['remuneracao']
@@ -103,8 +177,6 @@ def tratar_base(df, colunas_uuid=None, colunas_bool=None):
 
     return df
 
-df_tratado = tratar_base(df)
-
 ###
 def limpar_texto(texto):
     if not isinstance(texto, str):
@@ -125,70 +197,175 @@ def limpar_texto(texto):
     texto = re.sub(r'\s+', ' ', texto)  # espaço múltiplo → 1 espaço
     return texto
 
+# Trocas e espaços do limpar_texto para as funções do pyarrow.compute. ESPACOS são os
+# caracteres de str.isspace (o mesmo \s do re); a regex só casa trechos que mudam:
+# espaço seguido de outro espaço, ou qualquer espaço que não seja ' '.
+TROCAS_TEXTO = [('\\', ' '), ('"', "'"), ('–', '-'), ('“', '"'), ('”', '"'), ('’', "'")]
+ESPACOS = '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+_CLASSE_ESPACOS = '[' + ''.join('\\x{%x}' % ord(c) for c in ESPACOS) + ']'
+_CLASSE_OUTROS_ESPACOS = '[' + ''.join('\\x{%x}' % ord(c) for c in ESPACOS if c != ' ') + ']'
+REGEX_ESPACOS = f' {_CLASSE_ESPACOS}+|{_CLASSE_OUTROS_ESPACOS}{_CLASSE_ESPACOS}*'
+
+def limpar_texto_coluna(serie):
+    """
+    limpar_texto na coluna inteira com os kernels de texto do Arrow (sem loop Python
+    por célula). Colunas que não são só texto/nulos seguem pelo limpar_texto.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        arr = pa.array(serie, type=pa.large_string(), from_pandas=True)
+    except (ImportError, TypeError, ValueError):  # ArrowInvalid/ArrowTypeError herdam de ValueError/TypeError
+        return serie.map(limpar_texto)
+
+    for antigo, novo in TROCAS_TEXTO:
+        arr = pc.replace_substring(arr, antigo, novo)
+    arr = pc.utf8_trim(pc.replace_substring_regex(arr, REGEX_ESPACOS, ' '), ' ')
+    limpo = pd.Series(arr.to_pandas(), index=serie.index, name=serie.name)
+    return limpo.where(serie.notna(), serie)
+
 colunas_texto = ['cv_pt', 'experiencias', 'qualificacoes', 'cursos', 'projeto_atual',
                  'cargo_atual','objetivo_profissional', 'titulo_profissional','area_atuacao',
                  'conhecimentos_tecnicos','qualificacoes','experiencias','nivel_ingles']
 
-for col in colunas_texto:
-    if col in df_tratado.columns:
-        df_tratado[col] = df_tratado[col].apply(limpar_texto)
+# realocado de embeddings
+# Colunas concatenadas no texto_cv (usado nos embeddings)
+COLUNAS_TEXTO_CV = ["cargo_atual", "objetivo_profissional", "titulo_profissional", "area_atuacao","conhecimentos_tecnicos",
+                    "qualificacoes","experiencias","nivel_ingles"]
+
+def montar_texto_cv(df):
+    # Garante colunas necessárias
+    for col in COLUNAS_TEXTO_CV:
+        if col not in df.columns:
+            df[col] = ""
+
+    # Cria campo concatenado com mais colunas (astype(object): aceita colunas categóricas/Arrow)
+    texto_cv = df[COLUNAS_TEXTO_CV[0]].astype(object).fillna("")
+    for col in COLUNAS_TEXTO_CV[1:]:
+        texto_cv = texto_cv + " " + df[col].astype(object).fillna("")
+    return texto_cv
+
+# Campos da vaga (perfil_vagas_tratada) usados no embedding da vaga (match reverso)
+COLUNAS_TEXTO_VAGA = ["titulo_vaga", "areas_atuacao", "nivel_profissional", "nivel_academico", "nivel_ingles",
+                      "principais_atividades", "competencia_tecnicas_e_comportamentais"]
+
+def montar_texto_vaga(df):
+    """Título + perfil da vaga num texto só, sem os preenchimentos 'sem_informacao' do tratar_vagas."""
+    colunas = [c for c in COLUNAS_TEXTO_VAGA if c in df.columns]
+    partes = []
+    for col in colunas:
+        valores = limpar_texto_coluna(df[col].astype(object).fillna('').astype(str))
+        partes.append(valores.mask(valores.isin(['sem_informacao', 'nan', '-']), ''))
+    if not partes:
+        return pd.Series('', index=df.index)
+    texto = partes[0]
+    for parte in partes[1:]:
+        texto = texto + ' ' + parte
+    return texto.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+# Campos exigidos para um candidato entrar no ranking por similaridade
+CAMPOS_ESSENCIAIS = ["cargo_atual", "objetivo_profissional", "titulo_profissional", "area_atuacao"]
+VALORES_INVALIDOS = ['nan', 'sem informação']
+
+def marcar_cadastro_completo(df):
+    """
+    True quando todos os CAMPOS_ESSENCIAIS têm conteúdo (mesmo critério do campo_valido
+    do main.py: não vazio e diferente de 'nan'/'sem informação'), calculado por coluna.
+    """
+    completo = pd.Series(True, index=df.index)
+    for col in CAMPOS_ESSENCIAIS:
+        if col not in df.columns:
+            return pd.Series(False, index=df.index)
+        valores = df[col].astype(str).str.strip().str.lower()
+        completo &= (valores != '') & ~valores.isin(VALORES_INVALIDOS)
+    return completo
 
-applicants = df_tratado[[
-    'id','codigo_profissional','nome','email','sexo','estado_civil',
-    'data_nascimento','telefone','telefone_celular','local','endereco',
-    'pcd','cargo_atual','objetivo_profissional','url_linkedin','titulo_profissional',
-    'area_atuacao','conhecimentos_tecnicos','nivel_academico','cursos','certificacoes',
-    'remuneracao','nivel_profissional', 'nivel_ingles', 'nivel_espanhol','outro_idioma',
-    'cv_pt','instituicao_ensino_superior','qualificacoes','experiencias','outro_curso',
-    'projeto_atual','unidade','download_cv'
-]]
+def preparar_applicants(df):
+    df_tratado = tratar_base(df)
 
-applicants.loc[:, 'pcd'] = applicants['pcd'].apply(lambda x: None if str(x).lower() == 'sem_informacao' else x)
-applicants = applicants.rename(columns={"local": "localizacao"})
+    for col in colunas_texto:
+        if col in df_tratado.columns:
+            df_tratado[col] = limpar_texto_coluna(df_tratado[col])
 
-# realocado de embeddings
-# Garante colunas necessárias
-for col in ["cargo_atual", "objetivo_profissional", "titulo_profissional", "area_atuacao","conhecimentos_tecnicos",
-            "qualificacoes","experiencias","nivel_ingles"]:
-    if col not in applicants.columns:
-        applicants[col] = ""
-
-# Esta etapa feita direto no codigo
-# Cria campo concatenado com mais colunas
-applicants["texto_cv"] = (
-    applicants["cargo_atual"].fillna("") + " " +
-    applicants["objetivo_profissional"].fillna("") + " " +
-    applicants["titulo_profissional"].fillna("") + " " +
-    applicants["area_atuacao"].fillna("") + " " +
-    applicants["conhecimentos_tecnicos"].fillna("") + " " +
-    applicants["qualificacoes"].fillna("") + " " +
-    applicants["experiencias"].fillna("") + " " +
-    applicants["nivel_ingles"].fillna("")
-)
+    applicants = df_tratado[COLUNAS_APPLICANTS]
+
+    applicants.loc[:, 'pcd'] = applicants['pcd'].mask(applicants['pcd'].astype(str).str.lower() == 'sem_informacao', None)
+    applicants = applicants.rename(columns={"local": "localizacao"})
+
+    applicants["texto_cv"] = montar_texto_cv(applicants)
+    applicants["cadastro_completo"] = marcar_cadastro_completo(applicants)
+    return applicants
+
+def preparar_applicants_streaming(caminho, destino_parquet, tamanho_chunk=5000):
+    """
+    Versão streaming de preparar_applicants(ler_applicants(caminho)): cada chunk é
+    tratado e gravado como um row group do Parquet (colunas tipadas como string,
+    exceto a flag booleana cadastro_completo),
+    então o pico de memória depende do tamanho do chunk e não do arquivo.
+    Retorna o total de candidatos gravados.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    escritor = None
+    total = 0
+    try:
+        for chunk in ler_applicants_em_chunks(caminho, tamanho_chunk):
+            tratado = preparar_applicants(chunk)
+            completo = tratado.pop('cadastro_completo')
+            # Tudo é texto após o tratamento; None continua nulo
+            tratado = tratado.astype(object).where(tratado.notna(), None)
+            tratado = tratado.apply(lambda col: col.map(lambda x: x if x is None or isinstance(x, str) else str(x)))
+            tratado['cadastro_completo'] = completo.astype(bool)
+
+            if escritor is None:
+                schema = pa.schema([
+                    (col, pa.bool_() if col == 'cadastro_completo' else pa.string()) for col in tratado.columns
+                ])
+                escritor = pq.ParquetWriter(destino_parquet, schema)
+            escritor.write_table(pa.Table.from_pandas(tratado, schema=schema, preserve_index=False))
+            total += len(tratado)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return total
+
+def tratar_registro_applicant(dados: dict) -> dict:
+    """
+    Aplica a um registro vindo do formulário o mesmo tratamento da carga:
+    tratar_base, limpar_texto nas colunas de texto e 'local' -> 'localizacao'.
+    """
+    df_registro = tratar_base(pd.DataFrame([dados]))
+    for col in colunas_texto:
+        if col in df_registro.columns:
+            df_registro[col] = limpar_texto_coluna(df_registro[col])
+    df_registro = df_registro.rename(columns={"local": "localizacao"})
+    return df_registro.iloc[0].to_dict()
 
 #applicants.head(2)
 #applicants.iloc[:,19:].info()
 ###################################################################################
 #                                   Prospects.json
 
-with open('documents/prospects.json', 'r', encoding='utf-8') as perspectivas:
-    objetivo_empresa = json.load(perspectivas)
+def ler_prospects(caminho):
+    with open(caminho, 'r', encoding='utf-8') as perspectivas:
+        objetivo_empresa = json.load(perspectivas)
 
-lista_perspectivas = []
+    lista_perspectivas = []
 
-for codigo_vaga, vaga in objetivo_empresa.items():
-    titulo = vaga['titulo']
-    modalidade = vaga['modalidade']
-    for prospect in vaga['prospects']:
-        registro = {
-            'codigo_vaga': codigo_vaga,
-            'titulo': titulo,
-            'modalidade': modalidade,
-            **prospect
-        }
-        lista_perspectivas.append(registro)
+    for codigo_vaga, vaga in objetivo_empresa.items():
+        titulo = vaga['titulo']
+        modalidade = vaga['modalidade']
+        for prospect in vaga['prospects']:
+            registro = {
+                'codigo_vaga': codigo_vaga,
+                'titulo': titulo,
+                'modalidade': modalidade,
+                **prospect
+            }
+            lista_perspectivas.append(registro)
 
-prospects = pd.DataFrame(lista_perspectivas)
+    return pd.DataFrame(lista_perspectivas)
 
 def tratar_propects(df):
     df['data_candidatura'] = pd.to_datetime(df['data_candidatura'], dayfirst=True, errors='coerce')
@@ -196,16 +373,15 @@ def tratar_propects(df):
     df['comentario'] = df['comentario'].apply(lambda x: 'sem informacao' if str(x).strip() == '' else x)
     return df
 
-prospects_tratada = tratar_propects(prospects)
-prospects_tratada.drop(columns='modalidade', inplace=True)
-
 ###############################################################################
 #                                 vagas.json
 
-with open('documents/vagas.json', 'r', encoding='utf-8') as vagas:
-    perfil_vagas = json.load(vagas)
+def ler_vagas(caminho):
+    with open(caminho, 'r', encoding='utf-8') as vagas:
+        perfil_vagas = json.load(vagas)
+    return montar_vagas(perfil_vagas)
 
-def tratar_vagas(dados_vagas):
+def montar_vagas(dados_vagas):
     lista_vagas = []
     for codigo_vaga, vaga in dados_vagas.items():
         registro = {'codigo_vaga': codigo_vaga}
@@ -216,8 +392,6 @@ def tratar_vagas(dados_vagas):
     df_vagas = pd.DataFrame(lista_vagas)
     return df_vagas
 
-perfil_vagas = tratar_vagas(perfil_vagas)
-
 def tratar_vagas(df):
     df = df.copy()
 
@@ -279,7 +453,505 @@ def tratar_vagas(df):
 
     return df
 
-perfil_vagas_tratada = tratar_vagas(perfil_vagas)
+####################################################################################
+# Snapshot colunar das bases tratadas
+#
+# As três bases tratadas são gravadas em Parquet numa pasta de cache, junto com um
+# manifesto contendo o hash (sha256) de cada JSON de origem. Enquanto os JSON não
+# mudarem, as próximas inicializações leem o snapshot em vez de refazer o tratamento.
+
+ARQUIVOS_ORIGEM = {
+    'applicants': 'applicants.json',
+    'prospects': 'prospects.json',
+    'vagas': 'vagas.json',
+}
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def _assinatura_origem(diretorio, manifesto_anterior=None):
+    """Hash de cada JSON de origem; reaproveita o hash anterior se tamanho e mtime não mudaram."""
+    anteriores = (manifesto_anterior or {}).get('origem', {})
+    origem = {}
+    for nome, arquivo in ARQUIVOS_ORIGEM.items():
+        caminho = os.path.join(diretorio, arquivo)
+        stat = os.stat(caminho)
+        anterior = anteriores.get(nome, {})
+        if anterior.get('tamanho') == stat.st_size and anterior.get('mtime') == stat.st_mtime:
+            sha = anterior['sha256']
+        else:
+            sha = hash_arquivo(caminho)
+        origem[nome] = {'tamanho': stat.st_size, 'mtime': stat.st_mtime, 'sha256': sha}
+    return origem
+
+def _ler_manifesto(diretorio_snapshot):
+    caminho = os.path.join(diretorio_snapshot, 'manifesto.json')
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _salvar_frame(df, diretorio_snapshot, nome):
+    """Grava em Parquet; colunas com tipos mistos que o Arrow não aceita caem para pickle."""
+    try:
+        df.to_parquet(os.path.join(diretorio_snapshot, f'{nome}.parquet'), index=False)
+        return 'parquet'
+    except Exception as e:
+        print(f"⚠️ '{nome}' não pôde ser gravado em Parquet ({e}). Usando pickle.")
+        df.to_pickle(os.path.join(diretorio_snapshot, f'{nome}.pkl'))
+        return 'pickle'
+
+def _caminho_frame(diretorio_snapshot, nome, formato):
+    return os.path.join(diretorio_snapshot, f'{nome}.parquet' if formato == 'parquet' else f'{nome}.pkl')
+
+def _ler_frame(diretorio_snapshot, nome, formato, excluir=None):
+    """`excluir`: colunas que não devem ser lidas (no Parquet nem saem do disco)."""
+    caminho = _caminho_frame(diretorio_snapshot, nome, formato)
+    if formato == 'parquet':
+        colunas = None
+        if excluir:
+            import pyarrow.parquet as pq
+            colunas = [c for c in pq.read_schema(caminho).names if c not in excluir]
+        return pd.read_parquet(caminho, columns=colunas)
+    df = pd.read_pickle(caminho)
+    return df.drop(columns=[c for c in excluir or [] if c in df.columns])
+
+####################################################################################
+# Layout compacto do applicants em memória
+#
+# Campos de baixa cardinalidade (e o 'sem informacao' repetido) viram category;
+# o restante do texto vira string do Arrow. Textos longos (cv_pt) ficam fora do
+# DataFrame principal e são lidos do snapshot só quando alguém pede (TextosLongos).
+
+COLUNAS_CATEGORICAS = ['sexo', 'estado_civil', 'endereco', 'pcd', 'nivel_ingles', 'nivel_espanhol',
+                       'nivel_profissional', 'nivel_academico']
+COLUNAS_TEXTO_LONGO = ['cv_pt']
+
+def _tipo_string():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return None
+
+def compactar_applicants(df, limite_categoria=0.5):
+    """
+    Converte as colunas de texto: COLUNAS_CATEGORICAS (e qualquer coluna com
+    poucos valores distintos, até `limite_categoria` do total) para category;
+    as demais para string[pyarrow]. Colunas com tipos mistos ficam como estão.
+    Idempotente: colunas já compactas não são convertidas de novo.
+    """
+    tipo_string = _tipo_string()
+    df = df.copy(deep=False)
+    for col in df.columns:
+        serie = df[col]
+        if isinstance(serie.dtype, pd.StringDtype) and tipo_string is not None and serie.dtype != tipo_string:
+            df[col] = serie.astype(tipo_string)  # o Parquet devolve 'string' com armazenamento python
+            continue
+        if serie.dtype != object:
+            continue
+        if pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty'):
+            continue
+        distintos = serie.nunique(dropna=True)
+        if col in COLUNAS_CATEGORICAS or distintos <= limite_categoria * len(serie):
+            df[col] = serie.astype('category')
+        elif tipo_string is not None and col not in COLUNAS_TEXTO_LONGO:
+            df[col] = serie.astype(tipo_string)
+    return df
+
+def relatorio_memoria(df_original, df_compacto=None):
+    """
+    Memória por coluna (memory_usage deep) do layout original x compacto (sem os
+    textos longos, que saem do DataFrame principal). Retorna (DataFrame, totais em MB).
+    """
+    if df_compacto is None:
+        df_compacto = compactar_applicants(df_original)
+    df_compacto = df_compacto.drop(columns=[c for c in COLUNAS_TEXTO_LONGO if c in df_compacto.columns])
+
+    antes = df_original.memory_usage(deep=True, index=False)
+    depois = df_compacto.memory_usage(deep=True, index=False)
+    relatorio = pd.DataFrame({
+        'dtype_original': df_original.dtypes.astype(str),
+        'mb_original': antes / 1024 ** 2,
+        'dtype_compacto': df_compacto.dtypes.astype(str).reindex(df_original.columns, fill_value='(fora)'),
+        'mb_compacto': (depois / 1024 ** 2).reindex(df_original.columns, fill_value=0.0),
+    }).sort_values('mb_original', ascending=False)
+    totais = {
+        'mb_original': round(float(antes.sum()) / 1024 ** 2, 2),
+        'mb_compacto': round(float(depois.sum()) / 1024 ** 2, 2),
+    }
+    totais['reducao'] = round(1 - totais['mb_compacto'] / totais['mb_original'], 3) if totais['mb_original'] else 0.0
+    return relatorio.round(3), totais
+
+class TextosLongos:
+    """
+    Colunas de texto longo dos applicants (COLUNAS_TEXTO_LONGO), por id.
+    Com `caminho`, só lê do snapshot no primeiro acesso; com `df`, usa o frame dado.
+    """
+
+    def __init__(self, caminho=None, formato='parquet', df=None):
+        self.caminho = caminho
+        self.formato = formato
+        self._df = None if df is None else df.set_index(df['id'].astype(str))[COLUNAS_TEXTO_LONGO]
+        self._lock = threading.Lock()
+
+    @property
+    def df(self):
+        if self._df is None:
+            with self._lock:
+                if self._df is None:
+                    if self.caminho is None or not os.path.exists(self.caminho):
+                        print("⚠️ Snapshot sem textos longos; retornando vazio.")
+                        df = pd.DataFrame(columns=['id', *COLUNAS_TEXTO_LONGO])
+                    elif self.formato == 'parquet':
+                        df = pd.read_parquet(self.caminho, columns=['id', *COLUNAS_TEXTO_LONGO])
+                    else:
+                        df = pd.read_pickle(self.caminho)[['id', *COLUNAS_TEXTO_LONGO]]
+                    self._df = df.set_index(df['id'].astype(str))[COLUNAS_TEXTO_LONGO]
+        return self._df
+
+    def obter(self, ids, colunas=None):
+        """Textos dos ids pedidos, na mesma ordem (NaN para ids sem texto)."""
+        return self.df.reindex([str(i) for i in ids])[colunas or COLUNAS_TEXTO_LONGO]
+
+    def juntar(self, df):
+        """Devolve `df` com as colunas de texto longo de volta (ex.: para subir ao Supabase)."""
+        textos = self.obter(df['id'].tolist())
+        return df.assign(**{col: textos[col].to_numpy() for col in COLUNAS_TEXTO_LONGO})
+
+    def iterar(self, tamanho_lote=5000):
+        """(ids, DataFrame de textos) em lotes, para jobs offline."""
+        df = self.df
+        for inicio in range(0, len(df), tamanho_lote):
+            lote = df.iloc[inicio:inicio + tamanho_lote]
+            yield lote.index.tolist(), lote
+
+    def __len__(self):
+        return len(self.df)
+
+_textos_longos = {}
+
+def obter_textos_longos(diretorio_snapshot=DIRETORIO_SNAPSHOT):
+    """TextosLongos das bases carregadas a partir de `diretorio_snapshot`."""
+    return _textos_longos.get(diretorio_snapshot) or TextosLongos(
+        _caminho_frame(diretorio_snapshot, 'applicants', 'parquet')
+    )
+
+def _separar_textos_longos(applicants, diretorio_snapshot, formato=None):
+    """Tira as colunas longas do applicants e registra onde buscá-las depois."""
+    presentes = [c for c in COLUNAS_TEXTO_LONGO if c in applicants.columns]
+    if formato is not None:
+        _textos_longos[diretorio_snapshot] = TextosLongos(
+            _caminho_frame(diretorio_snapshot, 'applicants', formato), formato
+        )
+    elif presentes:
+        _textos_longos[diretorio_snapshot] = TextosLongos(df=applicants[['id', *presentes]])
+    return applicants.drop(columns=presentes)
+
+def processar_bases(diretorio=DIRETORIO_DOCUMENTOS, streaming=False, diretorio_snapshot=DIRETORIO_SNAPSHOT):
+    """
+    Lê os JSON e aplica todo o tratamento (caminho lento, sem snapshot).
+    Com streaming=True, applicants é tratado em chunks e gravado direto como o
+    applicants.parquet do snapshot; o frame devolvido vem sem COLUNAS_TEXTO_LONGO,
+    que ficam só no arquivo (TextosLongos), então o applicants inteiro nunca está em memória.
+    """
+    if streaming:
+        os.makedirs(diretorio_snapshot, exist_ok=True)
+        destino = _caminho_frame(diretorio_snapshot, 'applicants', 'parquet')
+        preparar_applicants_streaming(os.path.join(diretorio, 'applicants.json'), destino)
+        applicants = _ler_frame(diretorio_snapshot, 'applicants', 'parquet', excluir=COLUNAS_TEXTO_LONGO)
+    else:
+        applicants = preparar_applicants(ler_applicants(os.path.join(diretorio, 'applicants.json')))
+
+    prospects_tratada = tratar_propects(ler_prospects(os.path.join(diretorio, 'prospects.json')))
+    prospects_tratada.drop(columns='modalidade', inplace=True)
+
+    perfil_vagas_tratada = tratar_vagas(ler_vagas(os.path.join(diretorio, 'vagas.json')))
+
+    return applicants, prospects_tratada, perfil_vagas_tratada
+
+def salvar_snapshot(bases, origem, diretorio_snapshot=DIRETORIO_SNAPSHOT):
+    os.makedirs(diretorio_snapshot, exist_ok=True)
+    formatos = {}
+    for nome, df in zip(('applicants', 'prospects_tratada', 'perfil_vagas_tratada'), bases):
+        formatos[nome] = _salvar_frame(df, diretorio_snapshot, nome)
+    _gravar_manifesto(origem, formatos, diretorio_snapshot)
+
+def _gravar_manifesto(origem, formatos, diretorio_snapshot):
+    manifesto = {'versao': VERSAO_TRATAMENTO, 'origem': origem, 'formatos': formatos}
+    # manifesto por último: snapshot incompleto nunca é considerado válido
+    with open(os.path.join(diretorio_snapshot, 'manifesto.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2)
+
+def carregar_bases(diretorio=DIRETORIO_DOCUMENTOS, diretorio_snapshot=DIRETORIO_SNAPSHOT, reconstruir=False,
+                   streaming=None):
+    """
+    Retorna (applicants, prospects_tratada, perfil_vagas_tratada).
+    Usa o snapshot se os hashes dos JSON e a versão do tratamento baterem;
+    caso contrário processa os JSON e grava um novo snapshot.
+    streaming=None segue a variável de ambiente TRATARBASE_STREAMING (1 = ligado).
+    """
+    if streaming is None:
+        streaming = os.getenv('TRATARBASE_STREAMING', '0') == '1'
+
+    manifesto = _ler_manifesto(diretorio_snapshot)
+    origem = _assinatura_origem(diretorio, manifesto)
+
+    snapshot_valido = (
+        not reconstruir
+        and manifesto is not None
+        and manifesto.get('versao') == VERSAO_TRATAMENTO
+        and {n: o['sha256'] for n, o in manifesto['origem'].items()} == {n: o['sha256'] for n, o in origem.items()}
+    )
+
+    if snapshot_valido:
+        try:
+            formatos = manifesto['formatos']
+            applicants = _ler_frame(diretorio_snapshot, 'applicants', formatos['applicants'],
+                                    excluir=COLUNAS_TEXTO_LONGO)
+            _separar_textos_longos(applicants, diretorio_snapshot, formatos['applicants'])
+            return (
+                compactar_applicants(applicants),
+                _ler_frame(diretorio_snapshot, 'prospects_tratada', formatos['prospects_tratada']),
+                _ler_frame(diretorio_snapshot, 'perfil_vagas_tratada', formatos['perfil_vagas_tratada']),
+            )
+        except Exception as e:
+            print(f"⚠️ Falha ao ler snapshot ({e}). Reprocessando os JSON.")
+
+    if manifesto is not None:
+        # invalida o snapshot antigo antes de sobrescrever qualquer arquivo
+        os.remove(os.path.join(diretorio_snapshot, 'manifesto.json'))
+
+    applicants, prospects_tratada, perfil_vagas_tratada = processar_bases(
+        diretorio, streaming=streaming, diretorio_snapshot=diretorio_snapshot
+    )
+    # O snapshot guarda o layout compacto (category vira dictionary no Parquet) com os textos longos
+    applicants = compactar_applicants(applicants)
+    bases = (applicants, prospects_tratada, perfil_vagas_tratada)
+    formato_applicants = None
+    try:
+        if streaming:
+            # o applicants.parquet gravado em chunks já é o arquivo do snapshot
+            formatos = {'applicants': 'parquet'}
+            for nome, df in (('prospects_tratada', prospects_tratada), ('perfil_vagas_tratada', perfil_vagas_tratada)):
+                formatos[nome] = _salvar_frame(df, diretorio_snapshot, nome)
+            _gravar_manifesto(origem, formatos, diretorio_snapshot)
+        else:
+            salvar_snapshot(bases, origem, diretorio_snapshot)
+        formato_applicants = _ler_manifesto(diretorio_snapshot)['formatos']['applicants']
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar o snapshot: {e}")
+
+    applicants = _separar_textos_longos(applicants, diretorio_snapshot, formato_applicants)
+    return applicants, prospects_tratada, perfil_vagas_tratada
+
+####################################################################################
+# Acesso preguiçoso às bases
+#
+# Importar este módulo não lê nenhum arquivo. As bases são carregadas no primeiro
+# acesso (obter_bases() ou `from tratarbase import applicants`) e ficam em cache
+# no processo, compartilhadas por todas as sessões do Streamlit.
+
+_bases = None
+_lock_bases = threading.Lock()
+
+def obter_bases(reconstruir=False, streaming=None):
+    """(applicants, prospects_tratada, perfil_vagas_tratada), carregadas uma vez por processo."""
+    global _bases
+    with _lock_bases:
+        if _bases is None or reconstruir:
+            _bases = carregar_bases(reconstruir=reconstruir, streaming=streaming)
+    return _bases
+
+_NOMES_BASES = ('applicants', 'prospects_tratada', 'perfil_vagas_tratada')
+
+def __getattr__(nome):
+    if nome in _NOMES_BASES:
+        return obter_bases()[_NOMES_BASES.index(nome)]
+    raise AttributeError(f"module 'tratarbase' has no attribute '{nome}'")
+
+####################################################################################
+# Índice BM25 (busca lexical)
+#
+# Índice invertido sobre as colunas em que aparecem as tecnologias e certificações do
+# candidato. Termos sem acento e em minúsculas (unidecode), para "Gestão" casar com
+# "gestao". Usado pelo retriever híbrido do database (BM25 + embeddings).
+
+COLUNAS_BM25 = ['conhecimentos_tecnicos', 'certificacoes', 'titulo_profissional']
+STOPWORDS_BM25 = {'a', 'o', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'com', 'para', 'por', 'na', 'no',
+                  'nas', 'nos', 'um', 'uma', 'ou', 'sem', 'informacao', 'nan'}
+_RE_TERMO = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+
+def termos_bm25(texto):
+    """Termos normalizados: sem acento, minúsculos, mantendo c++, c#, node.js etc."""
+    if not isinstance(texto, str) or not texto:
+        return []
+    return [t for t in _RE_TERMO.findall(unidecode.unidecode(texto).lower()) if t not in STOPWORDS_BM25]
+
+def montar_texto_bm25(df, colunas=None):
+    colunas = [c for c in (colunas or COLUNAS_BM25) if c in df.columns]
+    if not colunas:
+        return pd.Series('', index=df.index)
+    texto = df[colunas[0]].astype(object).fillna('').astype(str)
+    for col in colunas[1:]:
+        texto = texto + ' ' + df[col].astype(object).fillna('').astype(str)
+    return texto
+
+class IndiceBM25:
+    """
+    BM25 (Okapi) em formato CSR: para cada termo, as posições dos documentos (linhas do
+    applicants) e a frequência do termo em cada um. A consulta só toca as listas dos
+    termos pedidos, então o custo depende de quantos documentos contêm esses termos.
+
+    Documentos alterados depois do build ficam num delta em memória (atualizar): as
+    linhas antigas deixam de contar e o texto novo é pontuado à parte, com os mesmos
+    idf e tamanho médio do build. Termos que só aparecem no delta usam o idf calculado
+    com a contagem de documentos do delta.
+    """
+
+    def __init__(self, termos, inicio, docs, freqs, tamanhos, k1=1.5, b=0.75, assinatura=None):
+        self.termos = termos                      # termo -> índice nas listas
+        self.inicio = inicio                      # postings do termo t: [inicio[t], inicio[t + 1])
+        self.docs = docs
+        self.freqs = freqs
+        self.tamanhos = tamanhos
+        self.k1 = k1
+        self.b = b
+        self.assinatura = assinatura
+        self.n_docs = len(tamanhos)
+        self.tamanho_medio = float(tamanhos.mean()) if len(tamanhos) else 0.0
+        n_com_termo = np.diff(inicio)
+        self.idf = np.log(1 + (self.n_docs - n_com_termo + 0.5) / (n_com_termo + 0.5)).astype(np.float32)
+        self._delta = {}                          # posição -> (Counter de termos, tamanho)
+        self._alteradas = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def construir(cls, textos, k1=1.5, b=0.75, assinatura=None):
+        termos, docs, ids_termos, freqs, tamanhos = {}, [], [], [], []
+        for pos, texto in enumerate(textos):
+            contagem = {}
+            lista = termos_bm25(texto)
+            for termo in lista:
+                contagem[termo] = contagem.get(termo, 0) + 1
+            for termo, freq in contagem.items():
+                ids_termos.append(termos.setdefault(termo, len(termos)))
+                docs.append(pos)
+                freqs.append(freq)
+            tamanhos.append(len(lista))
+
+        ids_termos = np.asarray(ids_termos, dtype=np.int32)
+        ordem = np.argsort(ids_termos, kind='stable')
+        inicio = np.searchsorted(ids_termos[ordem], np.arange(len(termos) + 1)).astype(np.int64)
+        return cls(termos, inicio, np.asarray(docs, dtype=np.int32)[ordem],
+                   np.asarray(freqs, dtype=np.float32)[ordem], np.asarray(tamanhos, dtype=np.float32),
+                   k1=k1, b=b, assinatura=assinatura)
+
+    def _peso(self, freqs, tamanhos):
+        return freqs * (self.k1 + 1) / (freqs + self.k1 * (1 - self.b + self.b * tamanhos / (self.tamanho_medio or 1.0)))
+
+    def buscar(self, consulta, k=500):
+        """(posições, scores BM25) dos k documentos com maior score; vazio se nenhum termo casar."""
+        docs, pesos = [], []
+        termos_consulta = set(termos_bm25(consulta))
+        for termo in termos_consulta:
+            t = self.termos.get(termo)
+            if t is None:
+                continue
+            a, z = self.inicio[t], self.inicio[t + 1]
+            docs.append(self.docs[a:z])
+            pesos.append(self.idf[t] * self._peso(self.freqs[a:z], self.tamanhos[self.docs[a:z]]))
+
+        if docs and len(self._alteradas):
+            # linhas com delta: descarta a versão do build (o texto novo é pontuado abaixo)
+            docs, pesos = np.concatenate(docs), np.concatenate(pesos)
+            manter = ~np.isin(docs, self._alteradas)
+            docs, pesos = [docs[manter]], [pesos[manter]]
+
+        idf_delta, n_docs = {}, max(self.n_docs, len(self._delta))
+        for termo in termos_consulta - self.termos.keys():
+            n_com_termo = sum(termo in contagem for contagem, _ in self._delta.values())
+            if n_com_termo:
+                idf_delta[termo] = np.log(1 + (n_docs - n_com_termo + 0.5) / (n_com_termo + 0.5))
+
+        for pos, (contagem, tamanho) in self._delta.items():
+            score = sum((self.idf[self.termos[t]] if t in self.termos else idf_delta[t]) * self._peso(contagem[t], tamanho)
+                        for t in termos_consulta if t in contagem)
+            if score:
+                docs.append(np.array([pos], dtype=np.int32))
+                pesos.append(np.array([score], dtype=np.float32))
+
+        if not sum(len(d) for d in docs):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        unicos, inverso = np.unique(np.concatenate(docs), return_inverse=True)
+        scores = np.bincount(inverso, weights=np.concatenate(pesos)).astype(np.float32)
+        melhores = top_k(scores, k)
+        return unicos[melhores].astype(np.int64), scores[melhores]
+
+    def atualizar(self, posicao, texto):
+        """Registra o texto novo (insert ou update) da linha `posicao` sem reconstruir o índice."""
+        contagem = {}
+        lista = termos_bm25(texto)
+        for termo in lista:
+            contagem[termo] = contagem.get(termo, 0) + 1
+        self._delta[int(posicao)] = (contagem, float(len(lista)))
+        self._alteradas = np.fromiter(self._delta.keys(), dtype=np.int64)
+
+    ####################### Persistência ################################
+    #
+    def salvar(self, caminho):
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        tmp = caminho + '.tmp.npz'
+        vocabulario = np.empty(len(self.termos), dtype=object)
+        for termo, t in self.termos.items():
+            vocabulario[t] = termo
+        np.savez(tmp, vocabulario=vocabulario.astype(str), inicio=self.inicio, docs=self.docs, freqs=self.freqs,
+                 tamanhos=self.tamanhos, parametros=np.array([self.k1, self.b]),
+                 assinatura=np.array(self.assinatura or ''))
+        os.replace(tmp, caminho)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            termos = {termo: t for t, termo in enumerate(dados['vocabulario'].tolist())}
+            k1, b = dados['parametros'].tolist()
+            return cls(termos, dados['inicio'], dados['docs'], dados['freqs'], dados['tamanhos'],
+                       k1=k1, b=b, assinatura=str(dados['assinatura']))
+
+def construir_indice_bm25(df, colunas=None, diretorio_snapshot=DIRETORIO_SNAPSHOT):
+    """
+    IndiceBM25 sobre as linhas de `df` (posição i = linha i). Reaproveita o índice gravado
+    no snapshot quando o texto indexado não mudou (comparado pelo hash do conteúdo).
+    """
+    textos = montar_texto_bm25(df, colunas).tolist()
+    sha = hashlib.sha1()
+    for texto in textos:
+        sha.update(texto.encode('utf-8'))
+        sha.update(b'\x00')
+    assinatura = f"{VERSAO_TRATAMENTO}:{sha.hexdigest()}"
+
+    caminho = os.path.join(diretorio_snapshot, 'indice_bm25.npz')
+    if os.path.exists(caminho):
+        try:
+            indice = IndiceBM25.carregar(caminho)
+            if indice.assinatura == assinatura:
+                return indice
+        except Exception as e:
+            print(f"⚠️ Falha ao ler o índice BM25 ({e}). Reconstruindo.")
+
+    inicio = time.perf_counter()
+    indice = IndiceBM25.construir(textos, assinatura=assinatura)
+    print(f"✅ Índice BM25 com {len(indice.termos)} termos sobre {indice.n_docs} candidatos "
+          f"em {time.perf_counter() - inicio:.2f}s")
+    try:
+        indice.salvar(caminho)
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar o índice BM25: {e}")
+    return indice
 
 ####################################################################################
 # Função para pegar colunas da tabela no Supabase
@@ -290,7 +962,7 @@ def pegar_colunas_tabela(tabela):
         FROM information_schema.columns
         WHERE table_name = '{tabela}';
     """
-    resultado = supabase.rpc('sql', {'q': query}).execute()
+    resultado = get_supabase().rpc('sql', {'q': query}).execute()
     if resultado.data:
         return [row['column_name'] for row in resultado.data]
     else:
@@ -321,10 +993,18 @@ COLUNAS_VALIDAS = {
     ]
 }
 
-#####################################################################################
-def subir_para_supabase(df, tabela):
-    df = df.copy()
+# Colunas usadas no upsert (on_conflict). Tabelas sem chave caem em insert simples.
+CHAVES_PRIMARIAS = {
+    "applicants": "id",
+    "applicants_new": "id",
+    "vagas": "codigo_vaga",
+}
 
+DIRETORIO_CHECKPOINT = os.path.join('cache', 'upload')
+
+#####################################################################################
+def preparar_registros_upload(df, tabela):
+    """Remove colunas fora da tabela e preenche nulos numa única passada por coluna."""
     colunas_validas = COLUNAS_VALIDAS.get(tabela)
     if colunas_validas:
         colunas_extras = [col for col in df.columns if col not in colunas_validas]
@@ -334,28 +1014,118 @@ def subir_para_supabase(df, tabela):
     else:
         print(f"Aviso: tabela '{tabela}' sem definição de colunas válidas.")
 
-    for col in df.select_dtypes(include=['datetime64[ns]']).columns:
-        df[col] = df[col].fillna(pd.Timestamp('1900-01-01'))
-        df[col] = df[col].dt.strftime('%Y-%m-%d')
-
+    df = df.copy(deep=False)  # as colunas substituídas abaixo não alteram o DataFrame original
     for col in df.columns:
-        if df[col].dtype in ['float64', 'int64']:
-            df[col] = df[col].fillna(0.0)
-        elif col in df.select_dtypes(include=['object']).columns:
-            df[col] = df[col].fillna('sem_informacao')
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            df[col] = serie.fillna(pd.Timestamp('1900-01-01')).dt.strftime('%Y-%m-%d')
+        elif serie.dtype in ['float64', 'int64']:
+            df[col] = serie.fillna(0.0)
+        elif isinstance(serie.dtype, pd.CategoricalDtype):
+            # layout compacto (compactar_applicants): a categoria precisa existir antes do fillna
+            if serie.isna().any():
+                if 'sem_informacao' not in serie.cat.categories:
+                    serie = serie.cat.add_categories(['sem_informacao'])
+                df[col] = serie.fillna('sem_informacao')
+        elif serie.dtype == object or isinstance(serie.dtype, pd.StringDtype):
+            df[col] = serie.fillna('sem_informacao')
+
+    if df.isna().to_numpy().any():
+        df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient='records')
+
+
+def _assinatura_upload(dados, tabela, tamanho_lote):
+    """Identifica o conteúdo do envio: o checkpoint só vale para os mesmos dados e lotes."""
+    h = hashlib.sha256(f"{tabela}|{tamanho_lote}|{len(dados)}".encode())
+    for registro in dados:
+        h.update(json.dumps(registro, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _ler_checkpoint(caminho, assinatura):
+    if not os.path.exists(caminho):
+        return set()
+    with open(caminho, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get('assinatura') != assinatura:
+        print("⚠️ Checkpoint de outro conjunto de dados; reenviando tudo.")
+        return set()
+    return set(checkpoint.get('lotes_concluidos', []))
+
+
+def _gravar_checkpoint(caminho, assinatura, concluidos):
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump({'assinatura': assinatura, 'lotes_concluidos': sorted(concluidos)}, f)
+    os.replace(temporario, caminho)
+
+
+def subir_para_supabase(df, tabela, tamanho_lote=1000, paralelismo=4, max_tentativas=4, retomar=True):
+    """
+    Carga em massa: upsert pela chave primária (CHAVES_PRIMARIAS) em lotes de `tamanho_lote`,
+    com até `paralelismo` lotes simultâneos e retentativas com backoff por lote.
 
-    dados = df.replace({np.nan: None}).to_dict(orient='records')
+    Os lotes concluídos vão para um checkpoint em cache/upload/<tabela>.json; rodar de novo
+    com os mesmos dados continua de onde parou (retomar=False reenvia tudo). Como o envio é
+    um upsert, reenviar um lote já gravado não duplica linhas.
+    """
+    dados = preparar_registros_upload(df, tabela)
 
     if len(dados) == 0:
         print(f'Nenhum registro para inserir na tabela {tabela}.')
         return
 
-    resposta = supabase.table(tabela).insert(dados).execute()
+    chave = CHAVES_PRIMARIAS.get(tabela)
+    if chave is None:
+        print(f"Aviso: tabela '{tabela}' sem chave primária configurada; usando insert (não idempotente).")
+
+    lotes = [dados[i:i + tamanho_lote] for i in range(0, len(dados), tamanho_lote)]
+
+    os.makedirs(DIRETORIO_CHECKPOINT, exist_ok=True)
+    caminho_checkpoint = os.path.join(DIRETORIO_CHECKPOINT, f'{tabela}.json')
+    assinatura = _assinatura_upload(dados, tabela, tamanho_lote)
+    concluidos = _ler_checkpoint(caminho_checkpoint, assinatura) if retomar else set()
+    pendentes = [i for i in range(len(lotes)) if i not in concluidos]
+    if concluidos:
+        print(f"↩️ Retomando envio para '{tabela}': {len(concluidos)} de {len(lotes)} lotes já enviados.")
+
+    lock = threading.Lock()
+
+    def enviar(indice):
+        def tentativa():
+            consulta = get_supabase().table(tabela)
+            if chave:
+                return consulta.upsert(lotes[indice], on_conflict=chave).execute()
+            return consulta.insert(lotes[indice]).execute()
+        com_retentativas_sync(tentativa, max_tentativas=max_tentativas,
+                              descricao=f"Lote {indice + 1}/{len(lotes)} de '{tabela}'")
+        with lock:
+            concluidos.add(indice)
+            _gravar_checkpoint(caminho_checkpoint, assinatura, concluidos)
+        return len(lotes[indice])
+
+    inicio = time.perf_counter()
+    enviados, falhas = 0, []
+    with ThreadPoolExecutor(max_workers=paralelismo) as pool:
+        futuros = {pool.submit(enviar, i): i for i in pendentes}
+        for futuro in as_completed(futuros):
+            try:
+                enviados += futuro.result()
+            except Exception as e:
+                falhas.append(futuros[futuro])
+                print(f"❌ Lote {futuros[futuro] + 1} de '{tabela}' falhou definitivamente: {e}")
 
-    if resposta.data is not None:
-        print(f'{len(dados)} registros inseridos com sucesso na tabela {tabela}.')
-    else:
-        print(f'Erro ao inserir na tabela {tabela}: {resposta.error}')
+    duracao = time.perf_counter() - inicio
+    taxa = enviados / duracao if duracao > 0 else 0.0
+    print(f"{enviados} registros enviados para a tabela {tabela} em {duracao:.1f}s ({taxa:,.0f} linhas/s).")
+
+    if falhas:
+        print(f"⚠️ {len(falhas)} lote(s) com erro; rode novamente para continuar do checkpoint.")
+    elif os.path.exists(caminho_checkpoint):
+        os.remove(caminho_checkpoint)
+
+    return {'enviados': enviados, 'lotes': len(lotes), 'falhas': sorted(falhas), 'linhas_por_s': taxa}
 
 
 ################# Inserir direto no SUPABASE
@@ -381,3 +1151,42 @@ def subir_para_supabase(df, tabela):
             
 #subir_para_supabase_em_lotes(applicants, 'applicants_new')
 
+# python tratarbase.py --rebuild  -> reprocessa os JSON e regrava o snapshot
+# python tratarbase.py --rebuild --streaming  -> idem, lendo applicants.json em chunks
+if __name__ == "__main__" and '--rebuild' in sys.argv:
+    applicants, prospects_tratada, perfil_vagas_tratada = obter_bases(
+        reconstruir=True, streaming=True if '--streaming' in sys.argv else None
+    )
+    print(f"✅ Snapshot reconstruído em '{DIRETORIO_SNAPSHOT}': "
+          f"{len(applicants)} applicants, {len(prospects_tratada)} prospects, {len(perfil_vagas_tratada)} vagas.")
+
+# python tratarbase.py --subir applicants_new [--lote 1000] [--paralelo 4]  -> carga em lotes no Supabase
+# (para testar localmente: python supabase_local.py e SUPABASE_URL=http://127.0.0.1:54321)
+if __name__ == "__main__" and '--subir' in sys.argv:
+    def _valor_argumento(nome, padrao):
+        return sys.argv[sys.argv.index(nome) + 1] if nome in sys.argv else padrao
+
+    tabela_destino = _valor_argumento('--subir', 'applicants_new')
+    frames = {'applicants': 'applicants', 'applicants_new': 'applicants',
+              'prospects': 'prospects_tratada', 'vagas': 'perfil_vagas_tratada'}
+    df_destino = obter_bases()[_NOMES_BASES.index(frames[tabela_destino])]
+    if frames[tabela_destino] == 'applicants':
+        df_destino = obter_textos_longos().juntar(df_destino)  # cv_pt fica fora do frame em memória
+    subir_para_supabase(df_destino, tabela_destino,
+                        tamanho_lote=int(_valor_argumento('--lote', 1000)),
+                        paralelismo=int(_valor_argumento('--paralelo', 4)))
+
+# python tratarbase.py --relatorio-memoria  -> memória do applicants: layout original x compacto
+if __name__ == "__main__" and '--relatorio-memoria' in sys.argv:
+    relatorio, totais = relatorio_memoria(preparar_applicants(ler_applicants(os.path.join(DIRETORIO_DOCUMENTOS, 'applicants.json'))))
+    print(relatorio.to_string())
+    print(f"Total: {totais['mb_original']} MB -> {totais['mb_compacto']} MB ({totais['reducao']:.0%} menos)")
+
+# python tratarbase.py --indice-bm25 "sap abap"  -> (re)constrói o índice BM25 do snapshot e faz uma busca
+if __name__ == "__main__" and '--indice-bm25' in sys.argv:
+    indice_bm25 = construir_indice_bm25(obter_bases()[0])
+    consulta_bm25 = sys.argv[sys.argv.index('--indice-bm25') + 1] if len(sys.argv) > sys.argv.index('--indice-bm25') + 1 else ''
+    if consulta_bm25:
+        posicoes_bm25, scores_bm25 = indice_bm25.buscar(consulta_bm25, k=10)
+        print(obter_bases()[0].iloc[posicoes_bm25][['id', *COLUNAS_BM25]].assign(score_bm25=scores_bm25).to_string())
+
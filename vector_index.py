@@ -0,0 +1,181 @@
+import time
+import numpy as np
+
+from typing import List, Optional, Tuple
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Posições (em `scores`) dos k maiores valores, em ordem decrescente (argpartition + sort dos k)."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidatos = np.argpartition(-scores, k - 1)[:k]
+    return candidatos[np.argsort(-scores[candidatos], kind="stable")]
+
+
+class VectorIndex:
+    """
+    Índice de vizinhos mais próximos sobre uma matriz de embeddings normalizados.
+
+    Modo aproximado: IVF (k-means em `n_listas` centróides). A busca visita só as
+    `nprobe` listas mais próximas do vetor de consulta, então `nprobe` é o controle
+    de recall x velocidade (nprobe == n_listas equivale à busca exata).
+    Modo exato: produto interno contra todas as linhas + argpartition (força bruta).
+
+    `fonte` é qualquer objeto com `.matriz` e `.ids` (ex.: EmbeddingStore); a linha i
+    da matriz corresponde a ids[i].
+    """
+
+    MINIMO_PARA_IVF = 2000  # abaixo disso a força bruta já é mais rápida
+
+    def __init__(self, fonte, n_listas: Optional[int] = None, nprobe: int = 8,
+                 iteracoes: int = 10, semente: int = 42):
+        self.fonte = fonte
+        self.n_listas = n_listas
+        self.nprobe = nprobe
+        self.iteracoes = iteracoes
+        self.semente = semente
+
+        self.centroides: Optional[np.ndarray] = None
+        self.listas: List[np.ndarray] = []
+        self.lista_de: Optional[np.ndarray] = None
+
+        self.construir()
+
+    @property
+    def matriz(self) -> np.ndarray:
+        return self.fonte.matriz
+
+    @property
+    def ids(self) -> List[str]:
+        return self.fonte.ids
+
+    ####################### Build ########################################
+    #
+    def construir(self) -> None:
+        """(Re)constrói as listas invertidas. Bases pequenas ficam só com a força bruta."""
+        matriz = self.matriz
+        n = 0 if matriz is None else matriz.shape[0]
+
+        if n < self.MINIMO_PARA_IVF:
+            self.centroides = None
+            self.listas = []
+            self.lista_de = None
+            return
+
+        inicio = time.perf_counter()
+        n_listas = self.n_listas or int(np.sqrt(n))
+        rng = np.random.default_rng(self.semente)
+
+        # k-means (Lloyd) sobre uma amostra; a atribuição final usa a base toda
+        amostra = matriz[rng.choice(n, size=min(n, n_listas * 64), replace=False)]
+        amostra = np.asarray(amostra, dtype=np.float32)
+        centroides = amostra[rng.choice(len(amostra), size=n_listas, replace=False)].copy()
+
+        for _ in range(self.iteracoes):
+            rotulos = np.argmax(amostra @ centroides.T, axis=1)
+            for c in range(n_listas):
+                membros = amostra[rotulos == c]
+                if len(membros):
+                    centroides[c] = membros.mean(axis=0)
+            centroides /= np.linalg.norm(centroides, axis=1, keepdims=True) + 1e-12
+
+        self.centroides = centroides
+        self.lista_de = self._atribuir(matriz)
+        ordem = np.argsort(self.lista_de, kind="stable")
+        limites = np.searchsorted(self.lista_de[ordem], np.arange(n_listas + 1))
+        self.listas = [ordem[limites[c]:limites[c + 1]] for c in range(n_listas)]
+
+        print(f"✅ Índice IVF com {n_listas} listas sobre {n} vetores em {time.perf_counter() - inicio:.2f}s")
+
+    def _atribuir(self, vetores: np.ndarray, bloco: int = 8192) -> np.ndarray:
+        rotulos = np.empty(vetores.shape[0], dtype=np.int32)
+        for i in range(0, vetores.shape[0], bloco):
+            rotulos[i:i + bloco] = np.argmax(np.asarray(vetores[i:i + bloco]) @ self.centroides.T, axis=1)
+        return rotulos
+
+    def atualizar(self, posicoes) -> None:
+        """Reatribui às listas as linhas inseridas/alteradas na fonte, sem reconstruir o índice."""
+        if self.centroides is None:
+            if self.matriz is not None and self.matriz.shape[0] >= self.MINIMO_PARA_IVF:
+                self.construir()
+            return
+
+        posicoes = np.atleast_1d(np.asarray(posicoes, dtype=np.int64))
+        novas_listas = self._atribuir(np.asarray(self.matriz[posicoes]))
+
+        faltando = int(posicoes.max()) + 1 - len(self.lista_de)
+        if faltando > 0:
+            self.lista_de = np.concatenate([self.lista_de, np.full(faltando, -1, dtype=np.int32)])
+
+        for pos, nova in zip(posicoes, novas_listas):
+            antiga = self.lista_de[pos]
+            if antiga == nova:
+                continue
+            if antiga >= 0:
+                self.listas[antiga] = self.listas[antiga][self.listas[antiga] != pos]
+            self.listas[nova] = np.append(self.listas[nova], pos)
+            self.lista_de[pos] = nova
+
+    ####################### Busca ########################################
+    #
+    def _normalizar(self, vetor) -> np.ndarray:
+        vetor = np.asarray(vetor, dtype=np.float32).ravel()
+        return vetor / (np.linalg.norm(vetor) + 1e-12)
+
+    def buscar_posicoes(self, vetor, k: int = 20, nprobe: Optional[int] = None,
+                        exato: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna (posições, scores de cosseno) dos k vizinhos mais próximos."""
+        vetor = self._normalizar(vetor)
+
+        if exato or self.centroides is None:
+            scores = np.asarray(self.matriz) @ vetor
+            top = top_k(scores, k)
+            return top, scores[top]
+
+        nprobe = min(nprobe or self.nprobe, len(self.listas))
+        listas_proximas = top_k(self.centroides @ vetor, nprobe)
+        posicoes = np.concatenate([self.listas[c] for c in listas_proximas])
+        if len(posicoes) == 0:
+            return posicoes, np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(self.matriz[posicoes]) @ vetor
+        top = top_k(scores, k)
+        return posicoes[top], scores[top]
+
+    def buscar(self, vetor, k: int = 20, nprobe: Optional[int] = None,
+               exato: bool = False) -> Tuple[List[str], np.ndarray]:
+        """Retorna (ids, scores de cosseno) dos k vizinhos mais próximos."""
+        posicoes, scores = self.buscar_posicoes(vetor, k=k, nprobe=nprobe, exato=exato)
+        ids = self.ids
+        return [ids[p] for p in posicoes], scores
+
+    ####################### Avaliação ####################################
+    #
+    def medir_recall(self, consultas, k: int = 20, nprobe: Optional[int] = None) -> dict:
+        """
+        Compara o modo aproximado com o exato para as consultas informadas.
+        Retorna recall@k médio e a latência média (ms) de cada modo.
+        """
+        consultas = np.atleast_2d(np.asarray(consultas, dtype=np.float32))
+        acertos, tempo_aprox, tempo_exato = 0.0, 0.0, 0.0
+
+        for vetor in consultas:
+            inicio = time.perf_counter()
+            exatos, _ = self.buscar_posicoes(vetor, k=k, exato=True)
+            tempo_exato += time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            aprox, _ = self.buscar_posicoes(vetor, k=k, nprobe=nprobe)
+            tempo_aprox += time.perf_counter() - inicio
+
+            if len(exatos):
+                acertos += len(np.intersect1d(exatos, aprox)) / len(exatos)
+
+        total = len(consultas)
+        return {
+            "k": k,
+            "nprobe": nprobe or self.nprobe,
+            "recall": acertos / total if total else 0.0,
+            "latencia_aprox_ms": 1000 * tempo_aprox / total if total else 0.0,
+            "latencia_exata_ms": 1000 * tempo_exato / total if total else 0.0,
+        }